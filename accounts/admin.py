@@ -4,8 +4,9 @@ from django.contrib.auth.models import User
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from .models import UserProfile
-import pytz
-from datetime import datetime
+from core.admin_mixins import EstimatedCountMixin, QueryBudgetMixin, TrigramSearchMixin
+from core.thai_dates import thai_datetime
+from core.thumbnails import thumbnail_img
 
 
 class UserProfileInline(admin.StackedInline):
@@ -44,7 +45,7 @@ class UserProfileInline(admin.StackedInline):
         """Display avatar preview"""
         if obj and obj.avatar:
             return mark_safe(
-                f'<div class="avatar-preview"><img src="{obj.avatar.url}" alt="Avatar" /></div>'
+                f'<div class="avatar-preview">{thumbnail_img(obj.avatar, 120, "Avatar")}</div>'
             )
         return "ไม่มีรูป"
     avatar_preview.short_description = 'รูปโปรไฟล์'
@@ -52,48 +53,12 @@ class UserProfileInline(admin.StackedInline):
     
     def created_at_thai(self, obj):
         """Display creation date in Thai Buddhist Era"""
-        if obj and obj.created_at:
-            # Convert to Thai timezone and Buddhist Era
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.created_at.astimezone(thai_tz)
-            
-            # Convert to Buddhist Era (add 543 years)
-            buddhist_year = thai_time.year + 543
-            
-            # Format in Thai
-            thai_months = [
-                'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
-                'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
-            ]
-            
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.created_at if obj else None)
     created_at_thai.short_description = 'วันที่สร้าง'
     
     def updated_at_thai(self, obj):
         """Display update date in Thai Buddhist Era"""
-        if obj and obj.updated_at:
-            # Convert to Thai timezone and Buddhist Era
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.updated_at.astimezone(thai_tz)
-            
-            # Convert to Buddhist Era (add 543 years)
-            buddhist_year = thai_time.year + 543
-            
-            # Format in Thai
-            thai_months = [
-                'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
-                'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
-            ]
-            
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.updated_at if obj else None)
     updated_at_thai.short_description = 'วันที่แก้ไข'
     
     def created_by_display(self, obj):
@@ -119,22 +84,18 @@ class UserProfileInline(admin.StackedInline):
     def delete_avatar(self, request, queryset):
         """Delete avatar for selected profiles"""
         from django.contrib import messages
-        from django.core.files.storage import default_storage
+        
+        profiles = [profile for profile in queryset if profile.avatar]
         
         deleted_count = 0
-        for profile in queryset:
-            if profile.avatar:
-                try:
-                    # Delete file from storage
-                    if default_storage.exists(profile.avatar.name):
-                        default_storage.delete(profile.avatar.name)
-                    
-                    # Clear avatar field
-                    profile.avatar = None
-                    profile.save()
-                    deleted_count += 1
-                except Exception as e:
-                    messages.error(request, f"Error deleting avatar for {profile.user.username}: {e}")
+        for profile in profiles:
+            try:
+                # Clear avatar field; the post_save signal queues the old file for deletion
+                profile.avatar = None
+                profile.save()
+                deleted_count += 1
+            except Exception as e:
+                messages.error(request, f"Error deleting avatar for {profile.user.username}: {e}")
         
         if deleted_count > 0:
             messages.success(request, f"ลบรูปโปรไฟล์ {deleted_count} รายการเรียบร้อยแล้ว")
@@ -156,10 +117,11 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(EstimatedCountMixin, QueryBudgetMixin, TrigramSearchMixin, admin.ModelAdmin):
     """Admin for UserProfile model"""
     
     list_display = ('user', 'full_name', 'phone_number', 'avatar_preview', 'created_by_display', 'updated_by_display', 'created_at_thai')
+    list_select_related = ('user', 'created_by', 'updated_by')
     list_filter = ('created_at', 'updated_at', 'user__is_active', 'user__is_staff')
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'phone_number')
     readonly_fields = ('created_at_thai', 'updated_at_thai', 'created_by_display', 'updated_by_display', 'avatar_preview', 'avatar_with_delete_button')
@@ -204,17 +166,12 @@ class UserProfileAdmin(admin.ModelAdmin):
         """Delete avatar for specific profile"""
         from django.shortcuts import get_object_or_404, redirect
         from django.contrib import messages
-        from django.core.files.storage import default_storage
         
         profile = get_object_or_404(UserProfile, pk=object_id)
         
         if profile.avatar:
             try:
-                # Delete file from storage
-                if default_storage.exists(profile.avatar.name):
-                    default_storage.delete(profile.avatar.name)
-                
-                # Clear avatar field
+                # Clear avatar field; the post_save signal queues the old file for deletion
                 profile.avatar = None
                 profile.save()
                 messages.success(request, f"ลบรูปโปรไฟล์ของ {profile.user.username} เรียบร้อยแล้ว")
@@ -234,7 +191,7 @@ class UserProfileAdmin(admin.ModelAdmin):
         """Display avatar preview"""
         if obj.avatar:
             return mark_safe(
-                f'<div class="avatar-preview"><img src="{obj.avatar.url}" alt="Avatar" /></div>'
+                f'<div class="avatar-preview">{thumbnail_img(obj.avatar, 60, "Avatar")}</div>'
             )
         return "ไม่มีรูป"
     avatar_preview.short_description = 'รูปโปรไฟล์'
@@ -282,56 +239,12 @@ class UserProfileAdmin(admin.ModelAdmin):
     
     def created_at_thai(self, obj):
         """Display creation date in Thai Buddhist Era"""
-        if obj.created_at:
-            # Convert to Thai timezone and Buddhist Era
-            import pytz
-            from datetime import datetime
-            
-            # Convert to Thai timezone
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.created_at.astimezone(thai_tz)
-            
-            # Convert to Buddhist Era (add 543 years)
-            buddhist_year = thai_time.year + 543
-            
-            # Format in Thai
-            thai_months = [
-                'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
-                'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
-            ]
-            
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.created_at)
     created_at_thai.short_description = 'วันที่สร้าง'
     
     def updated_at_thai(self, obj):
         """Display update date in Thai Buddhist Era"""
-        if obj.updated_at:
-            # Convert to Thai timezone and Buddhist Era
-            import pytz
-            from datetime import datetime
-            
-            # Convert to Thai timezone
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.updated_at.astimezone(thai_tz)
-            
-            # Convert to Buddhist Era (add 543 years)
-            buddhist_year = thai_time.year + 543
-            
-            # Format in Thai
-            thai_months = [
-                'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
-                'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
-            ]
-            
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.updated_at)
     updated_at_thai.short_description = 'วันที่แก้ไข'
     
     def save_model(self, request, obj, form, change):
@@ -344,22 +257,18 @@ class UserProfileAdmin(admin.ModelAdmin):
     def delete_avatar(self, request, queryset):
         """Delete avatar for selected profiles"""
         from django.contrib import messages
-        from django.core.files.storage import default_storage
+        
+        profiles = [profile for profile in queryset if profile.avatar]
         
         deleted_count = 0
-        for profile in queryset:
-            if profile.avatar:
-                try:
-                    # Delete file from storage
-                    if default_storage.exists(profile.avatar.name):
-                        default_storage.delete(profile.avatar.name)
-                    
-                    # Clear avatar field
-                    profile.avatar = None
-                    profile.save()
-                    deleted_count += 1
-                except Exception as e:
-                    messages.error(request, f"Error deleting avatar for {profile.user.username}: {e}")
+        for profile in profiles:
+            try:
+                # Clear avatar field; the post_save signal queues the old file for deletion
+                profile.avatar = None
+                profile.save()
+                deleted_count += 1
+            except Exception as e:
+                messages.error(request, f"Error deleting avatar for {profile.user.username}: {e}")
         
         if deleted_count > 0:
             messages.success(request, f"ลบรูปโปรไฟล์ {deleted_count} รายการเรียบร้อยแล้ว")
@@ -376,9 +285,10 @@ class UserProfileAdmin(admin.ModelAdmin):
         return readonly
 
 
-class CustomUserAdmin(BaseUserAdmin):
+class CustomUserAdmin(EstimatedCountMixin, QueryBudgetMixin, TrigramSearchMixin, BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = ('username', 'get_full_name', 'email', 'get_phone_number', 'get_avatar_preview', 'is_active', 'is_staff', 'date_joined_thai')
+    list_select_related = ('profile',)
     list_filter = ('is_active', 'is_staff', 'is_superuser', 'date_joined', 'last_login')
     search_fields = ('username', 'first_name', 'last_name', 'email')
     ordering = ('-date_joined',)
@@ -401,33 +311,15 @@ class CustomUserAdmin(BaseUserAdmin):
     def get_avatar_preview(self, obj):
         if hasattr(obj, 'profile') and obj.profile.avatar:
             return format_html(
-                '<div class="avatar-preview"><img src="{}" /></div>',
-                obj.profile.avatar.url
+                '<div class="avatar-preview">{}</div>',
+                thumbnail_img(obj.profile.avatar, 60)
             )
         return "ไม่มีรูป"
     get_avatar_preview.short_description = 'รูปโปรไฟล์'
     
     def date_joined_thai(self, obj):
         """Display date joined in Thai Buddhist Era"""
-        if obj.date_joined:
-            # Convert to Thai timezone and Buddhist Era
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.date_joined.astimezone(thai_tz)
-            
-            # Convert to Buddhist Era (add 543 years)
-            buddhist_year = thai_time.year + 543
-            
-            # Format in Thai
-            thai_months = [
-                'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
-                'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
-            ]
-            
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.date_joined)
     date_joined_thai.short_description = 'วันที่สมัคร'
 
 
@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.trigram import trigram_indexes
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        trigram_indexes('accounts_userprofile', ('phone_number',)),
+        # UserProfileAdmin and the user admin search these through auth_user
+        trigram_indexes('auth_user', ('username', 'first_name', 'last_name', 'email')),
+    ]
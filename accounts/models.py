@@ -1,11 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+from core.jobs import enqueue_thumbnails
+from core.media import apply_hashed_names, is_hashed_name, new_uploads
+from core.tracking import FieldTrackerMixin
 import os
 
 
 def user_avatar_upload_path(instance, filename):
     """Generate upload path for user avatar"""
+    if is_hashed_name(filename):
+        return f"avatars/{filename}"
     # Get file extension
     ext = filename.split('.')[-1]
     # Create filename with user ID and timestamp
@@ -13,7 +18,7 @@ def user_avatar_upload_path(instance, filename):
     return filename
 
 
-class UserProfile(models.Model):
+class UserProfile(FieldTrackerMixin, models.Model):
     """User Profile model with avatar and additional information"""
     
     user = models.OneToOneField(
@@ -93,6 +98,12 @@ class UserProfile(models.Model):
         verbose_name_plural = 'โปรไฟล์ผู้ใช้'
         ordering = ['-created_at']
     
+    # Image fields that get WebP thumbnails for admin previews
+    THUMBNAIL_FIELDS = ('avatar',)
+    # The old avatar is deleted by signals when it changes; the User signal
+    # only saves the profile when one of these was modified
+    tracked_fields = ('avatar', 'phone_number', 'bio', 'date_of_birth', 'address')
+    
     def __str__(self):
         return f"Profile of {self.user.get_full_name() or self.user.username}"
     
@@ -114,7 +125,10 @@ class UserProfile(models.Model):
             # This is a new profile, set created_by to the user
             self.created_by = self.user
         
+        apply_hashed_names(self, ('avatar',))
+        uploaded = new_uploads(self, self.THUMBNAIL_FIELDS)
         super().save(*args, **kwargs)
+        enqueue_thumbnails(self, uploaded)
     
     def delete_old_avatar(self):
         """Delete old avatar file when updating"""
@@ -1,3 +1,181 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import jobs
+from core.models import MediaJob
+from core.testing import ChangelistQueryCountMixin, TempMediaMixin, image_upload
+from core.thumbnails import with_thumbnails
+
+
+class CountingStorage(FileSystemStorage):
+    """FileSystemStorage that counts every call that would hit R2"""
+    calls = []
+
+    def _save(self, name, content):
+        self.calls.append(('save', name))
+        return super()._save(name, content)
+
+    def _open(self, name, mode='rb'):
+        self.calls.append(('open', name))
+        return super()._open(name, mode)
+
+    def delete(self, name):
+        self.calls.append(('delete', name))
+        return super().delete(name)
+
+    def exists(self, name):
+        self.calls.append(('exists', name))
+        return super().exists(name)
+
+
+def image_upload(name='avatar.png', color=(200, 0, 0)):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class LoginStorageCallsTest(TestCase):
+    """Logging in must not touch media storage"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        storage_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            MEDIA_JOBS_RUN_SYNC=True,
+            STORAGES={
+                'default': {'BACKEND': 'accounts.tests.CountingStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        profile = self.user.profile
+        profile.avatar = image_upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        CountingStorage.calls.clear()
+
+    def test_login_makes_no_storage_calls(self):
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(self.client.login(username='admin', password='password'))
+            self.client.logout()
+
+        self.assertEqual(CountingStorage.calls, [])
+        self.assertFalse(MediaJob.objects.exists())
+
+    def test_user_save_without_profile_changes_skips_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.profile  # loaded but unchanged
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(CountingStorage.calls, [])
+
+    def test_user_save_syncs_changed_profile_fields(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.profile.phone_number = '0812345678'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        self.assertEqual(User.objects.get(pk=user.pk).profile.phone_number, '0812345678')
+        self.assertEqual(CountingStorage.calls, [])
+
+    def test_avatar_change_deletes_only_the_old_avatar(self):
+        profile = User.objects.get(pk=self.user.pk).profile
+        old_name = profile.avatar.name
+        profile.avatar = image_upload('new.png', color=(0, 0, 200))
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        deleted = [name for action, name in CountingStorage.calls if action == 'delete']
+        self.assertIn(old_name, deleted)
+        self.assertNotIn(profile.avatar.name, deleted)
+
+
+class ProfileAdminSearchTest(TestCase):
+    """Profile search reaches auth_user through a subquery"""
+
+    def setUp(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        self.somchai = User.objects.create_user('somchai', first_name='สมชาย', last_name='ใจดี')
+        self.somchai.profile.phone_number = '0812345678'
+        self.somchai.profile.save()
+
+    def search(self, term):
+        response = self.client.get(reverse('admin:accounts_userprofile_changelist'), {'q': term})
+        return [profile.user for profile in response.context['cl'].result_list]
+
+    def test_search_user_and_profile_fields(self):
+        self.assertEqual(self.search('ใจดี'), [self.somchai])
+        self.assertEqual(self.search('SOMCH'), [self.somchai])
+        self.assertEqual(self.search('2345'), [self.somchai])
+        self.assertEqual(self.search('สมชาย 0899'), [])
+
+
+class ChangelistQueryCountTest(ChangelistQueryCountMixin, TestCase):
+    """Changelist query counts must not grow with the number of rows"""
+
+    def add_users(self, count):
+        for _ in range(count):
+            user = User.objects.create_user(f'user{User.objects.count()}', first_name='สมชาย')
+            user.profile.phone_number = '0812345678'
+            user.profile.created_by = self.admin
+            user.profile.save()
+
+    def test_profile_changelist(self):
+        self.assert_constant_queries(reverse('admin:accounts_userprofile_changelist'), self.add_users)
+
+    def test_user_changelist(self):
+        self.assert_constant_queries(reverse('admin:auth_user_changelist'), self.add_users)
+
+
+@mock.patch('core.jobs.close_old_connections')
+class AvatarDeleteTest(TempMediaMixin, TestCase):
+    """Deleting an avatar in the admin queues one delete job and nothing else"""
+
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        user = User.objects.create_user('somchai')
+        self.profile = user.profile
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.avatar = image_upload('avatar.png')
+            self.profile.save()
+        self.files = with_thumbnails([self.profile.avatar.name])
+
+    def delete(self, url, data=None):
+        with self.settings(MEDIA_JOBS_RUN_SYNC=False), self.captureOnCommitCallbacks(execute=True):
+            with mock.patch('core.jobs.bulk_delete', wraps=jobs.bulk_delete) as bulk_delete:
+                response = self.client.post(url, data or {}, follow=True)
+        bulk_delete.assert_not_called()
+        self.assertTrue(all(self.stored(name) for name in self.files))
+        job = MediaJob.objects.get(action='delete_files')
+        self.assertCountEqual(job.names, self.files)
+        jobs.run_job(jobs.claim_jobs(1)[0])
+        self.assertFalse(any(self.stored(name) for name in self.files))
+        return response
+
+    def test_delete_avatar_action(self, _close):
+        response = self.delete(reverse('admin:accounts_userprofile_changelist'), {
+            'action': 'delete_avatar', '_selected_action': [self.profile.pk],
+        })
+        self.assertContains(response, 'ลบรูปโปรไฟล์ 1 รายการเรียบร้อยแล้ว')
+
+    def test_delete_avatar_view(self, _close):
+        self.delete(reverse('admin:accounts_userprofile_delete_avatar', args=[self.profile.pk]))
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.avatar)
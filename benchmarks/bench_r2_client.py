@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: R2 client setup cost per admin save
+
+Compares the old signal code path (load_dotenv() + boto3.client() on every
+post_save) with the shared client from core.r2. No requests are sent to R2,
+so this measures only the client construction overhead that each save paid.
+
+Usage:
+  python benchmarks/bench_r2_client.py [iterations]
+"""
+import os
+import sys
+import time
+import django
+from pathlib import Path
+
+# Add the project directory to Python path
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'easybuytofix.settings')
+django.setup()
+
+import boto3
+from dotenv import load_dotenv
+from core.r2 import get_r2_client, reset_r2_client
+
+# Dummy values so the benchmark runs without R2 credentials
+os.environ.setdefault('R2_ENDPOINT_URL', 'https://example.r2.cloudflarestorage.com')
+os.environ.setdefault('R2_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('R2_SECRET_ACCESS_KEY', 'benchmark')
+
+
+def old_per_save():
+    """Client setup as done by the signals before the shared client"""
+    load_dotenv()
+    return boto3.client(
+        's3',
+        endpoint_url=os.getenv('R2_ENDPOINT_URL'),
+        aws_access_key_id=os.getenv('R2_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('R2_SECRET_ACCESS_KEY'),
+    )
+
+
+def new_per_save():
+    """Client setup with the shared client"""
+    return get_r2_client()
+
+
+def bench(label, func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    per_call_ms = elapsed / iterations * 1000
+    print(f"  {label:<28} {per_call_ms:10.3f} ms/save  ({iterations} saves, {elapsed:.2f}s)")
+    return per_call_ms
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    print("R2 client setup overhead per save")
+    print("=" * 60)
+    reset_r2_client()
+    old_ms = bench('boto3.client() per save', old_per_save, iterations)
+    new_ms = bench('core.r2.get_r2_client()', new_per_save, iterations * 100)
+    print("-" * 60)
+    if new_ms > 0:
+        print(f"  Speedup: {old_ms / new_ms:,.0f}x")
+    print("  (The old path also opened a new TLS connection on the first")
+    print("   request of every save; the shared client keeps them pooled.)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: Thai slugify
+
+Compares the previous per-model custom_slugify / thai_slugify (unidecode or
+a dict lookup plus string concatenation per character, regexes compiled on
+every call) with core.slugs, over a corpus of Thai category, brand and
+manual names. Also checks that both produce identical slugs, since stored
+slugs must not change.
+
+Usage:
+  python benchmarks/bench_slugify.py [rounds]
+"""
+import os
+import re
+import sys
+import time
+import django
+from pathlib import Path
+
+# Add the project directory to Python path
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'easybuytofix.settings')
+django.setup()
+
+from unidecode import unidecode
+from core import slugs
+from core.slugs import THAI_TRANSLITERATION
+
+CATEGORY_NAMES = [
+    'เครื่องใช้ไฟฟ้า', 'อุปกรณ์ก่อสร้าง', 'เครื่องมือช่าง', 'สีและอุปกรณ์ทาสี',
+    'ประปาและสุขภัณฑ์', 'ไฟฟ้าและแสงสว่าง', 'อุปกรณ์ทำสวน', 'เฟอร์นิเจอร์',
+    'ห้องครัว', 'ห้องน้ำ', 'ประตูและหน้าต่าง', 'วัสดุมุงหลังคา',
+    'กาวและซีลแลนท์', 'อุปกรณ์ความปลอดภัย', 'เครื่องปรับอากาศ', 'พัดลม',
+]
+BRAND_NAMES = [
+    'Makita', 'Bosch', 'ตราช้าง SCG', 'TOA', 'เบเยอร์', 'Stanley', 'ไฮโก้',
+    'Panasonic', 'ฮาตาริ', 'Sharp', 'ช้างเผือก', 'Cotto', 'American Standard',
+    'Philips', 'ทองไทย', 'Jotun',
+]
+MANUAL_TITLES = [
+    'วิธีติดตั้งเครื่องทำน้ำอุ่น', 'การเปลี่ยนไส้กรองน้ำ', 'คู่มือการใช้งานสว่านไร้สาย',
+    'ขั้นตอนการทาสีผนังภายนอก', 'การดูแลรักษาเครื่องปรับอากาศ (แอร์) ด้วยตัวเอง',
+    'ตรวจเช็คระบบไฟฟ้าในบ้าน 10 ข้อ', 'How to ติดตั้งก๊อกน้ำ', 'ซ่อมชักโครกรั่ว',
+    'เลือกซื้อปั๊มน้ำ - ฉบับปี ๒๕๖๘', 'การใช้งาน Smart Switch_รุ่นใหม่',
+]
+CORPUS = CATEGORY_NAMES + BRAND_NAMES + MANUAL_TITLES
+
+
+def old_custom_slugify(value):
+    """custom_slugify as previously copied in products/models.py and manuals/models.py"""
+    if not value:
+        return ''
+    decoded = unidecode(value)
+    result = re.sub(r'[^\w\s-]', '', decoded)
+    result = re.sub(r'[-\s]+', '-', result)
+    result = result.strip('-')
+    return result.lower()
+
+
+def old_thai_slugify(text):
+    """thai_slugify as previously defined in products/models.py"""
+    if not text:
+        return ''
+    result = ''
+    for char in text:
+        if char in THAI_TRANSLITERATION:
+            result += THAI_TRANSLITERATION[char]
+        elif char.isalnum():
+            result += char
+        elif char in ' -_':
+            result += '-'
+    result = re.sub(r'-+', '-', result)
+    result = result.strip('-')
+    return result.lower()
+
+
+def bench(label, func, names, rounds, clear=None):
+    if clear:
+        clear()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            func(name)
+    elapsed = time.perf_counter() - start
+    per_call_us = elapsed / (rounds * len(names)) * 1_000_000
+    print(f"  {label:<34} {per_call_us:8.2f} us/name")
+    return per_call_us
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    mismatches = [
+        name for name in CORPUS
+        if old_custom_slugify(name) != slugs.custom_slugify(name)
+        or old_thai_slugify(name) != slugs.thai_slugify(name)
+    ]
+    print(f"Corpus: {len(CORPUS)} names, identical output: {not mismatches}")
+    for name in mismatches:
+        print(f"  ❌ {name}")
+    print("=" * 60)
+
+    print("custom_slugify (unidecode)")
+    old_ms = bench('old', old_custom_slugify, CORPUS, rounds)
+    bench('core.slugs, uncached', slugs._custom_slugify.__wrapped__, CORPUS, rounds)
+    new_ms = bench('core.slugs, memoized', slugs.custom_slugify, CORPUS, rounds,
+                   clear=slugs._custom_slugify.cache_clear)
+    print(f"  Speedup (memoized): {old_ms / new_ms:,.1f}x")
+    print("-" * 60)
+
+    print("thai_slugify (translation table)")
+    old_ms = bench('old', old_thai_slugify, CORPUS, rounds)
+    bench('core.slugs, uncached', slugs._thai_slugify.__wrapped__, CORPUS, rounds)
+    new_ms = bench('core.slugs, memoized', slugs.thai_slugify, CORPUS, rounds,
+                   clear=slugs._thai_slugify.cache_clear)
+    print(f"  Speedup (memoized): {old_ms / new_ms:,.1f}x")
+    print("-" * 60)
+
+    batch = CORPUS * 50
+    slugs._custom_slugify.cache_clear()
+    start = time.perf_counter()
+    slugs.slugify_many(batch)
+    elapsed = time.perf_counter() - start
+    print(f"slugify_many: {len(batch)} names in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
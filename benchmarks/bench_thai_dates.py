@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Benchmark: Thai Buddhist-era date columns
+
+1. Formatter: the previous per-admin *_thai body (pytz.timezone() lookup,
+   month list rebuilt and strftime on every call) against
+   core.thai_dates.thai_datetime, over 500 rows x 2 columns. Also checks
+   that both produce identical strings.
+2. Changelist: renders the category changelist with 500 rows in a
+   throwaway test database, first with the previous created_at_thai and
+   then with the shared formatter.
+
+Usage:
+  python benchmarks/bench_thai_dates.py [rounds]
+"""
+import os
+import sys
+import time
+import django
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+# Add the project directory to Python path
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'easybuytofix.settings')
+django.setup()
+
+import pytz
+from core.thai_dates import thai_date, thai_datetime, _thai_datetime
+
+ROWS = 500
+
+
+def old_thai_datetime(dt):
+    """The formatter previously pasted into every admin"""
+    if dt:
+        thai_tz = pytz.timezone('Asia/Bangkok')
+        thai_time = dt.astimezone(thai_tz)
+        buddhist_year = thai_time.year + 543
+        thai_months = [
+            'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
+            'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
+        ]
+        month_name = thai_months[thai_time.month - 1]
+        return f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
+    return "-"
+
+
+def clear_caches():
+    thai_date.cache_clear()
+    _thai_datetime.cache_clear()
+
+
+def sample_datetimes(count):
+    start = datetime(2024, 12, 31, 16, 30, tzinfo=dt_timezone.utc)
+    return [start + timedelta(minutes=97 * i) for i in range(count)]
+
+
+def best_of(rounds, func):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_formatter(rounds):
+    values = sample_datetimes(ROWS) * 2  # created_at + updated_at columns
+    mismatches = [dt for dt in values if old_thai_datetime(dt) != thai_datetime(dt)]
+    if mismatches:
+        print(f'❌ {len(mismatches)} mismatches, e.g. {mismatches[0]}: '
+              f'{old_thai_datetime(mismatches[0])!r} != {thai_datetime(mismatches[0])!r}')
+        sys.exit(1)
+
+    def run_old():
+        for dt in values:
+            old_thai_datetime(dt)
+
+    def run_new():
+        for dt in values:
+            thai_datetime(dt)
+
+    def run_new_cold():
+        clear_caches()
+        run_new()
+
+    old = best_of(rounds, run_old)
+    cold = best_of(rounds, run_new_cold)
+    warm = best_of(rounds, run_new)
+    print(f'Formatter ({len(values)} cells): old {old * 1000:.2f} ms, '
+          f'new {cold * 1000:.2f} ms ({old / cold:.1f}x), memoized {warm * 1000:.2f} ms ({old / warm:.1f}x)')
+
+
+def bench_changelist(rounds):
+    from django.contrib import admin
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from products.models import Category
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        user = User.objects.create_superuser('bench', 'bench@example.com', 'password')
+        Category.objects.bulk_create(
+            Category(name=f'หมวดหมู่ {i}', slug=f'category-{i}', created_by=user, updated_by=user)
+            for i in range(ROWS)
+        )
+        client = Client()
+        client.force_login(user)
+
+        category_admin = admin.site._registry[Category]
+        category_admin.list_per_page = ROWS
+        admin_class = type(category_admin)
+        new_method = admin_class.created_at_thai
+
+        def old_method(self, obj):
+            return old_thai_datetime(obj.created_at)
+        old_method.short_description = new_method.short_description
+
+        def render():
+            clear_caches()
+            response = client.get('/admin/products/category/')
+            assert response.status_code == 200, response.status_code
+
+        results = {}
+        for label, method in (('old', old_method), ('new', new_method)):
+            admin_class.created_at_thai = method
+            render()  # warm up templates
+            results[label] = best_of(rounds, render)
+        admin_class.created_at_thai = new_method
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f'Changelist ({ROWS} rows): old {results["old"] * 1000:.1f} ms, '
+          f'new {results["new"] * 1000:.1f} ms, saved {(results["old"] - results["new"]) * 1000:.1f} ms')
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    bench_formatter(rounds)
+    bench_changelist(rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Benchmark: admin icontains search with and without pg_trgm indexes
+
+Seeds an UNLOGGED scratch table with N rows (default 1,000,000) of Thai and
+English product-like names, then times the exact SQL Django renders for
+search_fields icontains lookups (UPPER(col::text) LIKE UPPER('%term%'),
+counted the way the changelist paginator counts search results)
+before and after creating the gin_trgm_ops expression index from
+core/trigram.py. The scratch table is dropped at the end.
+
+Needs the configured database to be PostgreSQL with pg_trgm available.
+
+Usage:
+  python benchmarks/bench_trigram_search.py [rows] [rounds]
+"""
+import os
+import sys
+import time
+import django
+from pathlib import Path
+
+# Add the project directory to Python path
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'easybuytofix.settings')
+django.setup()
+
+from django.db import connection
+from core.trigram import TRIGRAM_OPCLASS
+
+TABLE = 'bench_trigram_search'
+WORDS = [
+    'สว่าน', 'ไร้สาย', 'เครื่องทำน้ำอุ่น', 'ก๊อกน้ำ', 'สีทาบ้าน', 'ปั๊มน้ำ', 'พัดลม',
+    'Makita', 'Bosch', 'Panasonic', 'drill', 'cordless', 'heater', 'pump', 'Pro',
+]
+TERMS = ['ไร้สาย', 'น้ำอุ่น', 'makita', 'ordles', 'zzzz-no-match']
+
+
+def seed(cursor, rows):
+    """Fill the scratch table with names built from WORDS plus a serial"""
+    cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    cursor.execute(f'CREATE UNLOGGED TABLE {TABLE} (id serial PRIMARY KEY, name varchar(200) NOT NULL)')
+    cursor.execute(
+        f'''
+        INSERT INTO {TABLE} (name)
+        SELECT w[1 + (i * 7) % array_length(w, 1)] || ' '
+               || w[1 + (i * 13) % array_length(w, 1)] || ' รุ่น ' || i
+        FROM generate_series(1, %s) AS i, (SELECT %s::text[] AS w) AS words
+        ''',
+        [rows, WORDS],
+    )
+    cursor.execute(f'ANALYZE {TABLE}')
+
+
+def time_search(cursor, term, rounds):
+    """Best wall time (ms) and match count of the changelist's filtered COUNT(*)"""
+    sql = f'SELECT COUNT(*) FROM {TABLE} WHERE UPPER(name::text) LIKE UPPER(%s)'
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        cursor.execute(sql, [f'%{term}%'])
+        found = cursor.fetchone()[0]
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    cursor.execute(f'EXPLAIN {sql}', [f'%{term}%'])
+    plan = ' '.join(row[0].strip() for row in cursor.fetchall())
+    return best, found, 'trgm' in plan or 'Bitmap' in plan
+
+
+def run(cursor, rounds):
+    results = {}
+    for term in TERMS:
+        results[term] = time_search(cursor, term, rounds)
+    return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    if connection.vendor != 'postgresql':
+        print('❌ ต้องใช้ PostgreSQL (DB_ENGINE=django.db.backends.postgresql)')
+        sys.exit(1)
+
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        print(f'Seeding {rows:,} rows...')
+        start = time.perf_counter()
+        seed(cursor, rows)
+        print(f'  {time.perf_counter() - start:.1f}s')
+
+        try:
+            before = run(cursor, rounds)
+
+            print('Creating trigram index...')
+            start = time.perf_counter()
+            cursor.execute(
+                f'CREATE INDEX {TABLE}_name_trgm ON {TABLE} USING gin (UPPER(name::text) {TRIGRAM_OPCLASS})'
+            )
+            cursor.execute(f'ANALYZE {TABLE}')
+            print(f'  {time.perf_counter() - start:.1f}s')
+
+            after = run(cursor, rounds)
+        finally:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    print(f'\n{"term":<16}{"rows":>8}{"seq scan ms":>14}{"trgm ms":>10}{"speedup":>10}  index used')
+    for term in TERMS:
+        (slow, found, _), (fast, _, used) = before[term], after[term]
+        print(f'{term:<16}{found:>8}{slow:>14.1f}{fast:>10.1f}{slow / fast:>9.1f}x  {"yes" if used else "no"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from django.contrib import admin, messages
+from django.db.models import Avg, Count, F, Min, Q
+from django.utils import timezone
+from django.utils.html import format_html
+from .admin_mixins import EstimatedCountMixin
+from .models import MediaJob
+from .thai_dates import thai_datetime
+
+
+def _format_duration(value):
+    """Format a timedelta as a short human readable string"""
+    if value is None:
+        return "-"
+    seconds = value.total_seconds()
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    if seconds < 60:
+        return f"{seconds:.1f} วินาที"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f} นาที"
+    return f"{seconds / 3600:.1f} ชั่วโมง"
+
+
+@admin.register(MediaJob)
+class MediaJobAdmin(EstimatedCountMixin, admin.ModelAdmin):
+    """Admin for MediaJob model"""
+
+    list_display = ('id', 'action', 'names_preview', 'source', 'status_display', 'attempts', 'latency_display', 'created_at_thai')
+    list_filter = ('status', 'action', 'created_at')
+    search_fields = ('source', 'last_error')
+    readonly_fields = ('action', 'names', 'source', 'status', 'attempts', 'max_attempts', 'last_error', 'run_after', 'created_at', 'started_at', 'finished_at', 'latency_display')
+    ordering = ('-created_at',)
+    actions = ['retry_jobs']
+
+    class Media:
+        css = {
+            'all': ('css/admin.css',)
+        }
+
+    def has_add_permission(self, request):
+        return False
+
+    def names_preview(self, obj):
+        """Display the first file of the job"""
+        if not obj.names:
+            return "-"
+        if len(obj.names) == 1:
+            return obj.names[0]
+        return f"{obj.names[0]} (+{len(obj.names) - 1})"
+    names_preview.short_description = 'ไฟล์'
+
+    def status_display(self, obj):
+        """Display status with color"""
+        colors = {
+            'pending': '#ff9800',
+            'running': '#2196F3',
+            'done': 'green',
+            'failed': 'red',
+        }
+        return format_html(
+            '<span style="color: {};">{}</span>',
+            colors.get(obj.status, '#666'),
+            obj.get_status_display()
+        )
+    status_display.short_description = 'สถานะ'
+
+    def latency_display(self, obj):
+        """Display time from enqueue to completion"""
+        return _format_duration(obj.latency)
+    latency_display.short_description = 'เวลาที่ใช้'
+
+    def created_at_thai(self, obj):
+        """Display creation date in Thai Buddhist Era"""
+        return thai_datetime(obj.created_at, seconds=True)
+    created_at_thai.short_description = 'วันที่สร้าง'
+
+    def retry_jobs(self, request, queryset):
+        """Put failed jobs back into the queue"""
+        count = queryset.filter(status='failed').update(
+            status='pending', attempts=0, run_after=timezone.now(), finished_at=None
+        )
+        messages.success(request, f"นำงาน {count} รายการกลับเข้าคิวแล้ว")
+    retry_jobs.short_description = "ลองใหม่อีกครั้ง"
+
+    def get_queue_stats(self):
+        """Queue depth and job latency for the changelist header"""
+        now = timezone.now()
+        counts = MediaJob.objects.aggregate(
+            pending=Count('id', filter=Q(status='pending')),
+            running=Count('id', filter=Q(status='running')),
+            failed=Count('id', filter=Q(status='failed')),
+            oldest_pending=Min('created_at', filter=Q(status='pending')),
+        )
+        recent = MediaJob.objects.filter(
+            status='done', finished_at__gte=now - timedelta(hours=24)
+        ).aggregate(
+            done=Count('id'),
+            avg_latency=Avg(F('finished_at') - F('created_at')),
+            avg_runtime=Avg(F('finished_at') - F('started_at')),
+        )
+        oldest = counts.pop('oldest_pending')
+        return {
+            **counts,
+            'queue_depth': counts['pending'] + counts['running'],
+            'oldest_pending_age': _format_duration(now - oldest if oldest else None),
+            'done_24h': recent['done'],
+            'avg_latency': _format_duration(recent['avg_latency']),
+            'avg_runtime': _format_duration(recent['avg_runtime']),
+        }
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context['queue_stats'] = self.get_queue_stats()
+        return super().changelist_view(request, extra_context=extra_context)
@@ -0,0 +1,170 @@
+"""
+Shared ModelAdmin helpers.
+
+QueryBudgetMixin keeps changelists at a constant number of queries: each
+admin declares the relations its list columns read (list_select_related for
+foreign keys / one-to-one, list_prefetch_related for many-to-many), and with
+ADMIN_QUERY_BUDGET_CHECK enabled (DEBUG and the changelist tests) every
+changelist render is counted and fails loudly when it exceeds
+changelist_query_budget, which is what a missing select_related looks like
+once a page has 100 rows.
+
+EstimatedCountMixin swaps the changelist's COUNT(*) queries for planner
+estimates on large tables (see core/pagination.py).
+
+TrigramSearchMixin builds admin search conditions that the pg_trgm indexes
+from core/trigram.py can serve (see its docstring).
+"""
+from collections import Counter, defaultdict
+import re
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import smart_split, unescape_string_literal
+
+from .pagination import EstimatedCountPaginator, is_large_table
+
+# Literals in captured SQL, so per-row queries group under one shape
+_SQL_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a changelist runs more queries than its budget"""
+
+
+class QueryBudgetMixin:
+    """ModelAdmin mixin applying declared relations and a changelist query budget"""
+
+    # Reverse/many-to-many relations read by list_display columns
+    list_prefetch_related = ()
+    # Maximum queries for rendering one changelist page, independent of page size
+    changelist_query_budget = 12
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = getattr(request, 'resolver_match', None)
+        if self.list_prefetch_related and match and match.url_name and match.url_name.endswith('_changelist'):
+            queryset = queryset.prefetch_related(*self.list_prefetch_related)
+        return queryset
+
+    def changelist_view(self, request, extra_context=None):
+        if not getattr(settings, 'ADMIN_QUERY_BUDGET_CHECK', False):
+            return super().changelist_view(request, extra_context)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = super().changelist_view(request, extra_context)
+            # TemplateResponse renders lazily; the per-row queries happen here
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+
+        if len(queries) > self.changelist_query_budget:
+            repeated = Counter(
+                _SQL_LITERAL_RE.sub('?', query['sql']) for query in queries.captured_queries
+            ).most_common(3)
+            details = '\n'.join(f'  {count}x {sql[:200]}' for sql, count in repeated)
+            raise QueryBudgetExceeded(
+                f'{type(self).__name__} changelist ran {len(queries)} queries '
+                f'(budget {self.changelist_query_budget}). Most repeated:\n{details}'
+            )
+        return response
+
+
+class EstimatedCountMixin:
+    """ModelAdmin mixin using estimated counts on large tables"""
+
+    paginator = EstimatedCountPaginator
+
+    @property
+    def show_full_result_count(self):
+        # The "N total" link costs a second COUNT(*) over the whole table
+        return not is_large_table(self.model)
+
+
+def _any_of(lookups, value):
+    """Q matching value with any of lookups"""
+    condition = Q()
+    for lookup in lookups:
+        condition |= Q(**{lookup: value})
+    return condition
+
+
+class TrigramSearchMixin:
+    """
+    ModelAdmin mixin with index-friendly search.
+
+    Django's default search joins every related table in search_fields and
+    ORs the lookups across the join, which the planner cannot answer from
+    per-table indexes. Here fields on the model are searched directly with
+    icontains (backed by the UPPER(col) gin_trgm_ops indexes), and fields
+    behind a relation become one pk__in subquery per relation, so each
+    table is filtered through its own index and no DISTINCT is needed.
+    """
+
+    _search_prefixes = {'^': 'istartswith', '=': 'iexact', '@': 'search'}
+
+    def _is_lookup(self, path, name):
+        """True when name is a lookup on the field at path (as in `name__exact`)"""
+        opts = self.model._meta
+        field = None
+        for part in path.split(LOOKUP_SEP):
+            if part == 'pk':
+                part = opts.pk.name
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                return False
+            if hasattr(field, 'path_infos'):
+                opts = field.path_infos[-1].to_opts
+        return field.get_lookup(name) is not None
+
+    def _search_lookup(self, field):
+        lookup = self._search_prefixes.get(field[:1])
+        if lookup:
+            return field[1:], lookup
+        # An explicit lookup is used as given, like Django's default search
+        path, _, last = field.rpartition(LOOKUP_SEP)
+        if path and self._is_lookup(path, last):
+            return path, last
+        return field, 'icontains'
+
+    def _search_condition(self, request, term):
+        condition = Q()
+        related = defaultdict(list)
+        for search_field in self.get_search_fields(request):
+            field, lookup = self._search_lookup(search_field)
+            relation, _, rest = field.partition(LOOKUP_SEP)
+            if rest:
+                related[relation].append((rest, lookup))
+            else:
+                condition |= Q(**{f'{field}__{lookup}': term})
+
+        for relation, lookups in related.items():
+            field = self.model._meta.get_field(relation)
+            if field.many_to_one or (field.one_to_one and field.concrete):
+                # Forward FK / one-to-one: filter the related table on its own
+                matches = field.related_model._default_manager.filter(
+                    _any_of((f'{rest}__{lookup}' for rest, lookup in lookups), term)
+                )
+                condition |= Q(**{f'{relation}__in': matches.values('pk')})
+            else:
+                # Reverse or many-to-many: match pks without joining the list query
+                matches = self.model._default_manager.filter(
+                    _any_of((f'{relation}__{rest}__{lookup}' for rest, lookup in lookups), term)
+                )
+                condition |= Q(pk__in=matches.values('pk'))
+        return condition
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not self.get_search_fields(request):
+            return super().get_search_results(request, queryset, search_term)
+
+        condition = Q()
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            condition &= self._search_condition(request, bit)
+        return queryset.filter(condition), False
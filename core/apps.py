@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+    verbose_name = 'ระบบกลาง'
+
+    def ready(self):
+        """Connect cache invalidation signals when app is ready"""
+        from .cache import connect_invalidation
+        connect_invalidation()
@@ -0,0 +1,129 @@
+"""
+Versioned cache keys for model data.
+
+Every model in VERSIONED_MODELS has a version counter in the cache. Keys
+built with versioned_key() embed the current version of each model they
+depend on, and signals bump the counter on post_save, post_delete and
+m2m_changed, so a write makes every dependent entry unreachable at once
+without tracking or deleting individual keys. The bump waits for the
+writer's transaction to commit; bumping earlier would let a concurrent
+reader cache the pre-commit rows under the new version. Stale entries simply expire
+after the backend's default timeout (CACHE_TIMEOUT).
+
+Counters start at the current time in milliseconds rather than 1, so a
+counter that was evicted never restarts at a version whose entries may
+still be cached.
+
+Code that writes with QuerySet.update()/bulk_update() bypasses signals and
+must call bump_model_version() itself.
+"""
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+VERSIONED_MODELS = (
+    'products.Category',
+    'products.Brand',
+    'manuals.ManualCategory',
+    'manuals.Manual',
+    'accounts.UserProfile',
+)
+# Version counters outlive the entries that use them
+VERSION_TIMEOUT = None
+
+_M2M_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+
+
+def _label(model):
+    return model if isinstance(model, str) else model._meta.label
+
+
+def _version_key(model):
+    return f'version:{_label(model)}'
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def model_versions(*models):
+    """Current version of each model, in order (one cache round trip)"""
+    keys = [_version_key(model) for model in models]
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    for key, version in missing.items():
+        # add() so concurrent first readers agree on one version
+        if not cache.add(key, version, VERSION_TIMEOUT):
+            version = cache.get(key, version)
+        found[key] = version
+    return [found[key] for key in keys]
+
+
+def model_version(model):
+    """Current version of model ('app_label.Model' or the class)"""
+    return model_versions(model)[0]
+
+
+def bump_model_version(model):
+    """Invalidate every versioned entry that depends on model"""
+    key = _version_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counter missing (evicted or never read): start a fresh one
+        version = _new_version()
+        cache.set(key, version, VERSION_TIMEOUT)
+        return version
+
+
+def bump_model_version_on_commit(model, using=None):
+    """bump_model_version(model) once the current transaction commits (now in autocommit)"""
+    transaction.on_commit(lambda: bump_model_version(model), using=using)
+
+
+def versioned_key(name, *models):
+    """'name:products.Category.<v>:...' for the given dependencies"""
+    versions = model_versions(*models)
+    parts = [f'{_label(model)}.{version}' for model, version in zip(models, versions)]
+    return ':'.join([name, *parts])
+
+
+def cached_queryset(name, queryset, timeout=DEFAULT_TIMEOUT, models=()):
+    """
+    list(queryset), cached until the queryset's model (or any of models) changes.
+
+    name must identify the query, e.g. 'categories:active'.
+    """
+    key = versioned_key(f'qs:{name}', queryset.model, *models)
+    return cache.get_or_set(key, lambda: list(queryset), timeout)
+
+
+def cached_fragment(name, render, *models, timeout=DEFAULT_TIMEOUT):
+    """render() output, cached until one of models changes"""
+    key = versioned_key(f'fragment:{name}', *models)
+    return cache.get_or_set(key, render, timeout)
+
+
+def _bump_on_change(sender, using=None, **kwargs):
+    bump_model_version_on_commit(sender, using)
+
+
+def _bump_on_m2m(sender, instance, action, reverse, model, using=None, **kwargs):
+    if action in _M2M_ACTIONS:
+        # The changed relation belongs to whichever side is versioned
+        bump_model_version_on_commit(model if reverse else type(instance), using)
+
+
+def connect_invalidation():
+    """Connect the version-bumping receivers (called from CoreConfig.ready)"""
+    for label in VERSIONED_MODELS:
+        model = apps.get_model(label)
+        uid = f'core.cache:{label}'
+        post_save.connect(_bump_on_change, sender=model, dispatch_uid=uid)
+        post_delete.connect(_bump_on_change, sender=model, dispatch_uid=uid)
+        for field in model._meta.local_many_to_many:
+            m2m_changed.connect(_bump_on_m2m, sender=field.remote_field.through, dispatch_uid=f'{uid}:{field.name}')
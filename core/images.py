@@ -0,0 +1,109 @@
+"""
+Image dimension helpers.
+
+Width and height are stored on the model when a file is uploaded, so admin
+pages never have to open images from storage. For files uploaded before the
+dimension columns existed, read_image_dimensions() fetches only the first
+bytes of the object (HTTP Range requests) until PIL can parse the header.
+"""
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from PIL import ImageFile
+
+from .r2 import r2_enabled, get_r2_client, get_bucket_name
+
+HEADER_CHUNK_SIZE = 16 * 1024
+HEADER_MAX_BYTES = 512 * 1024
+
+
+def update_image_dimensions(instance, field_name, width_attr, height_attr):
+    """
+    Keep stored width/height in sync with an image field before save.
+
+    Dimensions are read from the uploaded file while it is still in memory,
+    so no storage request is made. Existing files are left untouched.
+    """
+    file = getattr(instance, field_name)
+    if not file:
+        setattr(instance, width_attr, None)
+        setattr(instance, height_attr, None)
+        return
+    if file._committed:
+        return
+
+    width, height = get_image_dimensions(file.file)
+    setattr(instance, width_attr, width)
+    setattr(instance, height_attr, height)
+
+
+def format_dimensions(file, width, height):
+    """Display text for stored image dimensions"""
+    if not file:
+        return "ไม่มีรูป"
+    if width and height:
+        return f"{width}x{height}"
+    return "ยังไม่ทราบขนาด"
+
+
+def _parse_chunks(chunks):
+    """Feed chunks to PIL until the image header has been parsed"""
+    parser = ImageFile.Parser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.image:
+            return parser.image.size
+    return None, None
+
+
+def _object_size(content_range):
+    """Total size from a `bytes 0-16383/52000` Content-Range, or None"""
+    total = (content_range or '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+
+def _r2_chunks(name, client, bucket, chunk_size, max_bytes):
+    """Yield consecutive byte ranges of an R2 object"""
+    start = 0
+    while start < max_bytes:
+        end = start + chunk_size - 1
+        response = client.get_object(Bucket=bucket, Key=name, Range=f'bytes={start}-{end}')
+        chunk = response['Body'].read()
+        if not chunk:
+            return
+        yield chunk
+        start += len(chunk)
+        # A range starting at the end of the object fails with 416 InvalidRange
+        size = _object_size(response.get('ContentRange'))
+        if len(chunk) < chunk_size or (size is not None and start >= size):
+            return
+        chunk_size *= 2
+
+
+def _storage_chunks(name, storage, chunk_size, max_bytes):
+    """Yield the first bytes of a file from a Django storage"""
+    with storage.open(name, 'rb') as f:
+        read = 0
+        while read < max_bytes:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            read += len(chunk)
+            yield chunk
+
+
+def read_image_dimensions(name, client=None, bucket=None, storage=None,
+                          chunk_size=HEADER_CHUNK_SIZE, max_bytes=HEADER_MAX_BYTES):
+    """
+    Return (width, height) of a stored image reading only its header.
+
+    On R2 this issues ranged GETs (16 KB, then 32 KB, ...) until the header
+    is parsed; most JPEG/PNG/WebP files need a single request. Returns
+    (None, None) when the header cannot be parsed within max_bytes.
+    """
+    if r2_enabled() and storage is None:
+        client = client or get_r2_client()
+        bucket = bucket or get_bucket_name()
+        chunks = _r2_chunks(name, client, bucket, chunk_size, max_bytes)
+    else:
+        chunks = _storage_chunks(name, storage or default_storage, chunk_size, max_bytes)
+    return _parse_chunks(chunks)
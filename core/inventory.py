@@ -0,0 +1,163 @@
+"""
+Streaming inventory of media objects.
+
+Listings are paginated with list_objects_v2 and yielded one object at a time,
+so a bucket with hundreds of thousands of keys never sits in memory. For
+large prefixes the listing can be split into sub-prefixes (e.g. the
+%Y/%m folders used by SUMMERNOTE_UPLOAD_TO) and run on a thread pool; pages
+are handed over through a bounded queue to keep memory flat.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import posixpath
+import queue
+import threading
+
+from django.core.files.storage import default_storage
+
+from .r2 import r2_enabled, get_r2_client, get_bucket_name
+
+PAGE_SIZE = 1000
+
+_DONE = object()
+
+
+def iter_objects(prefix='', client=None, bucket=None, page_size=PAGE_SIZE):
+    """Yield every object under prefix ({'Key', 'Size', 'LastModified', ...})"""
+    for page in iter_pages(prefix, client, bucket, page_size):
+        yield from page
+
+
+def iter_pages(prefix='', client=None, bucket=None, page_size=PAGE_SIZE):
+    """Yield lists of objects, one list per list_objects_v2 page"""
+    client = client or get_r2_client()
+    bucket = bucket or get_bucket_name()
+    paginator = client.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=bucket,
+        Prefix=prefix,
+        PaginationConfig={'PageSize': page_size},
+    )
+    for page in pages:
+        contents = page.get('Contents')
+        if contents:
+            yield contents
+
+
+def split_prefix(prefix, depth, client=None, bucket=None):
+    """
+    Walk `depth` folder levels below prefix.
+
+    Returns (sub-prefixes at that depth, objects stored directly in the
+    folders above it). Listing the sub-prefixes covers everything else.
+    """
+    client = client or get_r2_client()
+    bucket = bucket or get_bucket_name()
+    paginator = client.get_paginator('list_objects_v2')
+    prefixes = [prefix]
+    direct_objects = []
+
+    for _level in range(depth):
+        next_prefixes = []
+        for current in prefixes:
+            for page in paginator.paginate(Bucket=bucket, Prefix=current, Delimiter='/'):
+                direct_objects.extend(page.get('Contents', []))
+                next_prefixes.extend(p['Prefix'] for p in page.get('CommonPrefixes', []))
+        prefixes = next_prefixes
+        if not prefixes:
+            break
+
+    return prefixes, direct_objects
+
+
+def iter_objects_parallel(prefixes, client=None, bucket=None, workers=8, page_size=PAGE_SIZE):
+    """
+    List several prefixes concurrently and yield (prefix, object) pairs.
+
+    Producer threads push whole pages into a bounded queue, so at most about
+    2 * workers pages are buffered regardless of bucket size.
+    """
+    client = client or get_r2_client()
+    bucket = bucket or get_bucket_name()
+    prefixes = list(prefixes)
+    if not prefixes:
+        return
+
+    pages = queue.Queue(maxsize=max(workers, 1) * 2)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(prefix):
+        try:
+            for page in iter_pages(prefix, client, bucket, page_size):
+                if not put((prefix, page)):
+                    return
+        except Exception as e:
+            put((prefix, e))
+        finally:
+            put((prefix, _DONE))
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='r2-list')
+    try:
+        for prefix in prefixes:
+            executor.submit(produce, prefix)
+
+        remaining = len(prefixes)
+        while remaining:
+            prefix, item = pages.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                for obj in item:
+                    yield prefix, obj
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_local_objects(prefix='', storage=None):
+    """Recursive listing for non-R2 storages (local development)"""
+    storage = storage or default_storage
+    folder = prefix.rstrip('/')
+    try:
+        directories, files = storage.listdir(folder)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for name in files:
+        path = posixpath.join(folder, name) if folder else name
+        yield {'Key': path, 'Size': storage.size(path)}
+    for directory in directories:
+        path = posixpath.join(folder, directory) if folder else directory
+        yield from iter_local_objects(path + '/', storage)
+
+
+def iter_media_objects(prefix='', parallel_depth=0, workers=8):
+    """
+    Yield every media object under prefix from R2, or from local storage
+    when R2 is disabled. With parallel_depth > 0 the prefix is split that
+    many folder levels down and listed concurrently.
+    """
+    if not r2_enabled():
+        yield from iter_local_objects(prefix)
+        return
+
+    client = get_r2_client()
+    bucket = get_bucket_name()
+
+    if parallel_depth <= 0 or workers <= 1:
+        yield from iter_objects(prefix, client, bucket)
+        return
+
+    prefixes, direct_objects = split_prefix(prefix, parallel_depth, client, bucket)
+    yield from direct_objects
+    for _prefix, obj in iter_objects_parallel(prefixes, client, bucket, workers):
+        yield obj
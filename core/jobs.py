@@ -0,0 +1,192 @@
+"""
+Background media jobs.
+
+Signals call enqueue_storage_job() instead of talking to R2 directly. The job
+row is written in transaction.on_commit, so a rolled back save never deletes
+files, and the admin request returns without waiting for storage round trips.
+The process_media_jobs command claims pending jobs and runs them on a thread
+pool, retrying failures with exponential backoff. Jobs that share a file run
+one after another in the order they were queued (see job_groups()).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .media import is_hashed_name, unreferenced
+from .models import MediaJob
+from .storage import bulk_delete
+from .thumbnails import create_thumbnails
+
+
+class MediaJobError(Exception):
+    """Raised by a handler when some files could not be processed"""
+
+
+def _delete_files(names):
+    # Content-hashed files can be shared; keep the ones still referenced
+    deleted, failed = bulk_delete(unreferenced(names))
+    for name in deleted:
+        print(f"✅ ลบไฟล์: {name}")
+    if failed:
+        raise MediaJobError(
+            f"ลบไม่สำเร็จ {len(failed)} ไฟล์: "
+            + "; ".join(f"{name} ({error})" for name, error in failed.items())
+        )
+
+
+def _generate_thumbnails(names):
+    failed = {}
+    for name in names:
+        try:
+            # Identical bytes share a hashed key, so its thumbnails may already exist
+            if create_thumbnails(name, default_storage, replace=not is_hashed_name(name)):
+                print(f"✅ สร้าง thumbnail: {name}")
+        except FileNotFoundError:
+            # Replaced or deleted before the job ran; its thumbnails are not needed
+            continue
+        except Exception as e:
+            failed[name] = str(e)
+    if failed:
+        raise MediaJobError(
+            f"สร้าง thumbnail ไม่สำเร็จ {len(failed)} ไฟล์: "
+            + "; ".join(f"{name} ({error})" for name, error in failed.items())
+        )
+
+
+HANDLERS = {
+    'delete_files': _delete_files,
+    'generate_thumbnails': _generate_thumbnails,
+}
+
+
+def run_action(action, names):
+    """Run a storage action immediately"""
+    HANDLERS[action](names)
+
+
+def enqueue_storage_job(action, names, source=''):
+    """Queue a storage side effect to run after the current transaction commits"""
+    names = [name for name in dict.fromkeys(names) if name]
+    if not names:
+        return
+
+    def _enqueue():
+        if getattr(settings, 'MEDIA_JOBS_RUN_SYNC', False):
+            try:
+                run_action(action, names)
+            except Exception as e:
+                print(f"❌ Error running {action}: {e}")
+            return
+        MediaJob.objects.create(
+            action=action,
+            names=names,
+            source=source[:100],
+            max_attempts=getattr(settings, 'MEDIA_JOBS_MAX_ATTEMPTS', 5),
+        )
+
+    transaction.on_commit(_enqueue)
+
+
+def job_source(instance):
+    """Short label of the model instance that queued a job"""
+    return f"{instance._meta.label_lower}:{instance.pk}"
+
+
+def enqueue_thumbnails(instance, field_names):
+    """Queue thumbnails for files save() just uploaded (field_names from new_uploads())"""
+    enqueue_storage_job(
+        'generate_thumbnails',
+        [getattr(instance, field_name).name for field_name in field_names],
+        source=job_source(instance),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base * 2^(attempts-1), capped"""
+    base = getattr(settings, 'MEDIA_JOBS_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'MEDIA_JOBS_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def claim_jobs(limit):
+    """Mark up to `limit` due jobs as running and return them"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            MediaJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', run_after__lte=now)
+            .order_by('run_after', 'id')[:limit]
+        )
+        for job in jobs:
+            job.status = 'running'
+            job.started_at = now
+            job.attempts += 1
+        MediaJob.objects.bulk_update(jobs, ['status', 'started_at', 'attempts'])
+    return jobs
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome (called from worker threads)"""
+    close_old_connections()
+    try:
+        run_action(job.action, job.names)
+    except Exception as e:
+        job.last_error = str(e)[:2000]
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+        else:
+            job.status = 'pending'
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+    else:
+        job.status = 'done'
+        job.last_error = ''
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'last_error', 'run_after', 'finished_at'])
+    close_old_connections()
+    return job
+
+
+def job_groups(jobs):
+    """
+    Split claimed jobs into groups with no file in common, each in queued order.
+
+    A generate_thumbnails job and a delete_files job for the same key must not
+    run at the same time: a render that finishes after the delete leaves its
+    thumbnails orphaned. Groups can run in parallel.
+    """
+    parent = list(range(len(jobs)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    owner = {}
+    for index, job in enumerate(jobs):
+        for name in job.names:
+            parent[find(index)] = find(owner.setdefault(name, index))
+
+    groups = defaultdict(list)
+    for index, job in enumerate(jobs):
+        groups[find(index)].append(job)
+    return [sorted(group, key=lambda job: (job.created_at, job.pk)) for group in groups.values()]
+
+
+def run_job_group(jobs):
+    """Run the jobs of one job_groups() group in order"""
+    return [run_job(job) for job in jobs]
+
+
+def requeue_stale_jobs(timeout_seconds):
+    """Return jobs left 'running' by a crashed worker to the queue"""
+    cutoff = timezone.now() - timedelta(seconds=timeout_seconds)
+    return MediaJob.objects.filter(status='running', started_at__lt=cutoff).update(
+        status='pending', run_after=timezone.now()
+    )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from botocore.exceptions import ClientError
+from core.media import get_media_fields
+from core.r2 import r2_enabled, get_r2_client, get_bucket_name
+from core.storage import ensure_public_read
+
+
+class Command(BaseCommand):
+    help = 'Make legacy media objects public-read on R2 without re-uploading them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show which objects would be fixed without changing them',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if not r2_enabled():
+            self.stdout.write('R2 is not enabled')
+            return
+
+        client = get_r2_client()
+        bucket = get_bucket_name()
+        fixed = {'acl': 0, 'copy': 0}
+        failed = 0
+
+        for model, fields in get_media_fields():
+            for values in model.objects.values_list(*fields).iterator():
+                for name in values:
+                    if not name:
+                        continue
+                    if dry_run:
+                        self.stdout.write(f'Would fix: {name}')
+                        continue
+                    try:
+                        method = ensure_public_read(name, client, bucket)
+                        fixed[method] += 1
+                        self.stdout.write(f'Fixed ({method}): {name}')
+                    except ClientError as e:
+                        failed += 1
+                        self.stdout.write(f'Error fixing {name}: {e}')
+
+        if dry_run:
+            self.stdout.write('Dry run completed. No objects were changed.')
+            return
+
+        self.stdout.write(
+            f'Completed. ACL updates: {fixed["acl"]}, server-side copies: {fixed["copy"]}, failed: {failed}'
+        )
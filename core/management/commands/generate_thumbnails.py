@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from accounts.models import UserProfile
+from core.thumbnails import create_thumbnails
+from products.models import Category, Brand
+
+THUMBNAIL_MODELS = (Category, Brand, UserProfile)
+
+
+class Command(BaseCommand):
+    help = 'Create WebP thumbnails for images uploaded before thumbnails existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Number of images to process concurrently (default: 4)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recreate thumbnails that already exist',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show which images would be processed',
+        )
+
+    def handle(self, *args, **options):
+        tasks = []
+        for model in THUMBNAIL_MODELS:
+            for field_name in model.THUMBNAIL_FIELDS:
+                storage = model._meta.get_field(field_name).storage
+                names = (
+                    model.objects.exclude(**{f'{field_name}__isnull': True})
+                    .exclude(**{field_name: ''})
+                    .values_list(field_name, flat=True)
+                    .iterator()
+                )
+                tasks.extend((name, storage) for name in names)
+
+        if options['dry_run']:
+            for name, _storage in tasks:
+                self.stdout.write(f'Would process: {name}')
+            self.stdout.write(f'Dry run completed. {len(tasks)} images.')
+            return
+
+        created = skipped = failed = 0
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            futures = {
+                executor.submit(self.process, name, storage, options['force']): name
+                for name, storage in tasks
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    if future.result():
+                        created += 1
+                        self.stdout.write(f'Created thumbnails: {name}')
+                    else:
+                        skipped += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(f'Error processing {name}: {e}')
+
+        self.stdout.write(f'Completed. Created: {created}, skipped: {skipped}, failed: {failed}')
+
+    def process(self, name, storage, force):
+        """Render and store thumbnails for one image; False if they already exist"""
+        return create_thumbnails(name, storage, replace=force)
@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+import posixpath
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.cache import bump_model_version
+from core.media import get_hashed_media_fields, hashed_filename, is_hashed_name, referenced_names
+from core.r2 import r2_enabled, get_r2_client, get_bucket_name
+from core.storage import bulk_delete
+from core.thumbnails import thumbnail_name, THUMBNAIL_SIZES, with_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Rename existing media objects to content-hashed keys and update the DB references'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Rows renamed per transaction (default: 100)',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Number of objects hashed and copied concurrently (default: 4)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the new names without copying objects or changing rows',
+        )
+        parser.add_argument(
+            '--keep-old',
+            action='store_true',
+            help='Do not delete the old objects after the rows have been updated',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.client = get_r2_client() if r2_enabled() else None
+        self.bucket = get_bucket_name() if r2_enabled() else None
+        renamed = failed = 0
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            for model, fields in get_hashed_media_fields():
+                for rows in self.batches(model, fields, options['batch_size']):
+                    names = list(dict.fromkeys(
+                        name for _pk, *values in rows for name in values
+                        if name and not is_hashed_name(name)
+                    ))
+                    new_names = {}
+                    for name, result in zip(names, executor.map(self.copy_hashed, names)):
+                        if isinstance(result, Exception):
+                            failed += 1
+                            self.stdout.write(f'Error renaming {name}: {result}')
+                        else:
+                            new_names[name] = result
+                            self.stdout.write(f'{name} -> {result}')
+
+                    if self.dry_run or not new_names:
+                        continue
+
+                    with transaction.atomic():
+                        for pk, *values in rows:
+                            for field, name in zip(fields, values):
+                                if name in new_names:
+                                    # Only touch rows that still point at the old key
+                                    model.objects.filter(pk=pk, **{field: name}).update(**{field: new_names[name]})
+                    bump_model_version(model)
+                    renamed += len(new_names)
+
+                    if not options['keep_old']:
+                        # Rows changed meanwhile may still point at an old key
+                        still_used = referenced_names(new_names)
+                        old_names = [name for name in new_names if name not in still_used]
+                        deleted, errors = bulk_delete(with_thumbnails(old_names))
+                        for name, error in errors.items():
+                            self.stdout.write(f'Error deleting {name}: {error}')
+
+        if self.dry_run:
+            self.stdout.write('Dry run completed. No objects or rows were changed.')
+        else:
+            self.stdout.write(f'Completed. Renamed: {renamed}, failed: {failed}')
+
+    def batches(self, model, fields, size):
+        """Yield lists of (pk, *file names) rows"""
+        rows = []
+        for row in model.objects.order_by('pk').values_list('pk', *fields).iterator(chunk_size=size):
+            rows.append(row)
+            if len(rows) >= size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    def copy_hashed(self, name):
+        """Hash one object and copy it (and its thumbnails) to the hashed key"""
+        try:
+            storage = default_storage
+            with storage.open(name, 'rb') as f:
+                new_name = posixpath.join(posixpath.dirname(name), hashed_filename(f, name))
+                if self.dry_run:
+                    return new_name
+                if self.client is None:
+                    if not storage.exists(new_name):
+                        storage.save(new_name, f)
+            if self.client is not None:
+                self.copy_object(name, new_name)
+            self.copy_thumbnails(storage, name, new_name)
+            return new_name
+        except Exception as e:
+            return e
+
+    def copy_object(self, source, target, required=True):
+        """Server-side copy on R2 with the immutable Cache-Control"""
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=source)
+        except ClientError as e:
+            if not required and e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return
+            raise
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=target,
+            CopySource={'Bucket': self.bucket, 'Key': source},
+            MetadataDirective='REPLACE',
+            ContentType=head.get('ContentType') or 'application/octet-stream',
+            CacheControl=settings.MEDIA_IMMUTABLE_CACHE_CONTROL,
+            ACL='public-read',
+        )
+
+    def copy_thumbnails(self, storage, name, new_name):
+        """Carry existing thumbnails over to the new key"""
+        for size in THUMBNAIL_SIZES:
+            source, target = thumbnail_name(name, size), thumbnail_name(new_name, size)
+            if self.client is not None:
+                self.copy_object(source, target, required=False)
+            elif storage.exists(source) and not storage.exists(target):
+                with storage.open(source, 'rb') as f:
+                    storage.save(target, f)
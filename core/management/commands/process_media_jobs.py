@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.jobs import claim_jobs, job_groups, run_job_group, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued media storage jobs (file deletes, thumbnails) on a thread pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=getattr(settings, 'MEDIA_JOBS_WORKER_THREADS', 4),
+            help='Number of worker threads',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Jobs claimed per poll',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue once and exit (for cron)',
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        batch_size = options['batch_size']
+        once = options['once']
+        stale_timeout = getattr(settings, 'MEDIA_JOBS_STALE_SECONDS', 600)
+
+        self.stdout.write(f'Media job worker started ({threads} threads)')
+        processed = 0
+        failed = 0
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='media-job') as executor:
+            while True:
+                requeued = requeue_stale_jobs(stale_timeout)
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs'))
+
+                jobs = claim_jobs(batch_size)
+                if not jobs:
+                    if once:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                # Jobs touching the same file run in queued order on one thread
+                for group in executor.map(run_job_group, job_groups(jobs)):
+                    for job in group:
+                        processed += 1
+                        if job.status == 'done':
+                            self.stdout.write(f'Done: job {job.pk} {job.action} ({len(job.names)} files)')
+                        else:
+                            failed += 1
+                            self.stdout.write(
+                                self.style.ERROR(f'Job {job.pk} {job.status} (attempt {job.attempts}): {job.last_error}')
+                            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Processed {processed} jobs, {failed} not completed')
+        )
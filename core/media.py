@@ -0,0 +1,129 @@
+"""
+Content-addressed media names.
+
+With MEDIA_HASHED_NAMES enabled, uploaded files are renamed to the hash of
+their bytes before the upload_to function runs:
+
+    categories/3f2a9c0d5e7b41a6b8c9d0e1f2a3b4c5.jpg
+
+The same bytes always get the same key, so an image uploaded as both image
+and og_image (or by two categories) is stored once, and since the object at
+a key never changes it can be cached by browsers and the CDN for a year.
+
+Because a hashed object can be shared, it may only be deleted once no model
+field references it any more; unreferenced() filters delete lists for that.
+"""
+import hashlib
+import posixpath
+import re
+
+from django.conf import settings
+
+from .thumbnails import THUMBNAIL_DIR, thumbnail_names
+
+HASH_LENGTH = 32
+HASHED_NAME_RE = re.compile(r'^[0-9a-f]{%d}(_\d+)?\.[0-9a-z]+$' % HASH_LENGTH)
+# Models in get_media_fields() whose files keep their upload names. Summernote
+# attachments are linked by URL from manual content, so renaming them breaks links.
+UNHASHED_MEDIA_MODELS = ('manuals.ManualAttachment',)
+
+
+def hashed_names_enabled():
+    """Return True when new uploads get content-hashed names"""
+    return getattr(settings, 'MEDIA_HASHED_NAMES', False)
+
+
+def is_hashed_name(name):
+    """True for content-hashed keys and the thumbnails derived from them"""
+    return bool(name) and bool(HASHED_NAME_RE.match(posixpath.basename(name)))
+
+
+def content_hash(fileobj, chunk_size=64 * 1024):
+    """Hex digest of a file's bytes; the file position is restored"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_filename(fileobj, filename):
+    """`<hash>.<ext>` for an uploaded file"""
+    ext = posixpath.splitext(filename)[1].lower() or '.bin'
+    return f'{content_hash(fileobj)}{ext}'
+
+
+def new_uploads(instance, field_names):
+    """Fields holding a file that save() has not uploaded yet"""
+    return [
+        field_name for field_name in field_names
+        if getattr(instance, field_name) and not getattr(instance, field_name)._committed
+    ]
+
+
+def apply_hashed_names(instance, field_names):
+    """Rename newly uploaded files to their content hash before save"""
+    if not hashed_names_enabled():
+        return
+    for field_name in new_uploads(instance, field_names):
+        file = getattr(instance, field_name)
+        file.name = hashed_filename(file.file, file.name)
+
+
+def get_media_fields():
+    """(model, file fields) for every model that stores media"""
+    from accounts.models import UserProfile
+    from manuals.models import ManualAttachment
+    from products.models import Category, Brand
+
+    return (
+        (Category, ('image', 'og_image')),
+        (Brand, ('logo', 'og_image')),
+        (UserProfile, ('avatar',)),
+        (ManualAttachment, ('file',)),
+    )
+
+
+def get_hashed_media_fields():
+    """get_media_fields() entries whose files are stored under content-hashed names"""
+    return tuple(
+        (model, fields) for model, fields in get_media_fields()
+        if model._meta.label not in UNHASHED_MEDIA_MODELS
+    )
+
+
+def referenced_names(names):
+    """Subset of names still stored in a model file field"""
+    names = list(names)
+    if not names:
+        return set()
+    found = set()
+    for model, fields in get_media_fields():
+        for field in fields:
+            found.update(
+                model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True)
+            )
+    return found
+
+
+def unreferenced(names):
+    """
+    Drop hashed names (and their thumbnails) that are still in use.
+
+    Only hashed keys can be shared, so other names pass through without a
+    query. Call this after the referencing rows have been updated.
+    """
+    names = [name for name in dict.fromkeys(names) if name]
+    originals = [
+        name for name in names
+        if is_hashed_name(name) and posixpath.basename(posixpath.dirname(name)) != THUMBNAIL_DIR
+    ]
+    if not originals:
+        return names
+
+    protected = set()
+    for name in referenced_names(originals):
+        protected.add(name)
+        protected.update(thumbnail_names(name))
+    return [name for name in names if name not in protected]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('delete_files', 'ลบไฟล์'), ('fix_acl', 'แก้ไขสิทธิ์ไฟล์')], max_length=30, verbose_name='งาน')),
+                ('names', models.JSONField(default=list, help_text='รายชื่อไฟล์ใน storage ที่งานนี้ต้องจัดการ', verbose_name='ไฟล์')),
+                ('source', models.CharField(blank=True, help_text='Model และ pk ที่สร้างงานนี้ เช่น products.category:12', max_length=100, verbose_name='ที่มา')),
+                ('status', models.CharField(choices=[('pending', 'รอดำเนินการ'), ('running', 'กำลังทำงาน'), ('done', 'เสร็จสิ้น'), ('failed', 'ล้มเหลว')], default='pending', max_length=20, verbose_name='สถานะ')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='จำนวนครั้งที่ลอง')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='จำนวนครั้งสูงสุด')),
+                ('last_error', models.TextField(blank=True, verbose_name='ข้อผิดพลาดล่าสุด')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='เริ่มได้หลังจาก')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='วันที่สร้าง')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='เริ่มทำงาน')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='เสร็จสิ้น')),
+            ],
+            options={
+                'verbose_name': 'งานจัดการไฟล์',
+                'verbose_name_plural': 'งานจัดการไฟล์',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='core_mediajob_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_remove_fix_acl_action'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediajob',
+            name='action',
+            field=models.CharField(choices=[('delete_files', 'ลบไฟล์'), ('generate_thumbnails', 'สร้าง thumbnail')], max_length=30, verbose_name='งาน'),
+        ),
+    ]
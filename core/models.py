@@ -0,0 +1,90 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class MediaJob(models.Model):
+    """Storage side effect queued by signals and run by process_media_jobs"""
+
+    ACTION_CHOICES = [
+        ('delete_files', _('ลบไฟล์')),
+        ('generate_thumbnails', _('สร้าง thumbnail')),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', _('รอดำเนินการ')),
+        ('running', _('กำลังทำงาน')),
+        ('done', _('เสร็จสิ้น')),
+        ('failed', _('ล้มเหลว')),
+    ]
+
+    action = models.CharField(
+        _("งาน"),
+        max_length=30,
+        choices=ACTION_CHOICES
+    )
+    names = models.JSONField(
+        _("ไฟล์"),
+        default=list,
+        help_text=_("รายชื่อไฟล์ใน storage ที่งานนี้ต้องจัดการ")
+    )
+    source = models.CharField(
+        _("ที่มา"),
+        max_length=100,
+        blank=True,
+        help_text=_("Model และ pk ที่สร้างงานนี้ เช่น products.category:12")
+    )
+    status = models.CharField(
+        _("สถานะ"),
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(
+        _("จำนวนครั้งที่ลอง"),
+        default=0
+    )
+    max_attempts = models.PositiveIntegerField(
+        _("จำนวนครั้งสูงสุด"),
+        default=5
+    )
+    last_error = models.TextField(
+        _("ข้อผิดพลาดล่าสุด"),
+        blank=True
+    )
+    run_after = models.DateTimeField(
+        _("เริ่มได้หลังจาก"),
+        default=timezone.now
+    )
+    created_at = models.DateTimeField(
+        _("วันที่สร้าง"),
+        auto_now_add=True
+    )
+    started_at = models.DateTimeField(
+        _("เริ่มทำงาน"),
+        blank=True,
+        null=True
+    )
+    finished_at = models.DateTimeField(
+        _("เสร็จสิ้น"),
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        verbose_name = _("งานจัดการไฟล์")
+        verbose_name_plural = _("งานจัดการไฟล์")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='core_mediajob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} ({len(self.names)} ไฟล์) - {self.status}"
+
+    @property
+    def latency(self):
+        """Time from enqueue to completion"""
+        if self.finished_at:
+            return self.finished_at - self.created_at
+        return None
@@ -0,0 +1,70 @@
+"""
+Cheap row counts for large tables.
+
+COUNT(*) on PostgreSQL scans the whole table. For unfiltered lists the
+planner's estimate in pg_class.reltuples (kept fresh by autovacuum/ANALYZE)
+is good enough to draw a paginator, so EstimatedCountPaginator uses it once
+a table is past ESTIMATED_COUNT_THRESHOLD rows and counts exactly below
+that, or whenever the list is filtered. Other databases always count.
+"""
+import time
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+# Tables smaller than this are counted exactly
+ESTIMATED_COUNT_THRESHOLD = 10000
+# Seconds an estimate is reused across requests
+ESTIMATE_CACHE_SECONDS = 60
+
+_estimates = {}
+
+
+def estimated_count(model, using='default'):
+    """Planner row estimate for model's table, or None if unavailable"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+
+    key = (using, model._meta.db_table)
+    cached = _estimates.get(key)
+    if cached and time.monotonic() - cached[1] < ESTIMATE_CACHE_SECONDS:
+        return cached[0]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that were never vacuumed or analyzed
+    estimate = row[0] if row and row[0] is not None and row[0] >= 0 else None
+    _estimates[key] = (estimate, time.monotonic())
+    return estimate
+
+
+def is_large_table(model, using='default', threshold=ESTIMATED_COUNT_THRESHOLD):
+    """True if the planner estimates at least threshold rows"""
+    estimate = estimated_count(model, using)
+    return estimate is not None and estimate >= threshold
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the count of large unfiltered querysets"""
+    threshold = ESTIMATED_COUNT_THRESHOLD
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if (
+            isinstance(queryset, QuerySet)
+            and not queryset.query.has_filters()
+            and not queryset.query.distinct
+            and not queryset.query.is_sliced
+        ):
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return super().count
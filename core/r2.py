@@ -0,0 +1,79 @@
+"""
+Shared Cloudflare R2 client.
+
+Building a boto3 client costs tens of milliseconds (endpoint resolution,
+credential lookup, service model loading) and every new client opens its own
+TLS connections. Signals, storages and scripts should call get_r2_client()
+instead, which returns one process-wide client with a tuned connection pool.
+botocore clients are thread-safe, so the same instance is shared by all
+request threads.
+"""
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def r2_enabled():
+    """Return True when media is stored on R2"""
+    return getattr(settings, 'R2_ENABLED', False)
+
+
+def get_bucket_name():
+    """Return the R2 bucket name"""
+    return os.getenv('R2_BUCKET_NAME')
+
+
+def get_client_config():
+    """botocore Config used by every R2 client and storage backend"""
+    return Config(
+        signature_version='s3v4',
+        max_pool_connections=getattr(settings, 'R2_MAX_POOL_CONNECTIONS', 20),
+        connect_timeout=getattr(settings, 'R2_CONNECT_TIMEOUT', 5),
+        read_timeout=getattr(settings, 'R2_READ_TIMEOUT', 30),
+        tcp_keepalive=True,
+        retries={
+            'max_attempts': getattr(settings, 'R2_MAX_ATTEMPTS', 3),
+            'mode': 'standard',
+        },
+    )
+
+
+def _create_client():
+    session = boto3.session.Session(
+        aws_access_key_id=os.getenv('R2_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('R2_SECRET_ACCESS_KEY'),
+    )
+    return session.client(
+        's3',
+        endpoint_url=os.getenv('R2_ENDPOINT_URL'),
+        region_name='auto',
+        config=get_client_config(),
+    )
+
+
+def get_r2_client():
+    """Return the process-wide R2 client, creating it on first use"""
+    global _client, _client_pid
+    pid = os.getpid()
+    # Sockets must not be shared with a forked parent (gunicorn preload)
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = _create_client()
+                _client_pid = pid
+    return _client
+
+
+def reset_r2_client():
+    """Drop the cached client (after credential rotation or in tests)"""
+    global _client, _client_pid
+    with _lock:
+        _client = None
+        _client_pid = None
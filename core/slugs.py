@@ -0,0 +1,179 @@
+"""
+Unique slug allocation.
+
+Existing slugs that could collide (the base itself and base-N) are fetched
+with one query and the next free suffix is picked in memory, instead of
+probing slug, slug-1, slug-2, ... with one query each. Two concurrent
+writers can still pick the same slug; the unique constraint rejects the
+second insert and save() retries with a fresh allocation.
+
+For imports, allocate_slugs() assigns slugs to a whole list of unsaved
+objects with a single query, ready for bulk_create().
+
+custom_slugify() and thai_slugify() turn Thai names into URL slugs. Both use
+precompiled regexes (thai_slugify maps characters with one str.translate()
+call) and memoize results, since admin saves and imports slugify the same
+names over and over.
+"""
+from functools import lru_cache
+import re
+
+from django.db import IntegrityError, models, transaction
+from unidecode import unidecode
+
+SLUG_SAVE_ATTEMPTS = 5
+SLUGIFY_CACHE_SIZE = 4096
+
+_NON_SLUG_RE = re.compile(r'[^\w\s-]', re.ASCII)
+_SEPARATOR_RE = re.compile(r'[-\s]+', re.ASCII)
+_THAI_NON_SLUG_RE = re.compile(r'[^\w-]')
+_DASHES_RE = re.compile(r'-+')
+
+THAI_TRANSLITERATION = {
+    'ก': 'k', 'ข': 'kh', 'ฃ': 'kh', 'ค': 'kh', 'ฅ': 'kh', 'ฆ': 'kh',
+    'ง': 'ng', 'จ': 'ch', 'ฉ': 'ch', 'ช': 'ch', 'ซ': 's', 'ฌ': 'ch',
+    'ญ': 'y', 'ด': 'd', 'ต': 't', 'ถ': 'th', 'ท': 'th', 'ธ': 'th',
+    'น': 'n', 'บ': 'b', 'ป': 'p', 'ผ': 'ph', 'ฝ': 'f', 'พ': 'ph',
+    'ฟ': 'f', 'ภ': 'ph', 'ม': 'm', 'ย': 'y', 'ร': 'r', 'ล': 'l',
+    'ว': 'w', 'ศ': 's', 'ษ': 's', 'ส': 's', 'ห': 'h', 'ฬ': 'l',
+    'อ': '', 'ฮ': 'h',
+    'ะ': 'a', 'ั': 'a', 'า': 'a', 'ำ': 'am', 'ิ': 'i', 'ี': 'i',
+    'ึ': 'ue', 'ื': 'ue', 'ุ': 'u', 'ู': 'u', 'เ': 'e', 'แ': 'ae',
+    'โ': 'o', 'ใ': 'ai', 'ไ': 'ai', '็': '', '่': '', '้': '',
+    '๊': '', '๋': '', '์': '', 'ํ': '', '๎': '', '๏': '', '๐': '0',
+    '๑': '1', '๒': '2', '๓': '3', '๔': '4', '๕': '5',
+    '๖': '6', '๗': '7', '๘': '8', '๙': '9',
+}
+# Spaces and underscores become dashes; everything else that is not
+# alphanumeric is dropped by _THAI_NON_SLUG_RE afterwards
+_THAI_TABLE = str.maketrans({**THAI_TRANSLITERATION, ' ': '-', '_': '-'})
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def _custom_slugify(value):
+    # unidecode output is ASCII, and ASCII input needs no transliteration
+    decoded = value if value.isascii() else unidecode(value)
+    result = _NON_SLUG_RE.sub('', decoded)
+    result = _SEPARATOR_RE.sub('-', result)
+    return result.strip('-').lower()
+
+
+def custom_slugify(value):
+    """Create slug that supports Thai characters (via unidecode)"""
+    if not value:
+        return ''
+    return _custom_slugify(value)
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def _thai_slugify(text):
+    result = text.translate(_THAI_TABLE)
+    result = _THAI_NON_SLUG_RE.sub('', result)
+    result = _DASHES_RE.sub('-', result)
+    return result.strip('-').lower()
+
+
+def thai_slugify(text):
+    """Convert Thai text to URL-friendly slug with the built-in Thai map"""
+    if not text:
+        return ''
+    return _thai_slugify(text)
+
+
+def slugify_many(values, slugify=custom_slugify):
+    """Slugify a list of names for bulk imports; duplicates are computed once"""
+    slugs = {value: slugify(value) for value in dict.fromkeys(values)}
+    return [slugs[value] for value in values]
+
+
+def _candidates_filter(bases, field):
+    """Q matching every slug that could collide with one of bases"""
+    condition = models.Q(**{f'{field}__in': list(bases)})
+    for base in bases:
+        condition |= models.Q(**{f'{field}__startswith': f'{base}-'})
+    return condition
+
+
+def next_free_slug(base, taken):
+    """base, or base-N with the smallest N >= 1 that is not in taken"""
+    if base not in taken:
+        return base
+    prefix = f'{base}-'
+    used = {
+        int(slug[len(prefix):]) for slug in taken
+        if slug.startswith(prefix) and slug[len(prefix):].isdigit()
+    }
+    counter = 1
+    while counter in used:
+        counter += 1
+    return f'{prefix}{counter}'
+
+
+def existing_slugs(model, bases, field='slug', exclude_pk=None):
+    """Set of stored slugs that could collide with bases (one query)"""
+    bases = set(bases)
+    if not bases:
+        return set()
+    queryset = model._default_manager.filter(_candidates_filter(bases, field))
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return set(queryset.values_list(field, flat=True))
+
+
+def unique_slug(model, base, field='slug', exclude_pk=None):
+    """Free slug for base in model's table"""
+    return next_free_slug(base, existing_slugs(model, [base], field, exclude_pk))
+
+
+def allocate_slugs(instances, field='slug'):
+    """
+    Give every instance without a slug a unique one.
+
+    Uses one query for the whole list and keeps track of slugs handed out
+    within the batch, so 50 objects with the same name get base, base-1,
+    ... base-49. Instances must implement get_slug_base().
+    """
+    pending = [instance for instance in instances if not getattr(instance, field)]
+    if not pending:
+        return instances
+
+    model = type(pending[0])
+    bases = {id(instance): instance.get_slug_base() for instance in pending}
+    taken = existing_slugs(model, set(bases.values()), field)
+    for instance in pending:
+        slug = next_free_slug(bases[id(instance)], taken)
+        setattr(instance, field, slug)
+        taken.add(slug)
+    return instances
+
+
+class UniqueSlugMixin:
+    """
+    Model mixin that fills an empty slug with a unique one on save.
+
+    Subclasses implement get_slug_base(), e.g. custom_slugify(self.name).
+    """
+    slug_field = 'slug'
+
+    def get_slug_base(self):
+        raise NotImplementedError('UniqueSlugMixin subclasses must implement get_slug_base()')
+
+    def save(self, *args, **kwargs):
+        field = self.slug_field
+        if getattr(self, field):
+            return super().save(*args, **kwargs)
+
+        model = type(self)
+        base = self.get_slug_base()
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
+            slug = unique_slug(model, base, field, exclude_pk=self.pk)
+            setattr(self, field, slug)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # Retry only when a concurrent writer took the same slug
+                taken = model._default_manager.filter(**{field: slug}).exclude(pk=self.pk).exists()
+                if not taken or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    setattr(self, field, '')
+                    raise
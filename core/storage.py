@@ -0,0 +1,220 @@
+"""
+Storage backend for media on Cloudflare R2.
+
+Objects are written with their ACL, Content-Type and Cache-Control in the
+upload request itself, so nothing has to be fixed up after post_save.
+ensure_public_read() repairs objects uploaded before this backend existed
+using metadata-only requests (no object bytes go through Django).
+"""
+import mimetypes
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.files.storage import default_storage
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+from .media import is_hashed_name
+from .r2 import get_r2_client, get_bucket_name, get_client_config
+
+# (offset, magic bytes, content type)
+MAGIC_SIGNATURES = (
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (8, b'WEBP', 'image/webp'),
+    (4, b'ftypavif', 'image/avif'),
+    (0, b'BM', 'image/bmp'),
+    (0, b'II*\x00', 'image/tiff'),
+    (0, b'MM\x00*', 'image/tiff'),
+    (0, b'%PDF-', 'application/pdf'),
+)
+SNIFF_BYTES = 32
+
+GENERIC_CONTENT_TYPES = ('', 'application/octet-stream', 'binary/octet-stream')
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+
+def sniff_content_type(header):
+    """Detect the content type from the first bytes of a file"""
+    if not header:
+        return None
+    for offset, magic, content_type in MAGIC_SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            # RIFF container is also used by WAV/AVI
+            if content_type == 'image/webp' and not header.startswith(b'RIFF'):
+                continue
+            return content_type
+    stripped = header.lstrip()
+    if stripped.startswith(b'<svg') or stripped.startswith(b'<?xml'):
+        return 'image/svg+xml'
+    return None
+
+
+def guess_content_type(name):
+    """Guess the content type from the file extension"""
+    content_type, _encoding = mimetypes.guess_type(name)
+    return content_type
+
+
+def _peek(content):
+    """Read the first bytes of an upload without consuming it"""
+    try:
+        if not content.seekable():
+            return b''
+        position = content.tell()
+    except (AttributeError, OSError, ValueError):
+        return b''
+    header = content.read(SNIFF_BYTES)
+    content.seek(position)
+    if isinstance(header, str):
+        header = header.encode('utf-8', 'ignore')
+    return header
+
+
+class R2MediaStorage(S3Boto3Storage):
+    """S3Boto3Storage that uploads with ACL and sniffed Content-Type in one request"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('client_config', get_client_config())
+        super().__init__(*args, **kwargs)
+
+    def _get_write_parameters(self, name, content=None):
+        params = super()._get_write_parameters(name, content)
+        # An explicit ContentType in AWS_S3_OBJECT_PARAMETERS always wins
+        if 'ContentType' not in self.get_object_parameters(name):
+            sniffed = sniff_content_type(_peek(content))
+            if sniffed:
+                params['ContentType'] = sniffed
+                params.pop('ContentEncoding', None)
+        # The object at a content-hashed key never changes
+        if is_hashed_name(name):
+            params['CacheControl'] = settings.MEDIA_IMMUTABLE_CACHE_CONTROL
+        return params
+
+    def get_available_name(self, name, max_length=None):
+        # Identical bytes map to the same hashed key; reuse it instead of adding a suffix
+        if is_hashed_name(name):
+            return clean_name(name)
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if is_hashed_name(name) and self.exists(name):
+            # Already uploaded (same content), skip the upload
+            return clean_name(name)
+        return super()._save(name, content)
+
+    def delete_many(self, names):
+        """
+        Delete objects with DeleteObjects, up to DELETE_BATCH_SIZE keys per
+        request and without a HEAD per key (deleting a missing key is not an
+        error). Returns (deleted names, {name: error} for failures).
+        """
+        keys = {self._normalize_name(clean_name(name)): name for name in names}
+        key_list = list(keys)
+        client = self.connection.meta.client
+        deleted = []
+        failed = {}
+
+        for start in range(0, len(key_list), DELETE_BATCH_SIZE):
+            chunk = key_list[start:start + DELETE_BATCH_SIZE]
+            try:
+                response = client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True},
+                )
+            except ClientError as e:
+                for key in chunk:
+                    failed[keys[key]] = str(e)
+                continue
+
+            # Quiet mode only reports the keys that failed
+            errors = {
+                error['Key']: f"{error.get('Code', 'Error')}: {error.get('Message', '')}"
+                for error in response.get('Errors', [])
+            }
+            for key in chunk:
+                if key in errors:
+                    failed[keys[key]] = errors[key]
+                else:
+                    deleted.append(keys[key])
+
+        return deleted, failed
+
+
+def bulk_delete(names, storage=None):
+    """
+    Delete many files from storage.
+
+    Uses DeleteObjects batches on R2 and plain delete() elsewhere (local
+    storage ignores missing files). Empty and duplicate names are skipped.
+    Returns (deleted names, {name: error} for failures).
+    """
+    storage = storage or default_storage
+    names = [name for name in dict.fromkeys(names) if name]
+    if not names:
+        return [], {}
+
+    if hasattr(storage, 'delete_many'):
+        return storage.delete_many(names)
+
+    deleted = []
+    failed = {}
+    for name in names:
+        try:
+            storage.delete(name)
+            deleted.append(name)
+        except Exception as e:
+            failed[name] = str(e)
+    return deleted, failed
+
+
+def _remote_content_type(client, bucket, key, current):
+    """Best content type for an existing object, reading at most SNIFF_BYTES"""
+    if current and current not in GENERIC_CONTENT_TYPES:
+        return current
+    guessed = guess_content_type(key)
+    if guessed:
+        return guessed
+    response = client.get_object(Bucket=bucket, Key=key, Range=f'bytes=0-{SNIFF_BYTES - 1}')
+    return sniff_content_type(response['Body'].read()) or 'application/octet-stream'
+
+
+def ensure_public_read(key, client=None, bucket=None, cache_control=None):
+    """
+    Make an existing object public-read without re-uploading it.
+
+    Tries PutObjectAcl first. R2 does not implement object ACL updates, so on
+    NotImplemented/AccessDenied it falls back to a server-side self-copy with
+    MetadataDirective=REPLACE, which also fixes a missing Content-Type.
+    Returns 'acl' or 'copy' depending on the path taken.
+    """
+    client = client or get_r2_client()
+    bucket = bucket or get_bucket_name()
+
+    try:
+        client.put_object_acl(Bucket=bucket, Key=key, ACL='public-read')
+        return 'acl'
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code', '')
+        if code not in ('NotImplemented', 'AccessDenied', 'InvalidRequest', 'InvalidArgument'):
+            raise
+
+    head = client.head_object(Bucket=bucket, Key=key)
+    params = {
+        'Bucket': bucket,
+        'Key': key,
+        'CopySource': {'Bucket': bucket, 'Key': key},
+        'MetadataDirective': 'REPLACE',
+        'ContentType': _remote_content_type(client, bucket, key, head.get('ContentType')),
+        'Metadata': head.get('Metadata', {}),
+        'ACL': 'public-read',
+    }
+    cache_control = cache_control or head.get('CacheControl')
+    if cache_control:
+        params['CacheControl'] = cache_control
+    client.copy_object(**params)
+    return 'copy'
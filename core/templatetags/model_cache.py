@@ -0,0 +1,16 @@
+from django import template
+
+from core.cache import model_versions
+
+register = template.Library()
+
+
+@register.simple_tag
+def model_version(*models):
+    """
+    Version string for {% cache %} fragments that depend on models:
+
+    {% model_version 'products.Category' 'products.Brand' as version %}
+    {% cache 600 brand_menu version %}...{% endcache %}
+    """
+    return '.'.join(str(version) for version in model_versions(*models))
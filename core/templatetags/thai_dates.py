@@ -0,0 +1,11 @@
+from django import template
+
+from core.thai_dates import thai_datetime as _thai_datetime
+
+register = template.Library()
+
+
+@register.filter
+def thai_datetime(value, arg=''):
+    """{{ backup.created_at|thai_datetime }} -> 25 ตุลาคม 2568, 19:22 (|thai_datetime:"seconds" adds :SS)"""
+    return _thai_datetime(value, seconds=arg == 'seconds')
@@ -0,0 +1,19 @@
+from django import template
+
+from core.thumbnails import thumbnail_url as _thumbnail_url, thumbnail_img as _thumbnail_img
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail_url(file, size=80):
+    """{{ profile.avatar|thumbnail_url:80 }} -> URL of the 80px WebP thumbnail"""
+    return _thumbnail_url(file, int(size))
+
+
+@register.filter
+def thumbnail_img(file, size=80):
+    """{{ profile.avatar|thumbnail_img:60 }} -> <img> with srcset; the page needs js/admin_thumbnails.js for the fallback"""
+    if not file:
+        return ''
+    return _thumbnail_img(file, int(size))
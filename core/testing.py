@@ -0,0 +1,124 @@
+"""
+Test helpers shared by the apps' tests.py modules.
+"""
+from io import BytesIO
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+
+class ChangelistQueryCountMixin:
+    """
+    TestCase mixin for admin changelist query budgets.
+
+    Logs in a superuser as self.admin and turns on ADMIN_QUERY_BUDGET_CHECK,
+    so a changelist over its QueryBudgetMixin budget fails the request, and
+    assert_constant_queries() also catches any per-row query below the budget.
+    """
+
+    def setUp(self):
+        super().setUp()
+        budget_check = override_settings(ADMIN_QUERY_BUDGET_CHECK=True)
+        budget_check.enable()
+        self.addCleanup(budget_check.disable)
+        self.admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, url, add_rows):
+        """add_rows(count) creates count more rows listed at url"""
+        add_rows(1)
+        few = self.count_queries(url)
+        add_rows(10)
+        self.assertEqual(self.count_queries(url), few)
+
+
+class FakeListingClient:
+    """
+    boto3 S3 client stand-in serving list_objects_v2 pages from a list of keys.
+
+    Honours Prefix, Delimiter and PageSize like S3 (keys in sorted order,
+    CommonPrefixes for folders below a delimiter) and records every page
+    request in self.requests as (prefix, delimiter).
+    """
+
+    def __init__(self, keys, fail_prefix=None):
+        self.keys = sorted(keys)
+        self.fail_prefix = fail_prefix
+        self.requests = []
+
+    def get_paginator(self, operation):
+        assert operation == 'list_objects_v2', operation
+        return self
+
+    def paginate(self, Bucket, Prefix='', Delimiter=None, PaginationConfig=None):
+        if self.fail_prefix and Prefix.startswith(self.fail_prefix):
+            raise RuntimeError(f'listing {Prefix} failed')
+        page_size = (PaginationConfig or {}).get('PageSize', 1000)
+        entries = []
+        for key in self.keys:
+            if not key.startswith(Prefix):
+                continue
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                folder = Prefix + rest.split(Delimiter, 1)[0] + Delimiter
+                if ('folder', folder) not in entries:
+                    entries.append(('folder', folder))
+            else:
+                entries.append(('object', key))
+
+        for start in range(0, max(len(entries), 1), page_size):
+            self.requests.append((Prefix, Delimiter))
+            chunk = entries[start:start + page_size]
+            page = {}
+            contents = [{'Key': key, 'Size': len(key)} for kind, key in chunk if kind == 'object']
+            folders = [{'Prefix': key} for kind, key in chunk if kind == 'folder']
+            if contents:
+                page['Contents'] = contents
+            if folders:
+                page['CommonPrefixes'] = folders
+            yield page
+
+
+def image_bytes(color=(200, 0, 0), size=(64, 64), format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, format)
+    return buffer.getvalue()
+
+
+def image_upload(name='photo.png', color=(200, 0, 0), size=(64, 64)):
+    return SimpleUploadedFile(name, image_bytes(color, size), content_type='image/png')
+
+
+class TempMediaMixin:
+    """Local FileSystemStorage in a temporary MEDIA_ROOT, media jobs run inline"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            MEDIA_JOBS_RUN_SYNC=True,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def stored(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
@@ -0,0 +1,605 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+import os
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from . import images, inventory, jobs, pagination, slugs
+from .admin_mixins import EstimatedCountMixin
+from .media import get_hashed_media_fields, get_media_fields, is_hashed_name
+from .models import MediaJob
+from .pagination import EstimatedCountPaginator, estimated_count
+from .storage import R2MediaStorage
+from .testing import FakeListingClient, TempMediaMixin, image_bytes, image_upload
+from .thai_dates import thai_datetime
+from .thumbnails import THUMBNAIL_SIZES, thumbnail_img, thumbnail_name, thumbnail_names, with_thumbnails
+
+
+@override_settings(MEDIA_JOBS_RUN_SYNC=False, MEDIA_JOBS_RETRY_BASE_SECONDS=30, MEDIA_JOBS_MAX_ATTEMPTS=3)
+@mock.patch('core.jobs.close_old_connections')
+class MediaJobQueueTest(TestCase):
+    """Claiming, retrying and requeueing media jobs"""
+
+    def enqueue(self, *names):
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs.enqueue_storage_job('delete_files', names, source='products.category:1')
+        return MediaJob.objects.latest('id')
+
+    def test_enqueue_waits_for_commit_and_dedupes(self, _close):
+        with self.captureOnCommitCallbacks() as callbacks:
+            jobs.enqueue_storage_job('delete_files', ['a.jpg', 'a.jpg', '', 'b.jpg'])
+        self.assertFalse(MediaJob.objects.exists())
+        callbacks[0]()
+        self.assertEqual(MediaJob.objects.get().names, ['a.jpg', 'b.jpg'])
+
+    def test_claim_marks_due_jobs_running(self, _close):
+        due = self.enqueue('a.jpg')
+        later = self.enqueue('b.jpg')
+        MediaJob.objects.filter(pk=later.pk).update(run_after=timezone.now() + timedelta(minutes=5))
+
+        claimed = jobs.claim_jobs(10)
+        self.assertEqual([job.pk for job in claimed], [due.pk])
+        due.refresh_from_db()
+        self.assertEqual((due.status, due.attempts), ('running', 1))
+        self.assertIsNotNone(due.started_at)
+        self.assertEqual(jobs.claim_jobs(10), [])
+
+    def test_success(self, _close):
+        self.enqueue('a.jpg')
+        handler = mock.Mock()
+        with mock.patch.dict(jobs.HANDLERS, {'delete_files': handler}):
+            job = jobs.run_job(jobs.claim_jobs(1)[0])
+        handler.assert_called_once_with(['a.jpg'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_with_backoff_then_permanent_failure(self, _close):
+        self.enqueue('a.jpg')
+        failing = mock.Mock(side_effect=jobs.MediaJobError('boom'))
+        delays = []
+        with mock.patch.dict(jobs.HANDLERS, {'delete_files': failing}):
+            for attempt in (1, 2):
+                job = jobs.claim_jobs(1)[0]
+                before = timezone.now()
+                jobs.run_job(job)
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.attempts, job.last_error), ('pending', attempt, 'boom'))
+                delays.append(round((job.run_after - before).total_seconds()))
+                MediaJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+            job = jobs.run_job(jobs.claim_jobs(1)[0])
+        self.assertEqual(delays, [30, 60])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 3))
+        self.assertEqual(jobs.claim_jobs(1), [])
+
+    def test_retry_delay_is_capped(self, _close):
+        with self.settings(MEDIA_JOBS_RETRY_MAX_SECONDS=100):
+            self.assertEqual(jobs.retry_delay(10), timedelta(seconds=100))
+
+    def test_requeue_stale_jobs(self, _close):
+        stale = self.enqueue('a.jpg')
+        fresh = self.enqueue('b.jpg')
+        jobs.claim_jobs(10)
+        MediaJob.objects.filter(pk=stale.pk).update(started_at=timezone.now() - timedelta(minutes=20))
+
+        self.assertEqual(jobs.requeue_stale_jobs(600), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, fresh.status), ('pending', 'running'))
+        self.assertEqual([job.pk for job in jobs.claim_jobs(10)], [stale.pk])
+
+    def test_run_sync_setting_skips_queue(self, _close):
+        handler = mock.Mock()
+        with self.settings(MEDIA_JOBS_RUN_SYNC=True), mock.patch.dict(jobs.HANDLERS, {'delete_files': handler}):
+            with self.captureOnCommitCallbacks(execute=True):
+                jobs.enqueue_storage_job('delete_files', ['a.jpg'])
+        handler.assert_called_once_with(['a.jpg'])
+        self.assertFalse(MediaJob.objects.exists())
+
+
+@override_settings(MEDIA_JOBS_RUN_SYNC=False)
+class ProcessMediaJobsCommandTest(TransactionTestCase):
+    """The worker runs jobs on its own thread and connection, so rows must be committed"""
+
+    def test_once_drains_queue(self):
+        for name in ('a.jpg', 'b.jpg'):
+            jobs.enqueue_storage_job('delete_files', [name])  # autocommit: runs immediately
+        handler = mock.Mock()
+        out = StringIO()
+        with mock.patch.dict(jobs.HANDLERS, {'delete_files': handler}):
+            call_command('process_media_jobs', once=True, threads=1, stdout=out)
+        self.assertEqual(handler.call_count, 2)
+        self.assertIn('Processed 2 jobs, 0 not completed', out.getvalue())
+        self.assertEqual(set(MediaJob.objects.values_list('status', flat=True)), {'done'})
+
+
+    def test_jobs_sharing_a_file_run_in_queued_order(self):
+        now = timezone.now()
+        # The render was queued first but is due later (e.g. after a retry)
+        render = MediaJob.objects.create(
+            action='generate_thumbnails', names=['categories/a.png'], run_after=now - timedelta(seconds=1),
+        )
+        delete = MediaJob.objects.create(
+            action='delete_files', names=with_thumbnails(['categories/a.png']), run_after=now - timedelta(seconds=2),
+        )
+        other = MediaJob.objects.create(action='delete_files', names=['categories/b.png'], run_after=now)
+        MediaJob.objects.filter(pk=render.pk).update(created_at=now - timedelta(minutes=1))
+
+        claimed = jobs.claim_jobs(10)
+        self.assertEqual([job.pk for job in claimed], [delete.pk, render.pk, other.pk])
+        groups = jobs.job_groups(claimed)
+        self.assertEqual([[job.pk for job in group] for group in groups], [[render.pk, delete.pk], [other.pk]])
+
+        MediaJob.objects.update(status='pending', attempts=0)
+        calls = []
+        handlers = {action: (lambda names, action=action: calls.append((action, names[0]))) for action in jobs.HANDLERS}
+        with mock.patch.dict(jobs.HANDLERS, handlers):
+            call_command('process_media_jobs', once=True, threads=2, stdout=StringIO())
+        a_calls = [call for call in calls if call[1] == 'categories/a.png']
+        self.assertEqual(a_calls, [('generate_thumbnails', 'categories/a.png'), ('delete_files', 'categories/a.png')])
+        self.assertEqual(set(MediaJob.objects.values_list('status', flat=True)), {'done'})
+
+
+class FakePostgresConnection:
+    """Just enough of a PostgreSQL connection for estimated_count()"""
+    vendor = 'postgresql'
+
+    def __init__(self, reltuples):
+        self.reltuples = reltuples
+        self.executed = []
+        self.ops = mock.Mock(quote_name=lambda name: f'"{name}"')
+
+    def cursor(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value = cursor
+        cursor.execute.side_effect = lambda sql, params: self.executed.append((sql, params))
+        cursor.fetchone.return_value = (self.reltuples,)
+        return cursor
+
+
+class EstimatedCountTest(TestCase):
+    """Planner estimates replace COUNT(*) only for large unfiltered lists"""
+
+    def setUp(self):
+        pagination._estimates.clear()
+        self.addCleanup(pagination._estimates.clear)
+        for name in ('a.jpg', 'b.jpg', 'c.jpg'):
+            MediaJob.objects.create(action='delete_files', names=[name])
+
+    def fake_postgres(self, reltuples):
+        connection = FakePostgresConnection(reltuples)
+        patcher = mock.patch.object(pagination, 'connections', {'default': connection})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return connection
+
+    def test_large_table_uses_estimate_without_count(self):
+        self.fake_postgres(50000)
+        paginator = EstimatedCountPaginator(MediaJob.objects.order_by('id'), 100)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 50000)
+        self.assertEqual(paginator.num_pages, 500)
+
+    def test_small_table_is_counted_exactly(self):
+        self.fake_postgres(pagination.ESTIMATED_COUNT_THRESHOLD - 1)
+        paginator = EstimatedCountPaginator(MediaJob.objects.order_by('id'), 100)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 3)
+
+    def test_filtered_list_is_counted_exactly(self):
+        connection = self.fake_postgres(50000)
+        MediaJob.objects.filter(pk=MediaJob.objects.first().pk).update(status='failed')
+        queryset = MediaJob.objects.filter(status='failed').order_by('id')
+        with self.assertNumQueries(1):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 1)
+        self.assertEqual(connection.executed, [])
+
+    def test_never_analyzed_table_is_counted_exactly(self):
+        self.fake_postgres(-1)
+        self.assertIsNone(estimated_count(MediaJob))
+        self.assertEqual(EstimatedCountPaginator(MediaJob.objects.order_by('id'), 100).count, 3)
+
+    def test_estimate_is_cached_for_a_minute(self):
+        connection = self.fake_postgres(50000)
+        with mock.patch.object(pagination.time, 'monotonic', return_value=1000.0) as monotonic:
+            self.assertEqual(estimated_count(MediaJob), 50000)
+            connection.reltuples = 80000
+            monotonic.return_value = 1000.0 + pagination.ESTIMATE_CACHE_SECONDS - 1
+            self.assertEqual(estimated_count(MediaJob), 50000)
+            monotonic.return_value = 1000.0 + pagination.ESTIMATE_CACHE_SECONDS
+            self.assertEqual(estimated_count(MediaJob), 80000)
+        self.assertEqual(len(connection.executed), 2)
+        self.assertEqual(connection.executed[0][1], ['"core_mediajob"'])
+
+    def test_other_databases_always_count(self):
+        self.assertIsNone(estimated_count(MediaJob))
+
+    def test_full_result_count_hidden_on_large_tables(self):
+        admin = EstimatedCountMixin()
+        admin.model = MediaJob
+        with mock.patch('core.admin_mixins.is_large_table', return_value=True) as is_large:
+            self.assertFalse(admin.show_full_result_count)
+        is_large.assert_called_once_with(MediaJob)
+        with mock.patch('core.admin_mixins.is_large_table', return_value=False):
+            self.assertTrue(admin.show_full_result_count)
+
+
+class SlugAllocationTest(TestCase):
+    """Unique slugs come from one lookup query, however many rows collide"""
+
+    def setUp(self):
+        from manuals.models import Manual, ManualCategory
+
+        self.Manual = Manual
+        self.category = ManualCategory.objects.create(name='หมวดหมู่')
+
+    def create(self, title='How to reset'):
+        with CaptureQueriesContext(connection) as queries:
+            manual = self.Manual.objects.create(title=title, category=self.category, content='')
+        return manual, len(queries)
+
+    def test_same_name_creates_use_constant_queries(self):
+        first, first_queries = self.create()
+        results = [self.create() for _ in range(9)]
+        self.assertEqual(first.slug, 'how-to-reset')
+        self.assertEqual([manual.slug for manual, _ in results], [f'how-to-reset-{n}' for n in range(1, 10)])
+        # The 10th create costs the same as the first: no probing of slug-1, slug-2, ...
+        self.assertEqual({count for _, count in results}, {first_queries})
+        with CaptureQueriesContext(connection) as queries:
+            self.create()
+        slug_lookups = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and '"slug"' in q['sql']]
+        self.assertEqual(len(slug_lookups), 1)
+
+    def test_batch_allocation_with_colliding_names(self):
+        self.create()
+        self.create('how to reset 2')
+        batch = [
+            self.Manual(title=title, category=self.category, content='')
+            for title in ('How to reset', 'How to reset', 'Backup', 'How to reset', 'Backup')
+        ]
+        with self.assertNumQueries(1):
+            slugs.allocate_slugs(batch)
+        self.assertEqual(
+            [manual.slug for manual in batch],
+            ['how-to-reset-1', 'how-to-reset-3', 'backup', 'how-to-reset-4', 'backup-1'],
+        )
+        self.Manual.objects.bulk_create(batch)
+        self.assertEqual(self.Manual.objects.filter(slug__startswith='how-to-reset').count(), 5)
+
+    def test_integrity_error_on_a_taken_slug_retries(self):
+        self.create()
+        real_unique_slug = slugs.unique_slug
+
+        def stale_first(*args, **kwargs):
+            # A concurrent writer took 'how-to-reset' after the first lookup
+            return 'how-to-reset' if unique_slug.call_count == 1 else real_unique_slug(*args, **kwargs)
+
+        with mock.patch.object(slugs, 'unique_slug', side_effect=stale_first) as unique_slug:
+            manual, _ = self.create()
+        self.assertEqual(unique_slug.call_count, 2)
+        self.assertEqual(manual.slug, 'how-to-reset-1')
+
+    def test_integrity_error_not_caused_by_slug_is_raised(self):
+        manual = self.Manual(title='Orphan', category=self.category, content=None)
+        with self.assertRaises(IntegrityError):
+            manual.save()
+        self.assertEqual(manual.slug, '')
+
+
+class R2MediaStorageTest(SimpleTestCase):
+    """Content-hashed keys are reused, uploaded once and cached as immutable"""
+
+    HASHED = 'categories/' + 'a' * 32 + '.jpg'
+
+    def setUp(self):
+        self.storage = R2MediaStorage(bucket_name='media')
+
+    def test_hashed_name_is_reused_instead_of_suffixed(self):
+        with mock.patch.object(self.storage, 'exists', return_value=True) as exists:
+            self.assertEqual(self.storage.get_available_name(self.HASHED), self.HASHED)
+        exists.assert_not_called()
+
+        with mock.patch.object(S3Boto3Storage, 'get_available_name', return_value='categories/photo_x.jpg') as parent:
+            self.assertEqual(self.storage.get_available_name('categories/photo.jpg'), 'categories/photo_x.jpg')
+        parent.assert_called_once()
+
+    def test_existing_hashed_object_is_not_uploaded_again(self):
+        with mock.patch.object(S3Boto3Storage, '_save', side_effect=lambda name, content: name) as upload:
+            with mock.patch.object(self.storage, 'exists', return_value=True):
+                self.assertEqual(self.storage._save(self.HASHED, ContentFile(b'x')), self.HASHED)
+            upload.assert_not_called()
+
+            with mock.patch.object(self.storage, 'exists', return_value=False):
+                self.storage._save(self.HASHED, ContentFile(b'x'))
+            with mock.patch.object(self.storage, 'exists') as exists:
+                self.storage._save('categories/photo.jpg', ContentFile(b'x'))
+            exists.assert_not_called()
+        self.assertEqual(upload.call_count, 2)
+
+    def test_immutable_cache_control_only_for_hashed_names(self):
+        png = ContentFile(image_bytes())
+        params = self.storage._get_write_parameters(self.HASHED, png)
+        self.assertEqual(params['CacheControl'], settings.MEDIA_IMMUTABLE_CACHE_CONTROL)
+        # Sniffed from the bytes, not the .jpg extension
+        self.assertEqual(params['ContentType'], 'image/png')
+        self.assertEqual(png.tell(), 0)
+        self.assertNotIn('CacheControl', self.storage._get_write_parameters('categories/photo.jpg', png))
+
+
+class HashMediaNamesTest(TempMediaMixin, TestCase):
+    """hash_media_names renames stored files to content-hashed keys in batches"""
+
+    def setUp(self):
+        super().setUp()
+        from products.models import Category
+
+        self.Category = Category
+        for name, color in (('Red', (200, 0, 0)), ('Also red', (200, 0, 0)), ('Blue', (0, 0, 200))):
+            with self.captureOnCommitCallbacks(execute=True):  # thumbnail jobs run inline
+                Category.objects.create(name=name, image=image_upload(f'{name}.png', color))
+        self.old_names = dict(Category.objects.values_list('name', 'image'))
+
+    def run_command(self, **options):
+        out = StringIO()
+        call_command('hash_media_names', batch_size=2, threads=2, stdout=out, **options)
+        return dict(self.Category.objects.values_list('name', 'image'))
+
+    def test_registry_drives_the_renamed_fields(self):
+        labels = {model._meta.label for model, _fields in get_hashed_media_fields()}
+        self.assertEqual(labels, {model._meta.label for model, _fields in get_media_fields()} - {'manuals.ManualAttachment'})
+
+    def test_rename_in_batches_shares_identical_files(self):
+        with mock.patch('core.management.commands.hash_media_names.bump_model_version') as bump:
+            names = self.run_command()
+        # Three rows in batches of two: one version bump per batch
+        self.assertEqual(bump.call_count, 2)
+        self.assertTrue(all(is_hashed_name(name) for name in names.values()))
+        self.assertEqual(names['Red'], names['Also red'])
+        self.assertNotEqual(names['Red'], names['Blue'])
+        for name in names.values():
+            self.assertTrue(self.stored(name))
+            self.assertTrue(all(self.stored(thumb) for thumb in thumbnail_names(name)))
+        for name in self.old_names.values():
+            self.assertFalse(self.stored(name))
+            self.assertFalse(any(self.stored(thumb) for thumb in thumbnail_names(name)))
+
+    def test_keep_old(self):
+        names = self.run_command(keep_old=True)
+        self.assertTrue(all(is_hashed_name(name) for name in names.values()))
+        self.assertTrue(all(self.stored(name) for name in self.old_names.values()))
+
+    def test_dry_run_changes_nothing(self):
+        self.assertEqual(self.run_command(dry_run=True), self.old_names)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root, 'categories'))), sorted(
+            [os.path.basename(name) for name in self.old_names.values()] + ['thumbs']
+        ))
+
+
+class ThumbnailTest(TempMediaMixin, TestCase):
+    """WebP thumbnails are rendered by a media job and live and die with the original"""
+
+    def setUp(self):
+        super().setUp()
+        from products.models import Category
+
+        self.Category = Category
+
+    def test_deterministic_keys(self):
+        self.assertEqual(thumbnail_name('categories/a.b.jpg', 80), 'categories/thumbs/a.b_80.webp')
+        self.assertEqual(thumbnail_names(''), [])
+        self.assertEqual(with_thumbnails(['logo.png', '']), [
+            'logo.png', 'thumbs/logo_40.webp', 'thumbs/logo_80.webp', 'thumbs/logo_160.webp',
+        ])
+
+    @override_settings(MEDIA_JOBS_RUN_SYNC=False)
+    @mock.patch('core.jobs.close_old_connections')
+    def test_save_queues_thumbnails_instead_of_rendering(self, _close):
+        with mock.patch('core.thumbnails.render_thumbnails') as render:
+            with self.captureOnCommitCallbacks(execute=True):
+                category = self.Category.objects.create(name='Red', image=image_upload(size=(300, 200)))
+        render.assert_not_called()
+        job = MediaJob.objects.get(action='generate_thumbnails')
+        self.assertEqual((job.names, job.source), ([category.image.name], f'products.category:{category.pk}'))
+
+        jobs.run_job(jobs.claim_jobs(1)[0])
+        for size in THUMBNAIL_SIZES:
+            with Image.open(os.path.join(self.media_root, thumbnail_name(category.image.name, size))) as thumb:
+                self.assertEqual((thumb.format, thumb.size), ('WEBP', (size, size)))
+
+    def test_thumbnails_are_deleted_with_the_original(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = self.Category.objects.create(name='Red', image=image_upload())
+        first = category.image.name
+        self.assertTrue(all(self.stored(name) for name in with_thumbnails([first])))
+
+        category.image = image_upload('new.png', (0, 0, 200))
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+        self.assertFalse(any(self.stored(name) for name in with_thumbnails([first])))
+        self.assertTrue(all(self.stored(name) for name in with_thumbnails([category.image.name])))
+
+        second = category.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            category.delete()
+        self.assertFalse(any(self.stored(name) for name in with_thumbnails([second])))
+
+    def test_job_skips_an_original_deleted_before_it_ran(self):
+        jobs.run_action('generate_thumbnails', ['categories/gone.png'])
+        self.assertFalse(self.stored(thumbnail_name('categories/gone.png', 40)))
+
+    def test_thumbnail_img(self):
+        image = self.Category(image='categories/red.png').image
+        html = thumbnail_img(image, 64, alt='Red')
+        # The 80px variant covers a 64px box; srcset lets high-density screens pick 160px
+        self.assertIn(f'src="{default_storage.url("categories/thumbs/red_80.webp")}"', html)
+        for size in THUMBNAIL_SIZES:
+            self.assertIn(f'{default_storage.url(f"categories/thumbs/red_{size}.webp")} {size}w', html)
+        self.assertIn('sizes="64px" alt="Red"', html)
+        # Falls back to the original until the thumbnail job has run
+        self.assertIn(f'data-fallback-src="{image.url}"', html)
+        self.assertNotIn('onerror', html)
+
+    def test_admin_pages_load_the_fallback_script(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.assertContains(self.client.get(reverse('admin:index')), 'js/admin_thumbnails.js')
+
+
+class InventoryTest(SimpleTestCase):
+    """Paginated and prefix-split listings cover every key exactly once"""
+
+    KEYS = [
+        'manuals/images/readme.txt',
+        'manuals/images/2025/stray.jpg',
+        'manuals/images/2025/01/05/a.jpg',
+        'manuals/images/2025/01/05/b.jpg',
+        'manuals/images/2025/01/31/c.png',
+        'manuals/images/2025/02/01/d.jpg',
+        'manuals/images/2026/01/02/e.jpg',
+        'manuals/images/2026/01/02/f.jpg',
+        'manuals/images/2026/01/03/g.jpg',
+        'avatars/user_1.png',
+    ]
+    UNDER_PREFIX = {key for key in KEYS if key.startswith('manuals/images/')}
+
+    def setUp(self):
+        self.client = FakeListingClient(self.KEYS)
+
+    def test_pages_are_streamed(self):
+        keys = [obj['Key'] for obj in inventory.iter_objects('manuals/images/', self.client, 'media', page_size=2)]
+        self.assertEqual(set(keys), self.UNDER_PREFIX)
+        self.assertEqual(len(keys), len(self.UNDER_PREFIX))
+        self.assertEqual(len(self.client.requests), 5)
+
+    def test_split_prefix_walks_year_and_month(self):
+        prefixes, direct = inventory.split_prefix('manuals/images/', 2, self.client, 'media')
+        self.assertEqual(prefixes, ['manuals/images/2025/01/', 'manuals/images/2025/02/', 'manuals/images/2026/01/'])
+        self.assertEqual([obj['Key'] for obj in direct], ['manuals/images/readme.txt', 'manuals/images/2025/stray.jpg'])
+
+    def test_parallel_listing_through_a_bounded_queue(self):
+        prefixes, _direct = inventory.split_prefix('manuals/images/', 2, self.client, 'media')
+        pairs = list(inventory.iter_objects_parallel(prefixes, self.client, 'media', workers=2, page_size=1))
+        self.assertTrue(all(obj['Key'].startswith(prefix) for prefix, obj in pairs))
+        self.assertEqual(
+            sorted(obj['Key'] for _prefix, obj in pairs),
+            sorted(key for key in self.UNDER_PREFIX if key.count('/') == 5),
+        )
+
+    def test_listing_error_is_raised(self):
+        client = FakeListingClient(self.KEYS, fail_prefix='manuals/images/2026/')
+        prefixes = ['manuals/images/2025/01/', 'manuals/images/2026/01/']
+        with self.assertRaisesMessage(RuntimeError, 'listing manuals/images/2026/01/ failed'):
+            list(inventory.iter_objects_parallel(prefixes, client, 'media', workers=2))
+
+    @mock.patch.object(inventory, 'get_bucket_name', return_value='media')
+    @mock.patch.object(inventory, 'r2_enabled', return_value=True)
+    def test_parallel_inventory_matches_sequential(self, _enabled, _bucket):
+        with mock.patch.object(inventory, 'get_r2_client', return_value=self.client):
+            sequential = [obj['Key'] for obj in inventory.iter_media_objects('manuals/images/')]
+            parallel = [obj['Key'] for obj in inventory.iter_media_objects('manuals/images/', parallel_depth=2, workers=4)]
+        self.assertEqual(sorted(sequential), sorted(parallel))
+        self.assertEqual(set(parallel), self.UNDER_PREFIX)
+
+
+class FakeRangeClient:
+    """boto3 client stand-in answering ranged get_object calls like S3"""
+
+    def __init__(self, data):
+        self.data = data
+        self.ranges = []
+
+    def get_object(self, Bucket, Key, Range):
+        self.ranges.append(Range)
+        start, end = (int(value) for value in Range[len('bytes='):].split('-'))
+        if start >= len(self.data):
+            raise ClientError({'Error': {'Code': 'InvalidRange'}}, 'GetObject')
+        chunk = self.data[start:end + 1]
+        return {
+            'Body': BytesIO(chunk),
+            'ContentRange': f'bytes {start}-{start + len(chunk) - 1}/{len(self.data)}',
+        }
+
+
+class ImageDimensionsTest(TempMediaMixin, SimpleTestCase):
+    """Dimensions come from the first bytes of an object"""
+
+    def read(self, data, **kwargs):
+        client = FakeRangeClient(data)
+        with mock.patch.object(images, 'r2_enabled', return_value=True):
+            size = images.read_image_dimensions('photo.jpg', client=client, bucket='media', **kwargs)
+        return size, client.ranges
+
+    def large_header_jpeg(self):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), (0, 0, 200)).save(buffer, 'JPEG', comment=b'x' * 5000)
+        return buffer.getvalue()
+
+    def test_single_request_for_small_headers(self):
+        size, ranges = self.read(image_bytes(size=(120, 80)))
+        self.assertEqual(size, (120, 80))
+        self.assertEqual(ranges, [f'bytes=0-{images.HEADER_CHUNK_SIZE - 1}'])
+
+    def test_ranges_grow_until_the_header_is_parsed(self):
+        size, ranges = self.read(self.large_header_jpeg(), chunk_size=1024)
+        self.assertEqual(size, (40, 30))
+        self.assertEqual(ranges, ['bytes=0-1023', 'bytes=1024-3071', 'bytes=3072-7167'])
+
+    def test_stops_at_the_end_of_the_object(self):
+        # Exactly one chunk long: asking for bytes=1024- would be a 416
+        size, ranges = self.read(b'\0' * 1024, chunk_size=1024)
+        self.assertEqual(size, (None, None))
+        self.assertEqual(ranges, ['bytes=0-1023'])
+
+    def test_max_bytes(self):
+        size, ranges = self.read(self.large_header_jpeg(), chunk_size=1024, max_bytes=2048)
+        self.assertEqual(size, (None, None))
+        self.assertEqual(ranges, ['bytes=0-1023', 'bytes=1024-3071'])
+
+    def test_reads_from_storage(self):
+        name = default_storage.save('photo.png', ContentFile(image_bytes(size=(33, 44))))
+        self.assertEqual(images.read_image_dimensions(name, storage=default_storage), (33, 44))
+        self.assertEqual(images.read_image_dimensions(name), (33, 44))
+
+
+class ThaiDatetimeTest(SimpleTestCase):
+    """Buddhist-era dates in Asia/Bangkok"""
+
+    def test_midnight_rollover(self):
+        # 17:00 UTC is midnight the next day in Bangkok (UTC+7)
+        self.assertEqual(
+            thai_datetime(datetime(2025, 10, 24, 17, 0, tzinfo=dt_timezone.utc)), '25 ตุลาคม 2568, 00:00'
+        )
+        self.assertEqual(
+            thai_datetime(datetime(2024, 12, 31, 16, 59, tzinfo=dt_timezone.utc)), '31 ธันวาคม 2567, 23:59'
+        )
+        self.assertEqual(
+            thai_datetime(datetime(2024, 12, 31, 17, 30, tzinfo=dt_timezone.utc)), '1 มกราคม 2568, 00:30'
+        )
+
+    def test_empty_value(self):
+        self.assertEqual(thai_datetime(None), '-')
+
+    def test_seconds(self):
+        value = datetime(2025, 10, 25, 12, 22, 5, tzinfo=dt_timezone.utc)
+        self.assertEqual(thai_datetime(value, seconds=True), '25 ตุลาคม 2568, 19:22:05')
+        self.assertEqual(thai_datetime(value), '25 ตุลาคม 2568, 19:22')
+
+    def test_template_filter(self):
+        template = Template('{% load thai_dates %}{{ value|thai_datetime }} / {{ value|thai_datetime:"seconds" }}')
+        value = datetime(2025, 10, 25, 12, 22, 5, tzinfo=dt_timezone.utc)
+        self.assertEqual(template.render(Context({'value': value})), '25 ตุลาคม 2568, 19:22 / 25 ตุลาคม 2568, 19:22:05')
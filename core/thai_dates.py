@@ -0,0 +1,44 @@
+"""
+Thai Buddhist-era date formatting for admin columns and templates.
+
+thai_datetime(dt) -> "25 ตุลาคม 2568, 19:22" (Asia/Bangkok, พ.ศ.)
+
+The timezone is resolved once with zoneinfo, month names live in a
+module-level tuple, and the "day month year" part is cached per calendar
+day, so formatting a changelist column is one astimezone() plus a short
+f-string. Whole results are memoized as well: the same timestamp is usually
+formatted several times per request (list column, readonly field, history).
+"""
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+THAI_TZ = ZoneInfo('Asia/Bangkok')
+BUDDHIST_ERA_OFFSET = 543
+THAI_MONTHS = (
+    'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
+    'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม',
+)
+EMPTY_VALUE = '-'
+
+
+@lru_cache(maxsize=2048)
+def thai_date(year, month, day):
+    """'25 ตุลาคม 2568' for a Gregorian year/month/day"""
+    return f'{day} {THAI_MONTHS[month - 1]} {year + BUDDHIST_ERA_OFFSET}'
+
+
+@lru_cache(maxsize=4096)
+def _thai_datetime(dt, seconds):
+    local = dt.astimezone(THAI_TZ)
+    if seconds:
+        time = f'{local.hour:02d}:{local.minute:02d}:{local.second:02d}'
+    else:
+        time = f'{local.hour:02d}:{local.minute:02d}'
+    return f'{thai_date(local.year, local.month, local.day)}, {time}'
+
+
+def thai_datetime(dt, seconds=False):
+    """แปลง datetime เป็นวันเดือนไทย พ.ศ. เวลาไทย ("-" when empty)"""
+    if not dt:
+        return EMPTY_VALUE
+    return _thai_datetime(dt, seconds)
@@ -0,0 +1,64 @@
+"""
+Lightweight dirty-field tracking.
+
+Models list the fields to watch in tracked_fields. Their values are
+snapshotted when the row is loaded (from_db) and again after every save, so
+post_save receivers can ask has_changed('image') / previous('image') without
+re-querying the row (which would return the values that were just saved).
+
+File fields are compared by name; values are stored as-is otherwise.
+Fields deferred with only()/defer() are not tracked and report no change.
+"""
+from django.db import models
+
+
+def _tracked_value(field, value):
+    """Comparable form of a field value (file fields by name, '' when empty)"""
+    if isinstance(field, models.FileField):
+        return getattr(value, 'name', value) or ''
+    return value
+
+
+class FieldTrackerMixin:
+    """Model mixin exposing has_changed(field) and previous(field)"""
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self):
+        loaded = self.__dict__
+        snapshot = {}
+        for name in self.tracked_fields:
+            field = self._meta.get_field(name)
+            if field.attname in loaded:
+                snapshot[name] = _tracked_value(field, loaded[field.attname])
+        self._tracked_snapshot = snapshot
+
+    def has_changed(self, field):
+        """True if field differs from its value when loaded / last saved"""
+        snapshot = getattr(self, '_tracked_snapshot', {})
+        if field not in snapshot:
+            return False
+        return snapshot[field] != _tracked_value(self._meta.get_field(field), getattr(self, field))
+
+    def changed_fields(self):
+        """Tracked fields whose value differs from the snapshot"""
+        return [field for field in self.tracked_fields if self.has_changed(field)]
+
+    def previous(self, field):
+        """Value of field when loaded / last saved (None if unknown)"""
+        return getattr(self, '_tracked_snapshot', {}).get(field)
+
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        # post_save receivers have run with the old snapshot; start over
+        self._snapshot_tracked_fields()
+        return result
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked_fields()
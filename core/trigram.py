@@ -0,0 +1,43 @@
+"""
+pg_trgm indexes for admin search.
+
+Admin search_fields use icontains, which PostgreSQL renders as
+UPPER("column"::text) LIKE UPPER('%term%'). A leading wildcard cannot use a
+B-tree index, but a GIN index with gin_trgm_ops on the same UPPER(...)
+expression can, so trigram_indexes() creates exactly that expression index
+for each searched column.
+
+The indexes are created CONCURRENTLY (the migration must set atomic = False)
+and only on PostgreSQL; other databases skip them.
+"""
+from django.db import migrations
+
+TRIGRAM_OPCLASS = 'gin_trgm_ops'
+
+
+def trigram_index_name(table, column):
+    return f'{table}_{column}_trgm'[:63]
+
+
+def trigram_indexes(table, columns):
+    """RunPython operation creating/dropping trigram indexes on table.columns"""
+
+    def create(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        quote = schema_editor.quote_name
+        for column in columns:
+            schema_editor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(trigram_index_name(table, column))} '
+                f'ON {quote(table)} USING gin (UPPER({quote(column)}::text) {TRIGRAM_OPCLASS})'
+            )
+
+    def drop(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for column in columns:
+            schema_editor.execute(
+                f'DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(trigram_index_name(table, column))}'
+            )
+
+    return migrations.RunPython(create, drop, atomic=False)
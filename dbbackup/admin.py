@@ -8,15 +8,25 @@ from django.contrib.auth import get_user_model
 from django.http import HttpResponseRedirect
 import pytz
 from datetime import datetime
-from .models import BackupHistory, BackupSchedule
-from .views import backup_view, restore_view, progress_api, download_backup, delete_backup
-from .utils import thai_datetime, get_postgresql_version
+from core.admin_mixins import EstimatedCountMixin, QueryBudgetMixin
+from .models import BackupHistory, BackupSchedule, RestoreHistory
+from .views import (
+    backup_view,
+    restore_view,
+    progress_api,
+    progress_stream,
+    restore_progress_api,
+    restore_progress_stream,
+    download_backup,
+    delete_backup,
+)
+from .utils import thai_datetime, get_postgresql_version, backup_filename, remove_backup
 
 User = get_user_model()
 
 
 @admin.register(BackupHistory)
-class BackupHistoryAdmin(admin.ModelAdmin):
+class BackupHistoryAdmin(EstimatedCountMixin, QueryBudgetMixin, admin.ModelAdmin):
     """Admin for BackupHistory model"""
     
     list_display = (
@@ -25,21 +35,26 @@ class BackupHistoryAdmin(admin.ModelAdmin):
         'file_size_display', 
         'postgresql_version',
         'backup_type',
+        'backup_format',
         'status',
         'progress_display',
+        'duration_display',
         'download_button',
         'restore_button',
         'created_by_display',
         'created_at_thai'
     )
-    list_filter = ('environment', 'backup_type', 'status', 'created_at')
+    list_select_related = ('created_by',)
+    list_filter = ('environment', 'backup_type', 'backup_format', 'status', 'created_at')
     search_fields = ('filename', 'notes')
     readonly_fields = (
         'created_at_thai', 
         'created_by_display', 
         'file_size_display',
         'file_exists_display',
-        'progress_display'
+        'progress_display',
+        'duration_display',
+        'throughput_display'
     )
     ordering = ['-created_at']
     
@@ -53,7 +68,11 @@ class BackupHistoryAdmin(admin.ModelAdmin):
             'fields': ('filename', 'environment', 'backup_type', 'status', 'progress_display')
         }),
         ('รายละเอียดไฟล์', {
-            'fields': ('file_size_display', 'postgresql_version', 'file_exists_display'),
+            'fields': ('backup_format', 'compression', 'compression_level', 'jobs', 'file_size_display', 'postgresql_version', 'file_exists_display'),
+            'classes': ('collapse',)
+        }),
+        ('ประสิทธิภาพ', {
+            'fields': ('duration_display', 'throughput_display'),
             'classes': ('collapse',)
         }),
         ('ข้อมูลการจัดการ', {
@@ -70,6 +89,9 @@ class BackupHistoryAdmin(admin.ModelAdmin):
             path('backup/', backup_view, name='backup_database'),
             path('restore/', restore_view, name='restore_database'),
             path('progress/<int:backup_id>/', progress_api, name='backup_progress'),
+            path('progress/<int:backup_id>/stream/', progress_stream, name='backup_progress_stream'),
+            path('restore/<int:restore_id>/', restore_progress_api, name='restore_progress'),
+            path('restore/<int:restore_id>/stream/', restore_progress_stream, name='restore_progress_stream'),
             path('<int:backup_id>/download/', download_backup, name='download_backup'),
             path('<int:backup_id>/delete/', delete_backup, name='delete_backup'),
         ]
@@ -80,15 +102,26 @@ class BackupHistoryAdmin(admin.ModelAdmin):
         return obj.file_size_display
     file_size_display.short_description = 'ขนาดไฟล์'
     
+    def duration_display(self, obj):
+        return obj.duration_display
+    duration_display.short_description = 'เวลาที่ใช้'
+    
+    def throughput_display(self, obj):
+        return obj.throughput_display
+    throughput_display.short_description = 'ความเร็ว'
+    
     def progress_display(self, obj):
         """แสดง progress bar"""
         if obj.status == 'in_progress':
             return format_html(
                 '<div class="progress-bar" style="width: 200px; background-color: #f0f0f0; border-radius: 3px;">'
                 '<div style="width: {}%; background-color: #4CAF50; height: 20px; border-radius: 3px; text-align: center; color: white; line-height: 20px;">{}%</div>'
-                '</div>',
+                '</div>'
+                '<div style="font-size: 11px; color: #666;">{} {}</div>',
                 obj.progress,
-                obj.progress
+                obj.progress,
+                obj.current_table,
+                obj.eta_display
             )
         elif obj.status == 'completed':
             return format_html('<span style="color: green;">✓ เสร็จสิ้น</span>')
@@ -146,8 +179,9 @@ class BackupHistoryAdmin(admin.ModelAdmin):
             from datetime import datetime
             
             pg_version = get_postgresql_version()
-            timestamp = datetime.now().strftime('%y%m%d_%H%M')
-            filename = f'bk_{timestamp}_pg{pg_version}_loc.sql'
+            filename = backup_filename(
+                'local', pg_version, BackupHistory.DEFAULT_FORMAT, BackupHistory.DEFAULT_COMPRESSION, now=datetime.now()
+            )
             
             backup_history = BackupHistory.objects.create(
                 filename=filename,
@@ -160,11 +194,7 @@ class BackupHistoryAdmin(admin.ModelAdmin):
                 notes='Manual backup from admin action'
             )
             
-            def progress_callback(progress):
-                backup_history.progress = progress
-                backup_history.save()
-            
-            success = run_pg_dump(backup_history, progress_callback)
+            success = run_pg_dump(backup_history)
             
             if success:
                 messages.success(request, f'Backup local สำเร็จ: {filename}')
@@ -183,8 +213,9 @@ class BackupHistoryAdmin(admin.ModelAdmin):
             from datetime import datetime
             
             pg_version = get_postgresql_version()
-            timestamp = datetime.now().strftime('%y%m%d_%H%M')
-            filename = f'bk_{timestamp}_pg{pg_version}_pro.sql'
+            filename = backup_filename(
+                'production', pg_version, BackupHistory.DEFAULT_FORMAT, BackupHistory.DEFAULT_COMPRESSION, now=datetime.now()
+            )
             
             backup_history = BackupHistory.objects.create(
                 filename=filename,
@@ -197,11 +228,7 @@ class BackupHistoryAdmin(admin.ModelAdmin):
                 notes='Manual backup from admin action'
             )
             
-            def progress_callback(progress):
-                backup_history.progress = progress
-                backup_history.save()
-            
-            success = run_pg_dump(backup_history, progress_callback)
+            success = run_pg_dump(backup_history)
             
             if success:
                 messages.success(request, f'Backup production สำเร็จ: {filename}')
@@ -232,8 +259,7 @@ class BackupHistoryAdmin(admin.ModelAdmin):
         for backup in queryset:
             try:
                 if backup.file_exists:
-                    import os
-                    os.remove(backup.file_path)
+                    remove_backup(backup.file_path)
                 backup.delete()
                 count += 1
             except Exception as e:
@@ -265,8 +291,48 @@ class BackupHistoryAdmin(admin.ModelAdmin):
         return super().changelist_view(request, extra_context=extra_context)
 
 
+
+@admin.register(RestoreHistory)
+class RestoreHistoryAdmin(EstimatedCountMixin, QueryBudgetMixin, admin.ModelAdmin):
+    """Admin for RestoreHistory model (อ่านอย่างเดียว แถวถูกสร้างจากหน้า restore)"""
+    
+    list_display = (
+        '__str__',
+        'environment',
+        'mode',
+        'jobs',
+        'status',
+        'progress',
+        'created_by_display',
+        'created_at_thai'
+    )
+    list_select_related = ('created_by',)
+    list_filter = ('environment', 'mode', 'status', 'created_at')
+    search_fields = ('backup_file', 'notes')
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def created_by_display(self, obj):
+        if obj.created_by:
+            full_name = obj.created_by.get_full_name()
+            if full_name:
+                return f"{full_name} ({obj.created_by.username})"
+            return obj.created_by.username
+        return "-"
+    created_by_display.short_description = 'ผู้สร้าง'
+    
+    def created_at_thai(self, obj):
+        return thai_datetime(obj.created_at)
+    created_at_thai.short_description = 'วันที่สร้าง'
+
+
 @admin.register(BackupSchedule)
-class BackupScheduleAdmin(admin.ModelAdmin):
+class BackupScheduleAdmin(EstimatedCountMixin, admin.ModelAdmin):
     """Admin for BackupSchedule model"""
     
     list_display = (
@@ -274,6 +340,7 @@ class BackupScheduleAdmin(admin.ModelAdmin):
         'environment', 
         'schedule_type', 
         'time', 
+        'backup_format',
         'is_active',
         'last_run_thai',
         'next_run_display'
@@ -292,6 +359,9 @@ class BackupScheduleAdmin(admin.ModelAdmin):
         ('ข้อมูล Schedule', {
             'fields': ('name', 'environment', 'schedule_type', 'time', 'is_active')
         }),
+        ('รูปแบบไฟล์ Backup', {
+            'fields': ('backup_format', 'compression', 'compression_level', 'jobs')
+        }),
         ('ข้อมูลการจัดการ', {
             'fields': ('next_run_display', 'created_at_thai', 'created_by_display'),
             'classes': ('collapse',)
@@ -1,7 +1,7 @@
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from dbbackup.models import BackupSchedule, BackupHistory
-from dbbackup.utils import get_postgresql_version, run_pg_dump
+from dbbackup.utils import get_postgresql_version, backup_filename, run_pg_dump
 import pytz
 from datetime import datetime, timedelta
 
@@ -101,15 +101,21 @@ def run_scheduled_backup(schedule, now):
         # Get PostgreSQL version
         pg_version = get_postgresql_version()
         
-        # Create filename with timestamp and version (shorter format)
-        timestamp = now.strftime('%y%m%d_%H%M')
-        filename = f'bk_{timestamp}_pg{pg_version}_{schedule.environment[:3]}_sch.sql'
+        # Create filename with timestamp, version and format extension
+        filename = backup_filename(
+            schedule.environment, pg_version, schedule.backup_format, schedule.compression,
+            now=now, suffix='_sch'
+        )
         
         # Create BackupHistory record
         backup_history = BackupHistory.objects.create(
             filename=filename,
             environment=schedule.environment,
             postgresql_version=pg_version,
+            backup_format=schedule.backup_format,
+            compression=schedule.compression,
+            compression_level=schedule.compression_level,
+            jobs=schedule.jobs,
             backup_type='scheduled',
             status='in_progress',
             progress=0,
@@ -117,20 +123,19 @@ def run_scheduled_backup(schedule, now):
             notes=f'Scheduled backup: {schedule.name}'
         )
         
-        # Progress callback function
-        def progress_callback(progress):
-            backup_history.progress = progress
-            backup_history.save()
-        
         # Run pg_dump
-        success = run_pg_dump(backup_history, progress_callback)
+        success = run_pg_dump(backup_history)
         
         if success:
             # Update schedule last_run
             schedule.last_run = now
             schedule.save()
             
-            print(f'Scheduled backup completed: {filename}')
+            print(
+                f'Scheduled backup completed: {filename} '
+                f'({backup_history.file_size_display} in {backup_history.duration_display}, '
+                f'{backup_history.throughput_display})'
+            )
         else:
             print(f'Scheduled backup failed: {backup_history.notes}')
             
@@ -1,7 +1,13 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from dbbackup.models import BackupHistory
-from dbbackup.utils import get_postgresql_version, run_pg_dump
+from dbbackup.utils import (
+    get_postgresql_version,
+    backup_filename,
+    parse_compression,
+    validate_backup_options,
+    run_pg_dump,
+)
 from datetime import datetime
 import os
 
@@ -29,11 +35,38 @@ class Command(BaseCommand):
             type=str,
             help='Notes for the backup'
         )
+        parser.add_argument(
+            '--format',
+            type=str,
+            choices=[value for value, _ in BackupHistory.FORMAT_CHOICES],
+            default=BackupHistory.DEFAULT_FORMAT,
+            help='pg_dump format: plain (psql), custom (-Fc) or directory (-Fd)'
+        )
+        parser.add_argument(
+            '--compress',
+            type=str,
+            default=BackupHistory.DEFAULT_COMPRESSION,
+            help='Compression as method[:level], e.g. gzip:6, zstd:3, lz4 or none'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Parallel pg_dump jobs (-j, directory format only)'
+        )
 
     def handle(self, *args, **options):
         environment = options['env']
         user_id = options.get('user_id')
         notes = options.get('notes', '')
+        backup_format = options['format']
+        jobs = options['jobs']
+
+        try:
+            compression, compression_level = parse_compression(options['compress'])
+            validate_backup_options(backup_format, compression, compression_level, jobs=jobs)
+        except ValueError as e:
+            raise CommandError(str(e))
 
         # Get user if provided
         user = None
@@ -49,15 +82,18 @@ class Command(BaseCommand):
         pg_version = get_postgresql_version()
         self.stdout.write(f'PostgreSQL Version: {pg_version}')
 
-        # Create filename with timestamp and version (shorter format)
-        timestamp = datetime.now().strftime('%y%m%d_%H%M')
-        filename = f'bk_{timestamp}_pg{pg_version}_{environment[:3]}.sql'
+        # Create filename with timestamp, version and format extension
+        filename = backup_filename(environment, pg_version, backup_format, compression, now=datetime.now())
 
         # Create BackupHistory record
         backup_history = BackupHistory.objects.create(
             filename=filename,
             environment=environment,
             postgresql_version=pg_version,
+            backup_format=backup_format,
+            compression=compression,
+            compression_level=compression_level,
+            jobs=jobs,
             backup_type='manual',
             status='in_progress',
             progress=0,
@@ -67,13 +103,17 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Starting backup: {filename}')
         self.stdout.write(f'Environment: {environment}')
+        self.stdout.write(f'Format: {backup_format}, compression: {options["compress"]}, jobs: {jobs}')
         self.stdout.write(f'Status: {backup_history.status}')
 
-        # Progress callback function
+        # Progress callback function (แสดงผลเท่านั้น run_pg_dump บันทึก progress เอง)
         def progress_callback(progress):
-            backup_history.progress = progress
-            backup_history.save()
-            self.stdout.write(f'Progress: {progress}%')
+            line = f'Progress: {progress}%'
+            if backup_history.current_table:
+                line += f' - {backup_history.current_table}'
+            if backup_history.eta_seconds is not None:
+                line += f' (ETA {backup_history.eta_display})'
+            self.stdout.write(line)
 
         # Run pg_dump
         success = run_pg_dump(backup_history, progress_callback)
@@ -83,6 +123,8 @@ class Command(BaseCommand):
                 self.style.SUCCESS(f'Backup completed successfully: {filename}')
             )
             self.stdout.write(f'File size: {backup_history.file_size_display}')
+            self.stdout.write(f'Wall time: {backup_history.duration_display}')
+            self.stdout.write(f'Throughput: {backup_history.throughput_display}')
         else:
             self.stdout.write(
                 self.style.ERROR(f'Backup failed: {backup_history.notes}')
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
-from dbbackup.utils import run_pg_restore, get_backup_files
+from dbbackup.utils import run_pg_restore, get_backup_files, detect_backup_format, validate_jobs
 import os
 
 User = get_user_model()
@@ -30,6 +30,12 @@ class Command(BaseCommand):
             default='safe',
             help='Restore mode: safe (default) or drop'
         )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Parallel pg_restore jobs (-j, custom/directory format only)'
+        )
         parser.add_argument(
             '--confirm',
             action='store_true',
@@ -41,13 +47,21 @@ class Command(BaseCommand):
         environment = options['env']
         mode = options['mode']
         confirm = options['confirm']
+        jobs = options['jobs']
 
         # Validate backup file
         if not os.path.exists(backup_file):
             raise CommandError(f'Backup file not found: {backup_file}')
 
-        if not backup_file.endswith('.sql'):
-            raise CommandError('Backup file must be a .sql file')
+        try:
+            backup_format, _ = detect_backup_format(backup_file)
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        tool = 'psql' if backup_format == 'plain' else f'pg_restore -j {jobs}'
+        try:
+            validate_jobs(jobs)
+        except ValueError as e:
+            raise CommandError(str(e))
 
         # Show warning for drop mode
         if mode == 'drop':
@@ -78,6 +92,7 @@ class Command(BaseCommand):
         # Final confirmation
         if not confirm:
             self.stdout.write(f'Backup file: {backup_file}')
+            self.stdout.write(f'Format: {backup_format} (restore with {tool})')
             self.stdout.write(f'Environment: {environment}')
             self.stdout.write(f'Mode: {mode}')
             response = input('Proceed with restore? (yes/no): ')
@@ -86,11 +101,18 @@ class Command(BaseCommand):
                 return
 
         self.stdout.write(f'Starting restore from: {backup_file}')
+        self.stdout.write(f'Format: {backup_format} (restore with {tool})')
         self.stdout.write(f'Environment: {environment}')
         self.stdout.write(f'Mode: {mode}')
 
+        def progress_callback(snapshot):
+            line = f"Progress: {snapshot['progress']}%"
+            if snapshot['current_table']:
+                line += f" - {snapshot['current_table']}"
+            self.stdout.write(line)
+
         # Run restore
-        success, message = run_pg_restore(backup_file, environment, mode)
+        success, message = run_pg_restore(backup_file, environment, mode, jobs, progress_callback)
 
         if success:
             self.stdout.write(
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:59
+
+from django.db import migrations, models
+
+
+def keep_existing_plain(apps, schema_editor):
+    # Existing .sql files and schedules were plain, uncompressed dumps
+    for name in ('BackupHistory', 'BackupSchedule'):
+        apps.get_model('dbbackup', name).objects.update(backup_format='plain', compression='none')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbbackup', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backuphistory',
+            name='backup_format',
+            field=models.CharField(choices=[('plain', 'Plain SQL (psql)'), ('custom', 'Custom -Fc (pg_restore)'), ('directory', 'Directory -Fd (pg_restore)')], default='custom', help_text='Plain SQL restore ด้วย psql, Custom/Directory restore ด้วย pg_restore', max_length=20, verbose_name='รูปแบบไฟล์'),
+        ),
+        migrations.AddField(
+            model_name='backuphistory',
+            name='compression',
+            field=models.CharField(choices=[('none', 'ไม่บีบอัด'), ('gzip', 'gzip'), ('lz4', 'lz4 (pg_dump 16 ขึ้นไป)'), ('zstd', 'zstd (pg_dump 16 ขึ้นไป)')], default='gzip', help_text='วิธีบีบอัดของ pg_dump', max_length=20, verbose_name='การบีบอัด'),
+        ),
+        migrations.AddField(
+            model_name='backuphistory',
+            name='compression_level',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='gzip 1-9, lz4 1-12, zstd 1-22 (ว่าง = ค่าเริ่มต้นของ pg_dump)', null=True, verbose_name='ระดับการบีบอัด'),
+        ),
+        migrations.AddField(
+            model_name='backupschedule',
+            name='backup_format',
+            field=models.CharField(choices=[('plain', 'Plain SQL (psql)'), ('custom', 'Custom -Fc (pg_restore)'), ('directory', 'Directory -Fd (pg_restore)')], default='custom', help_text='Plain SQL restore ด้วย psql, Custom/Directory restore ด้วย pg_restore', max_length=20, verbose_name='รูปแบบไฟล์'),
+        ),
+        migrations.AddField(
+            model_name='backupschedule',
+            name='compression',
+            field=models.CharField(choices=[('none', 'ไม่บีบอัด'), ('gzip', 'gzip'), ('lz4', 'lz4 (pg_dump 16 ขึ้นไป)'), ('zstd', 'zstd (pg_dump 16 ขึ้นไป)')], default='gzip', help_text='วิธีบีบอัดของ pg_dump', max_length=20, verbose_name='การบีบอัด'),
+        ),
+        migrations.AddField(
+            model_name='backupschedule',
+            name='compression_level',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='gzip 1-9, lz4 1-12, zstd 1-22 (ว่าง = ค่าเริ่มต้นของ pg_dump)', null=True, verbose_name='ระดับการบีบอัด'),
+        ),
+        migrations.RunPython(keep_existing_plain, migrations.RunPython.noop),
+    ]
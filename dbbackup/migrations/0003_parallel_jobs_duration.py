@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbbackup', '0002_backup_format_compression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backuphistory',
+            name='duration',
+            field=models.FloatField(blank=True, help_text='เวลาที่ใช้ทั้งหมดเป็นวินาที (รวมการรวมไฟล์เป็น tar)', null=True, verbose_name='เวลาที่ใช้'),
+        ),
+        migrations.AddField(
+            model_name='backuphistory',
+            name='jobs',
+            field=models.PositiveSmallIntegerField(default=1, help_text='จำนวน job ขนาน (-j) ของ pg_dump ใช้ได้กับ Directory format เท่านั้น', verbose_name='จำนวน worker'),
+        ),
+        migrations.AddField(
+            model_name='backupschedule',
+            name='jobs',
+            field=models.PositiveSmallIntegerField(default=1, help_text='จำนวน job ขนาน (-j) ของ pg_dump ใช้ได้กับ Directory format เท่านั้น', verbose_name='จำนวน worker'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbbackup', '0003_parallel_jobs_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backuphistory',
+            name='current_table',
+            field=models.CharField(blank=True, default='', help_text='ตารางที่ pg_dump กำลัง dump อยู่', max_length=255, verbose_name='ตารางปัจจุบัน'),
+        ),
+        migrations.AddField(
+            model_name='backuphistory',
+            name='eta_seconds',
+            field=models.PositiveIntegerField(blank=True, help_text='เวลาที่คาดว่าจะเหลือเป็นวินาที', null=True, verbose_name='เวลาที่เหลือ'),
+        ),
+    ]
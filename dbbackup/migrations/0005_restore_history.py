@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dbbackup', '0004_dump_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestoreHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('backup_file', models.CharField(help_text='Path ของไฟล์ที่ restore', max_length=500, verbose_name='ไฟล์ backup')),
+                ('environment', models.CharField(choices=[('local', 'Local'), ('production', 'Production')], help_text='Local หรือ Production', max_length=20, verbose_name='Environment')),
+                ('mode', models.CharField(choices=[('safe', 'Safe (ไม่ลบข้อมูลเดิม)'), ('drop', 'Drop (ลบข้อมูลเดิมก่อน)')], default='safe', max_length=20, verbose_name='โหมด')),
+                ('jobs', models.PositiveSmallIntegerField(default=1, help_text='จำนวน job ขนาน (-j) ของ pg_restore', verbose_name='จำนวน worker')),
+                ('status', models.CharField(choices=[('in_progress', 'In Progress'), ('completed', 'Completed'), ('failed', 'Failed')], default='in_progress', help_text='สถานะการ restore', max_length=20, verbose_name='สถานะ')),
+                ('progress', models.PositiveIntegerField(default=0, help_text='เปอร์เซ็นต์ความคืบหน้า (0-100)', verbose_name='ความคืบหน้า')),
+                ('current_table', models.CharField(blank=True, default='', help_text='ตารางที่ pg_restore กำลัง restore อยู่', max_length=255, verbose_name='ตารางปัจจุบัน')),
+                ('eta_seconds', models.PositiveIntegerField(blank=True, help_text='เวลาที่คาดว่าจะเหลือเป็นวินาที', null=True, verbose_name='เวลาที่เหลือ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='วันที่สร้าง')),
+                ('notes', models.TextField(blank=True, help_text='ข้อความผลลัพธ์ของ restore', null=True, verbose_name='หมายเหตุ')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_restores', to=settings.AUTH_USER_MODEL, verbose_name='ผู้สร้าง')),
+            ],
+            options={
+                'verbose_name': 'ประวัติการ Restore',
+                'verbose_name_plural': 'ประวัติการ Restore',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
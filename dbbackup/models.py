@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from .utils import format_duration, throughput_display, validate_backup_options
 import os
 
 User = get_user_model()
@@ -25,6 +27,22 @@ class BackupHistory(models.Model):
         ('failed', _('Failed')),
     ]
     
+    FORMAT_CHOICES = [
+        ('plain', _('Plain SQL (psql)')),
+        ('custom', _('Custom -Fc (pg_restore)')),
+        ('directory', _('Directory -Fd (pg_restore)')),
+    ]
+    
+    COMPRESSION_CHOICES = [
+        ('none', _('ไม่บีบอัด')),
+        ('gzip', _('gzip')),
+        ('lz4', _('lz4 (pg_dump 16 ขึ้นไป)')),
+        ('zstd', _('zstd (pg_dump 16 ขึ้นไป)')),
+    ]
+    
+    DEFAULT_FORMAT = 'custom'
+    DEFAULT_COMPRESSION = 'gzip'
+    
     filename = models.CharField(
         _("ชื่อไฟล์"),
         max_length=255,
@@ -55,6 +73,37 @@ class BackupHistory(models.Model):
         default='manual',
         help_text=_("Manual หรือ Scheduled")
     )
+    backup_format = models.CharField(
+        _("รูปแบบไฟล์"),
+        max_length=20,
+        choices=FORMAT_CHOICES,
+        default=DEFAULT_FORMAT,
+        help_text=_("Plain SQL restore ด้วย psql, Custom/Directory restore ด้วย pg_restore")
+    )
+    compression = models.CharField(
+        _("การบีบอัด"),
+        max_length=20,
+        choices=COMPRESSION_CHOICES,
+        default=DEFAULT_COMPRESSION,
+        help_text=_("วิธีบีบอัดของ pg_dump")
+    )
+    compression_level = models.PositiveSmallIntegerField(
+        _("ระดับการบีบอัด"),
+        blank=True,
+        null=True,
+        help_text=_("gzip 1-9, lz4 1-12, zstd 1-22 (ว่าง = ค่าเริ่มต้นของ pg_dump)")
+    )
+    jobs = models.PositiveSmallIntegerField(
+        _("จำนวน worker"),
+        default=1,
+        help_text=_("จำนวน job ขนาน (-j) ของ pg_dump ใช้ได้กับ Directory format เท่านั้น")
+    )
+    duration = models.FloatField(
+        _("เวลาที่ใช้"),
+        blank=True,
+        null=True,
+        help_text=_("เวลาที่ใช้ทั้งหมดเป็นวินาที (รวมการรวมไฟล์เป็น tar)")
+    )
     status = models.CharField(
         _("สถานะ"),
         max_length=20,
@@ -67,6 +116,19 @@ class BackupHistory(models.Model):
         default=0,
         help_text=_("เปอร์เซ็นต์ความคืบหน้า (0-100)")
     )
+    current_table = models.CharField(
+        _("ตารางปัจจุบัน"),
+        max_length=255,
+        blank=True,
+        default='',
+        help_text=_("ตารางที่ pg_dump กำลัง dump อยู่")
+    )
+    eta_seconds = models.PositiveIntegerField(
+        _("เวลาที่เหลือ"),
+        blank=True,
+        null=True,
+        help_text=_("เวลาที่คาดว่าจะเหลือเป็นวินาที")
+    )
     created_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -107,6 +169,25 @@ class BackupHistory(models.Model):
             size /= 1024.0
         return f"{size:.1f} PB"
     
+    @property
+    def duration_display(self):
+        """เวลาที่ใช้ เช่น '2 นาที 5 วินาที'"""
+        if self.duration is None:
+            return "-"
+        return format_duration(self.duration)
+    
+    @property
+    def eta_display(self):
+        """เวลาที่คาดว่าจะเหลือ"""
+        if self.eta_seconds is None:
+            return ""
+        return format_duration(self.eta_seconds)
+    
+    @property
+    def throughput_display(self):
+        """ความเร็วในการเขียน backup (bytes ของไฟล์ต่อวินาที)"""
+        return throughput_display(self.file_size, self.duration) or "-"
+    
     @property
     def file_path(self):
         """Path ของไฟล์ backup"""
@@ -121,6 +202,96 @@ class BackupHistory(models.Model):
         return os.path.exists(self.file_path)
 
 
+
+class RestoreHistory(models.Model):
+    """Restore History Model (สถานะของ restore ที่ทุก process อ่านได้)"""
+    
+    MODE_CHOICES = [
+        ('safe', _('Safe (ไม่ลบข้อมูลเดิม)')),
+        ('drop', _('Drop (ลบข้อมูลเดิมก่อน)')),
+    ]
+    
+    backup_file = models.CharField(
+        _("ไฟล์ backup"),
+        max_length=500,
+        help_text=_("Path ของไฟล์ที่ restore")
+    )
+    environment = models.CharField(
+        _("Environment"),
+        max_length=20,
+        choices=BackupHistory.ENVIRONMENT_CHOICES,
+        help_text=_("Local หรือ Production")
+    )
+    mode = models.CharField(
+        _("โหมด"),
+        max_length=20,
+        choices=MODE_CHOICES,
+        default='safe'
+    )
+    jobs = models.PositiveSmallIntegerField(
+        _("จำนวน worker"),
+        default=1,
+        help_text=_("จำนวน job ขนาน (-j) ของ pg_restore")
+    )
+    status = models.CharField(
+        _("สถานะ"),
+        max_length=20,
+        choices=BackupHistory.STATUS_CHOICES,
+        default='in_progress',
+        help_text=_("สถานะการ restore")
+    )
+    progress = models.PositiveIntegerField(
+        _("ความคืบหน้า"),
+        default=0,
+        help_text=_("เปอร์เซ็นต์ความคืบหน้า (0-100)")
+    )
+    current_table = models.CharField(
+        _("ตารางปัจจุบัน"),
+        max_length=255,
+        blank=True,
+        default='',
+        help_text=_("ตารางที่ pg_restore กำลัง restore อยู่")
+    )
+    eta_seconds = models.PositiveIntegerField(
+        _("เวลาที่เหลือ"),
+        blank=True,
+        null=True,
+        help_text=_("เวลาที่คาดว่าจะเหลือเป็นวินาที")
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='created_restores',
+        blank=True,
+        null=True,
+        verbose_name=_("ผู้สร้าง")
+    )
+    created_at = models.DateTimeField(
+        _("วันที่สร้าง"),
+        auto_now_add=True
+    )
+    notes = models.TextField(
+        _("หมายเหตุ"),
+        blank=True,
+        null=True,
+        help_text=_("ข้อความผลลัพธ์ของ restore")
+    )
+    
+    class Meta:
+        verbose_name = _("ประวัติการ Restore")
+        verbose_name_plural = _("ประวัติการ Restore")
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{os.path.basename(self.backup_file)} ({self.environment})"
+    
+    @property
+    def eta_display(self):
+        """เวลาที่คาดว่าจะเหลือ"""
+        if self.eta_seconds is None:
+            return ""
+        return format_duration(self.eta_seconds)
+
 class BackupSchedule(models.Model):
     """Backup Schedule Model"""
     
@@ -162,6 +333,31 @@ class BackupSchedule(models.Model):
         default=True,
         help_text=_("เปิด/ปิดใช้งาน schedule นี้")
     )
+    backup_format = models.CharField(
+        _("รูปแบบไฟล์"),
+        max_length=20,
+        choices=BackupHistory.FORMAT_CHOICES,
+        default=BackupHistory.DEFAULT_FORMAT,
+        help_text=_("Plain SQL restore ด้วย psql, Custom/Directory restore ด้วย pg_restore")
+    )
+    compression = models.CharField(
+        _("การบีบอัด"),
+        max_length=20,
+        choices=BackupHistory.COMPRESSION_CHOICES,
+        default=BackupHistory.DEFAULT_COMPRESSION,
+        help_text=_("วิธีบีบอัดของ pg_dump")
+    )
+    compression_level = models.PositiveSmallIntegerField(
+        _("ระดับการบีบอัด"),
+        blank=True,
+        null=True,
+        help_text=_("gzip 1-9, lz4 1-12, zstd 1-22 (ว่าง = ค่าเริ่มต้นของ pg_dump)")
+    )
+    jobs = models.PositiveSmallIntegerField(
+        _("จำนวน worker"),
+        default=1,
+        help_text=_("จำนวน job ขนาน (-j) ของ pg_dump ใช้ได้กับ Directory format เท่านั้น")
+    )
     last_run = models.DateTimeField(
         _("รันครั้งล่าสุด"),
         blank=True,
@@ -193,6 +389,15 @@ class BackupSchedule(models.Model):
     def __str__(self):
         return f"{self.name} ({self.environment}) - {self.schedule_type}"
     
+    def clean(self):
+        """ตรวจสอบว่า pg_dump รองรับการบีบอัดและจำนวน worker ที่เลือก"""
+        try:
+            validate_backup_options(
+                self.backup_format, self.compression, self.compression_level, jobs=self.jobs
+            )
+        except ValueError as e:
+            raise ValidationError(str(e))
+    
     @property
     def next_run_display(self):
         """แสดงเวลาที่จะรันครั้งถัดไป"""
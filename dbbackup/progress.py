@@ -0,0 +1,259 @@
+"""
+ความคืบหน้าจริงของ pg_dump จาก stderr ของ --verbose
+
+pg_dump พิมพ์ 'dumping contents of table "public.x"' เมื่อเริ่ม dump ข้อมูลของ
+แต่ละตาราง (และ 'finished item N TABLE DATA x' เมื่อจบ ในโหมด -j) DumpProgress
+ใช้ขนาดของแต่ละตารางจาก pg_class เป็นน้ำหนัก เปอร์เซ็นต์จึงเป็นสัดส่วนของ bytes
+ที่ dump ไปแล้ว ไม่ใช่จำนวนตาราง และ ETA มาจากความเร็วที่วัดได้จริง
+
+stderr ต้องถูกอ่านตลอดเวลาที่ pg_dump ทำงาน (StderrReader) ไม่เช่นนั้น pipe
+จะเต็มและ pg_dump จะหยุดรอ
+
+RestoreProgress ทำแบบเดียวกันกับ 'processing data for table' ของ pg_restore
+--verbose โดยให้น้ำหนักทุกตารางเท่ากันตามรายการ TABLE DATA ใน pg_restore -l
+
+ระหว่าง dump ความคืบหน้าถูกส่งผ่าน ProgressChannel: เขียนลง cache ทุกครั้งที่
+เปลี่ยน และ UPDATE เฉพาะคอลัมน์ progress ลงแถว BackupHistory ไม่เกินทุก
+BACKUP_PROGRESS_DB_INTERVAL วินาที (สำหรับ process ที่มองไม่เห็น cache เดียวกัน
+เช่น locmem) แถวเต็มถูก save() ครั้งเดียวตอนจบ restore ใช้ช่องทางเดียวกันกับแถว
+RestoreHistory
+"""
+import re
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# pg_dump 11+: "public.products"; รุ่นเก่ากว่าไม่มี schema และไม่มี quote
+TABLE_STARTED_RE = re.compile(r'dumping contents of table "?(?P<table>[^"]+)"?$')
+TABLE_FINISHED_RE = re.compile(r'finished item \d+ TABLE DATA (?P<table>\S+)')
+RESTORE_STARTED_RE = re.compile(r'processing data for table "?(?P<table>[^"]+)"?$')
+# pg_restore -l: "3012; 0 16390 TABLE DATA public products_product app"
+TOC_TABLE_DATA_RE = re.compile(r'^\d+; \d+ \d+ TABLE DATA (?P<schema>\S+) (?P<table>\S+) ')
+
+# ช่วงท้าย (ข้อมูล post-data, index, รวมไฟล์เป็น tar) ยังไม่นับว่าเสร็จ
+MAX_RUNNING_PROGRESS = 99
+
+# สถานะระหว่าง dump อยู่ใน cache ได้นานเท่า backup ที่ยาวที่สุด, สถานะสุดท้ายแค่ให้หน้าเว็บอ่านทัน
+PROGRESS_CACHE_TIMEOUT = 12 * 60 * 60
+FINAL_STATE_TIMEOUT = 5 * 60
+PROGRESS_FIELDS = ('progress', 'current_table', 'eta_seconds')
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+def format_duration(seconds):
+    """'2 นาที 5 วินาที' หรือ '4.2 วินาที'"""
+    minutes, seconds = divmod(seconds, 60)
+    if minutes:
+        return f"{int(minutes)} นาที {seconds:.0f} วินาที"
+    return f"{seconds:.1f} วินาที"
+
+
+def table_sizes(using=DEFAULT_DB_ALIAS):
+    """
+    {'schema.table': bytes} ของทุกตารางที่ pg_dump จะ dump ข้อมูล
+
+    ใช้ pg_table_size (heap + TOAST) ไม่ใช่ pg_total_relation_size เพราะ pg_dump
+    ไม่ได้ dump ข้อมูลของ index ({} ถ้าไม่ใช่ PostgreSQL)
+    """
+    conn = connections[using]
+    if conn.vendor != 'postgresql':
+        return {}
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT n.nspname, c.relname, pg_table_size(c.oid)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'm')
+              AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+              AND n.nspname NOT LIKE %s
+            """,
+            ['pg_toast%'],
+        )
+        return {f'{schema}.{name}': size for schema, name, size in cursor.fetchall()}
+
+
+def restore_table_weights(toc_lines):
+    """{'schema.table': 1} ของทุก TABLE DATA ในผลของ pg_restore -l"""
+    weights = {}
+    for line in toc_lines:
+        match = TOC_TABLE_DATA_RE.match(line)
+        if match:
+            weights[f"{match.group('schema')}.{match.group('table')}"] = 1
+    return weights
+
+
+class DumpProgress:
+    """แปลงบรรทัด stderr ของ pg_dump --verbose เป็นเปอร์เซ็นต์, ตารางปัจจุบัน และ ETA"""
+
+    started_re = TABLE_STARTED_RE
+    finished_re = TABLE_FINISHED_RE
+
+    def __init__(self, sizes, parallel=False, clock=time.monotonic):
+        # ตารางขนาด 0 ยังนับเป็น 1 byte เพื่อให้ทุกตารางขยับ progress
+        self.sizes = {table: max(size, 1) for table, size in sizes.items()}
+        self.total = sum(self.sizes.values())
+        self.parallel = parallel
+        self.clock = clock
+        self.started_at = None
+        self.running = {}
+        self.done_bytes = 0
+        self.current_table = ''
+        self.lock = threading.Lock()
+
+    def _resolve(self, table):
+        """ชื่อใน sizes ('schema.table') ของชื่อที่ pg_dump พิมพ์"""
+        if table in self.sizes:
+            return table
+        # pg_dump รุ่นเก่าและบรรทัด 'finished item' พิมพ์แค่ชื่อตาราง
+        return next((name for name in self.sizes if name.split('.', 1)[-1] == table), table)
+
+    def _finish(self, table):
+        if self.running.pop(table, None) is not None:
+            self.done_bytes += self.sizes.get(table, 0)
+
+    def feed(self, line):
+        """อ่าน stderr หนึ่งบรรทัด"""
+        line = line.rstrip()
+        with self.lock:
+            match = self.finished_re.search(line)
+            if match:
+                self._finish(self._resolve(match.group('table')))
+                return
+            match = self.started_re.search(line)
+            if not match:
+                return
+            table = self._resolve(match.group('table'))
+            now = self.clock()
+            if self.started_at is None:
+                self.started_at = now
+            if not self.parallel:
+                # dump ทีละตาราง: ตารางใหม่เริ่ม = ตารางก่อนหน้าเสร็จ
+                for previous in list(self.running):
+                    self._finish(previous)
+            self.running[table] = now
+            self.current_table = table
+
+    def snapshot(self):
+        """{'progress', 'current_table', 'eta_seconds'} ณ ตอนนี้"""
+        with self.lock:
+            if not self.total:
+                return {'progress': 0, 'current_table': self.current_table, 'eta_seconds': None}
+            progress = min(int(self.done_bytes * 100 / self.total), MAX_RUNNING_PROGRESS)
+            eta_seconds = None
+            if self.done_bytes and self.started_at is not None:
+                elapsed = self.clock() - self.started_at
+                if elapsed > 0:
+                    rate = self.done_bytes / elapsed
+                    eta_seconds = int((self.total - self.done_bytes) / rate)
+            return {
+                'progress': progress,
+                'current_table': self.current_table,
+                'eta_seconds': eta_seconds,
+            }
+
+
+class RestoreProgress(DumpProgress):
+    """เหมือน DumpProgress แต่อ่าน stderr ของ pg_restore --verbose"""
+
+    started_re = RESTORE_STARTED_RE
+
+
+class StderrReader(threading.Thread):
+    """อ่าน stderr ของ process จนจบใน thread แยก ส่งทุกบรรทัดให้ DumpProgress"""
+
+    def __init__(self, stream, progress, keep_lines=20):
+        super().__init__(daemon=True)
+        self.stream = stream
+        self.progress = progress
+        # เก็บเฉพาะท้าย ๆ ไว้เป็นข้อความ error (verbose output ทั้งหมดยาวมาก)
+        self.tail = deque(maxlen=keep_lines)
+
+    def run(self):
+        for line in self.stream:
+            self.progress.feed(line)
+            self.tail.append(line.rstrip('\n'))
+        self.stream.close()
+
+    def error_output(self):
+        return '\n'.join(self.tail)
+
+
+def progress_cache_key(backup_id):
+    return f'dbbackup:progress:{backup_id}'
+
+
+def progress_state(backup):
+    """สถานะที่ progress_api ส่งกลับ"""
+    return {
+        'status': backup.status,
+        'progress': backup.progress,
+        'current_table': backup.current_table,
+        'eta_seconds': backup.eta_seconds,
+        'eta_display': backup.eta_display,
+        'message': backup.notes or '',
+    }
+
+
+def read_progress(backup_id):
+    """สถานะล่าสุดจาก cache (None ถ้าไม่มี เช่น dump อยู่คนละ process กับ locmem cache)"""
+    return cache.get(progress_cache_key(backup_id))
+
+
+async def aread_progress(backup_id):
+    return await cache.aget(progress_cache_key(backup_id))
+
+
+class ProgressChannel:
+    """ส่งความคืบหน้าของ backup (หรือ restore) หนึ่งรายการไปยัง cache และแถวใน DB แบบประหยัด"""
+
+    def __init__(self, backup_history, db_interval=None, clock=time.monotonic, key=None):
+        self.backup_history = backup_history
+        self.key = key or progress_cache_key(backup_history.pk)
+        if db_interval is None:
+            db_interval = settings.BACKUP_PROGRESS_DB_INTERVAL
+        self.db_interval = db_interval
+        self.clock = clock
+        self.last_db_write = None
+
+    def publish(self, progress, current_table='', eta_seconds=None):
+        backup = self.backup_history
+        backup.progress = progress
+        backup.current_table = current_table
+        backup.eta_seconds = eta_seconds
+        cache.set(self.key, progress_state(backup), PROGRESS_CACHE_TIMEOUT)
+
+        now = self.clock()
+        if self.last_db_write is None or now - self.last_db_write >= self.db_interval:
+            # UPDATE เฉพาะ 3 คอลัมน์ ไม่ผ่าน save() (ไม่มี signal ของ BackupHistory ที่ต้องการ)
+            type(backup).objects.filter(pk=backup.pk).update(
+                **{field: getattr(backup, field) for field in PROGRESS_FIELDS}
+            )
+            self.last_db_write = now
+
+    def finish(self):
+        """บันทึกสถานะสุดท้ายลงแถวครั้งเดียว แล้วเก็บไว้ใน cache ให้ progress_api อีกระยะสั้น ๆ"""
+        self.backup_history.save()
+        cache.set(self.key, progress_state(self.backup_history), FINAL_STATE_TIMEOUT)
+
+
+def restore_cache_key(restore_id):
+    return f'dbbackup:restore:{restore_id}'
+
+
+def restore_channel(restore_history):
+    """ProgressChannel ของแถว RestoreHistory"""
+    return ProgressChannel(restore_history, key=restore_cache_key(restore_history.pk))
+
+
+def read_restore(restore_id):
+    """สถานะล่าสุดของ restore จาก cache (None ถ้าไม่มี ให้อ่านแถว RestoreHistory แทน)"""
+    return cache.get(restore_cache_key(restore_id))
+
+
+async def aread_restore(restore_id):
+    return await cache.aget(restore_cache_key(restore_id))
@@ -1,3 +1,348 @@
-from django.test import TestCase
+import gzip
+import io
+import itertools
+import json
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import ChangelistQueryCountMixin
+
+from .models import BackupHistory, RestoreHistory
+from .progress import (
+    DumpProgress,
+    ProgressChannel,
+    RestoreProgress,
+    StderrReader,
+    read_progress,
+    read_restore,
+    restore_channel,
+    restore_table_weights,
+)
+from .utils import (
+    archive_directory,
+    backup_filename,
+    build_pg_dump_command,
+    build_restore_commands,
+    detect_backup_format,
+    dump_output_path,
+    is_directory_archive,
+    parse_compression,
+    validate_backup_options,
+)
+
+DB_SETTINGS = {'HOST': 'db', 'PORT': 5432, 'USER': 'app', 'NAME': 'shop', 'PASSWORD': 'secret'}
+
+
+class BackupFormatTest(SimpleTestCase):
+    """pg_dump/pg_restore arguments for each format and compression"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_filename_extension(self):
+        self.assertTrue(backup_filename('local', '16.1', 'plain', 'none').endswith('_loc.sql'))
+        self.assertTrue(backup_filename('local', '16.1', 'plain', 'gzip').endswith('.sql.gz'))
+        self.assertTrue(backup_filename('production', '16.1', 'custom', 'zstd', suffix='_sch').endswith('_pro_sch.dump'))
+        self.assertTrue(backup_filename('local', '16.1', 'directory', 'lz4').endswith('.dir.tar'))
+
+    def test_compress_args_follow_pg_dump_version(self):
+        def compress_args(compression, level, version):
+            cmd = build_pg_dump_command(DB_SETTINGS, '/tmp/out', 'custom', compression, level, version)
+            return cmd[cmd.index('c') + 1:cmd.index('-f')]
+
+        self.assertEqual(compress_args('zstd', 3, 16), ['--compress=zstd:3'])
+        self.assertEqual(compress_args('gzip', None, 16), ['--compress=gzip'])
+        self.assertEqual(compress_args('gzip', None, 14), ['-Z', '6'])
+        self.assertEqual(compress_args('none', None, 14), ['-Z', '0'])
+        with self.assertRaises(ValueError):
+            compress_args('lz4', None, 15)
+
+    def test_validate_backup_options(self):
+        validate_backup_options('custom', 'zstd', 19, pg_dump_version=16)
+        self.assertEqual(parse_compression('gzip:9'), ('gzip', 9))
+        validate_backup_options('directory', 'gzip', jobs=8, pg_dump_version=15)
+        for args in (('tar', 'gzip', None), ('custom', 'gzip', 10), ('custom', 'none', 3), ('plain', 'zstd', None)):
+            with self.subTest(args=args), self.assertRaises(ValueError):
+                validate_backup_options(*args, pg_dump_version=15)
+        for backup_format, jobs in (('custom', 4), ('directory', 0), ('directory', 64)):
+            with self.subTest(backup_format=backup_format, jobs=jobs), self.assertRaises(ValueError):
+                validate_backup_options(backup_format, 'gzip', jobs=jobs, pg_dump_version=15)
+
+    def test_parallel_dump_writes_directory_then_tar(self):
+        artifact = os.path.join(self.tmp.name, backup_filename('local', '16.1', 'directory', 'gzip'))
+        output = dump_output_path(artifact, 'directory')
+        self.assertTrue(output.endswith('.dir'))
+        cmd = build_pg_dump_command(DB_SETTINGS, output, 'directory', 'gzip', jobs=4, pg_dump_version=16)
+        self.assertEqual(cmd[cmd.index('-f') + 1], output)
+        self.assertEqual(cmd[cmd.index('-j') + 1], '4')
+
+        os.mkdir(output)
+        self.write(os.path.join(output, 'toc.dat'), b'PGDMP')
+        self.write(os.path.join(output, '3001.dat.gz'), gzip.compress(b'1\tone\n'))
+        archive_directory(output, artifact)
+        self.assertFalse(os.path.exists(output))
+        self.assertTrue(is_directory_archive(artifact))
+        self.assertEqual(detect_backup_format(artifact), ('directory', None))
+
+    def test_detect_format_from_content(self):
+        directory = os.path.join(self.tmp.name, 'bk.dir')
+        os.mkdir(directory)
+        self.write('bk.dir/toc.dat', b'PGDMP')
+        self.assertEqual(detect_backup_format(directory), ('directory', None))
+        self.assertEqual(detect_backup_format(self.write('a.dump', b'PGDMP\x01\x0f')), ('custom', None))
+        self.assertEqual(detect_backup_format(self.write('b.sql.gz', gzip.compress(b'SELECT 1;'))), ('plain', 'gzip'))
+        self.assertEqual(detect_backup_format(self.write('c.sql', b'--\n-- PostgreSQL database dump\n')), ('plain', 'none'))
+
+    def test_restore_picks_tool(self):
+        custom = self.write('a.dump', b'PGDMP')
+        decompress, cmd = build_restore_commands(DB_SETTINGS, custom, mode='drop')
+        self.assertIsNone(decompress)
+        self.assertEqual(cmd[0], 'pg_restore')
+        self.assertIn('--clean', cmd)
+        self.assertNotIn('-j', cmd)
+        _, cmd = build_restore_commands(DB_SETTINGS, custom, jobs=4)
+        self.assertEqual(cmd[cmd.index('-j') + 1], '4')
+
+        compressed = self.write('b.sql.gz', gzip.compress(b'SELECT 1;'))
+        decompress, cmd = build_restore_commands(DB_SETTINGS, compressed)
+        self.assertEqual(decompress, ['gzip', '-dc', compressed])
+        self.assertEqual(cmd[0], 'psql')
+        self.assertNotIn('-f', cmd)
+
+
+class DumpProgressTest(SimpleTestCase):
+    """Progress weighted by table size from pg_dump --verbose lines"""
+
+    SIZES = {'public.products_product': 600, 'public.manuals_manual': 300, 'public.empty': 0}
+
+    def setUp(self):
+        self.now = 0.0
+        self.progress = DumpProgress(self.SIZES, clock=lambda: self.now)
+
+    def test_serial_dump(self):
+        self.assertEqual(self.progress.snapshot()['progress'], 0)
+        self.progress.feed('pg_dump: dumping contents of table "public.products_product"\n')
+        self.assertEqual(self.progress.snapshot(), {
+            'progress': 0, 'current_table': 'public.products_product', 'eta_seconds': None,
+        })
+        self.now = 6.0
+        self.progress.feed('pg_dump: dumping contents of table "public.manuals_manual"\n')
+        snapshot = self.progress.snapshot()
+        # 600 of 901 bytes in 6 seconds -> 301 bytes left at 100 B/s
+        self.assertEqual(snapshot['progress'], 66)
+        self.assertEqual(snapshot['current_table'], 'public.manuals_manual')
+        self.assertEqual(snapshot['eta_seconds'], 3)
+        self.progress.feed('pg_dump: dumping contents of table "public.empty"\n')
+        self.assertEqual(self.progress.snapshot()['progress'], 99)
+
+    def test_parallel_finished_items_and_unqualified_names(self):
+        progress = DumpProgress(self.SIZES, parallel=True, clock=lambda: self.now)
+        progress.feed('pg_dump: dumping contents of table products_product\n')
+        progress.feed('pg_dump: dumping contents of table "public.manuals_manual"\n')
+        progress.feed('pg_dump: finished item 3012 TABLE DATA manuals_manual\n')
+        self.assertEqual(progress.snapshot()['progress'], 33)
+        progress.feed('pg_dump: finished item 3010 TABLE DATA products_product\n')
+        self.assertEqual(progress.snapshot()['progress'], 99)
+
+    def test_restore_progress_from_toc(self):
+        weights = restore_table_weights([
+            ';     dbname: shop',
+            '3012; 0 16390 TABLE DATA public products_product app',
+            '3013; 0 16402 TABLE DATA public manuals_manual app',
+            '2950; 2606 16410 CONSTRAINT public products_product products_product_pkey app',
+        ])
+        self.assertEqual(weights, {'public.products_product': 1, 'public.manuals_manual': 1})
+        progress = RestoreProgress(weights, clock=lambda: self.now)
+        progress.feed('pg_restore: processing data for table "public.products_product"\n')
+        progress.feed('pg_restore: processing data for table "public.manuals_manual"\n')
+        self.assertEqual(progress.snapshot()['progress'], 50)
+        self.assertEqual(progress.snapshot()['current_table'], 'public.manuals_manual')
+
+    def test_reader_drains_stream(self):
+        stream = io.StringIO(''.join(f'pg_dump: reading table {i}\n' for i in range(5000)))
+        reader = StderrReader(stream, self.progress, keep_lines=3)
+        reader.start()
+        reader.join(timeout=5)
+        self.assertFalse(reader.is_alive())
+        self.assertEqual(reader.error_output().splitlines(), [
+            'pg_dump: reading table 4997', 'pg_dump: reading table 4998', 'pg_dump: reading table 4999',
+        ])
+
+
+class ProgressChannelTest(TestCase):
+    """Progress goes to the cache; the row gets throttled narrow updates"""
+
+    def setUp(self):
+        cache.clear()
+        self.backup = BackupHistory.objects.create(filename='bk_test.dump', environment='local')
+        self.now = 0.0
+        self.channel = ProgressChannel(self.backup, db_interval=10, clock=lambda: self.now)
+
+    def test_throttled_narrow_updates(self):
+        with CaptureQueriesContext(connection) as queries:
+            for second in range(15):
+                self.now = float(second)
+                self.channel.publish(second, 'public.products_product', 30 - second)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)  # t=0 and t=10
+        self.assertNotIn('"filename"', updates[0])
+
+        self.backup.refresh_from_db()
+        self.assertEqual(self.backup.progress, 10)
+        self.assertEqual(read_progress(self.backup.pk)['progress'], 14)
+
+    def test_progress_api_reads_cache(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        url = f'/admin/dbbackup/backuphistory/progress/{self.backup.pk}/'
+        self.assertEqual(self.client.get(url).json()['progress'], 0)
+
+        self.channel.publish(42, 'public.manuals_manual', 65)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url).json()
+        self.assertEqual((data['progress'], data['current_table']), (42, 'public.manuals_manual'))
+        self.assertEqual(data['eta_display'], '1 นาที 5 วินาที')
+        self.assertFalse([q for q in queries if 'dbbackup_backuphistory' in q['sql']])
+
+        self.backup.status = 'completed'
+        self.backup.progress = 100
+        self.channel.finish()
+        self.assertEqual(self.client.get(url).json()['status'], 'completed')
+
+
+class ProgressStreamTest(TestCase):
+    """Server-sent events for backup and restore progress"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.backup = BackupHistory.objects.create(filename='bk_test.dump', environment='local')
+        self.restore = RestoreHistory.objects.create(backup_file='/backups/local/bk_test.dump', environment='local')
+
+    def finish_restore(self, status, progress=0, notes=''):
+        self.restore.status, self.restore.progress, self.restore.notes = status, progress, notes
+        restore_channel(self.restore).finish()
+
+    async def read_events(self, url):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = [chunk async for chunk in response.streaming_content]
+        return [
+            json.loads(line[len('data: '):])
+            for line in b''.join(chunks).decode().splitlines()
+            if line.startswith('data: ')
+        ]
+
+    async def test_backup_stream_ends_with_final_state(self):
+        self.backup.status = 'completed'
+        self.backup.progress = 100
+        await sync_to_async(ProgressChannel(self.backup).finish)()
+        events = await self.read_events(f'/admin/dbbackup/backuphistory/progress/{self.backup.pk}/stream/')
+        self.assertEqual([(e['status'], e['progress']) for e in events], [('completed', 100)])
+
+    async def test_restore_stream(self):
+        await sync_to_async(self.finish_restore)('failed', notes='Restore failed: boom')
+        events = await self.read_events(f'/admin/dbbackup/backuphistory/restore/{self.restore.pk}/stream/')
+        self.assertEqual(events[0]['message'], 'Restore failed: boom')
+
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get(f'/admin/dbbackup/backuphistory/restore/{self.restore.pk + 1}/stream/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_wsgi_stream_is_a_plain_generator(self):
+        # WSGI collects an async iterator before sending anything, so it must get a sync one
+        self.client.force_login(self.admin)
+        ProgressChannel(self.backup).publish(40, 'public.products_product', 12)
+        self.finish_restore('completed', progress=100, notes='done')
+        response = self.client.get(f'/admin/dbbackup/backuphistory/progress/{self.backup.pk}/stream/')
+        self.assertFalse(response.is_async)
+        first = [chunk for chunk in itertools.islice(response.streaming_content, 2)]
+        self.assertIn('"progress": 40', first[1].decode())
+        response.close()
+
+        response = self.client.get(f'/admin/dbbackup/backuphistory/restore/{self.restore.pk}/stream/')
+        self.assertFalse(response.is_async)
+        self.assertIn(b'"status": "completed"', b''.join(response.streaming_content))
+
+    def test_restore_polling_endpoint(self):
+        self.client.force_login(self.admin)
+        url = f'/admin/dbbackup/backuphistory/restore/{self.restore.pk}/'
+        restore_channel(self.restore).publish(50, 'public.x')
+        data = self.client.get(url).json()
+        self.assertEqual((data['status'], data['progress'], data['current_table']), ('in_progress', 50, 'public.x'))
+
+        # A worker that cannot see the restoring process's cache reads the row
+        cache.clear()
+        data = self.client.get(url).json()
+        self.assertEqual((data['status'], data['progress']), ('in_progress', 50))
+        self.assertEqual(self.client.get(f'/admin/dbbackup/backuphistory/restore/{self.restore.pk + 1}/').status_code, 404)
+
+
+class RestoreViewTest(TestCase):
+    """A restore records its state in RestoreHistory"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        handle, self.backup_file = tempfile.mkstemp(suffix='.dump')
+        os.close(handle)
+        self.addCleanup(os.remove, self.backup_file)
+
+    def fake_restore(self, backup_file, environment, mode, jobs, progress_callback):
+        progress_callback({'progress': 60, 'current_table': 'public.products_category', 'eta_seconds': 4})
+        # Throttled like backups: the row got the first update, the cache every one
+        restore = RestoreHistory.objects.get()
+        self.during = (restore.progress, read_restore(restore.pk)['progress'])
+        return True, 'Restore completed'
+
+    @mock.patch('dbbackup.views.threading.Thread')
+    def test_restore_state_is_persisted(self, thread):
+        # Run the background thread inline
+        thread.side_effect = lambda target: mock.Mock(start=target)
+        with mock.patch('dbbackup.views.run_pg_restore', side_effect=self.fake_restore):
+            data = self.client.post('/admin/dbbackup/backuphistory/restore/', {
+                'backup_file': self.backup_file, 'environment': 'local', 'mode': 'safe', 'jobs': '2',
+            }).json()
+
+        self.assertTrue(data['success'])
+        self.assertEqual(self.during, (0, 60))
+        restore = RestoreHistory.objects.get(pk=data['restore_id'])
+        self.assertEqual((restore.status, restore.progress, restore.notes), ('completed', 100, 'Restore completed'))
+        self.assertEqual((restore.jobs, restore.created_by), (2, self.admin))
+        self.assertEqual(read_restore(restore.pk)['status'], 'completed')
+
+        cache.clear()
+        data = self.client.get(f'/admin/dbbackup/backuphistory/restore/{restore.pk}/').json()
+        self.assertEqual((data['status'], data['message']), ('completed', 'Restore completed'))
+
+
+class ChangelistQueryCountTest(ChangelistQueryCountMixin, TestCase):
+    """Changelist query counts must not grow with the number of rows"""
+
+    def add_backups(self, count):
+        for _ in range(count):
+            BackupHistory.objects.create(
+                filename=f'bk_{BackupHistory.objects.count()}.dump', environment='local',
+                status='completed', file_size=1024, duration=2.5, created_by=self.admin,
+            )
+
+    def test_backup_history_changelist(self):
+        self.assert_constant_queries(reverse('admin:dbbackup_backuphistory_changelist'), self.add_backups)
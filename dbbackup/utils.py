@@ -1,10 +1,63 @@
 import os
+import re
+import shutil
 import subprocess
+import tarfile
+import tempfile
+import time
+from functools import lru_cache
 import psycopg
 from django.conf import settings
 from django.db import connection
-import pytz
+from django.utils import timezone
 from datetime import datetime
+from core.thai_dates import thai_datetime  # re-exported for admin/views
+from .progress import (
+    DumpProgress,
+    ProgressChannel,
+    RestoreProgress,
+    StderrReader,
+    format_duration,  # re-exported for models
+    restore_table_weights,
+    table_sizes,
+)
+
+BACKUP_FORMATS = ('plain', 'custom', 'directory')
+PG_DUMP_FORMAT_FLAGS = {'plain': 'p', 'custom': 'c', 'directory': 'd'}
+
+# ระดับการบีบอัดที่ pg_dump รับได้ (ต่ำสุด, สูงสุด)
+COMPRESSION_LEVELS = {
+    'gzip': (1, 9),
+    'lz4': (1, 12),
+    'zstd': (1, 22),
+}
+# lz4/zstd และรูปแบบ --compress=method:level มีตั้งแต่ pg_dump 16
+PG_DUMP_MIN_VERSION = {'lz4': 16, 'zstd': 16}
+
+PLAIN_EXTENSIONS = {'none': '.sql', 'gzip': '.sql.gz', 'lz4': '.sql.lz4', 'zstd': '.sql.zst'}
+# directory format เก็บเป็น tar ไฟล์เดียว (.dir.tar) หลัง pg_dump เขียน .dir เสร็จ
+FORMAT_EXTENSIONS = {'custom': '.dump', 'directory': '.dir.tar'}
+DIRECTORY_EXTENSION = '.dir'
+ARCHIVE_EXTENSION = '.tar'
+BACKUP_EXTENSIONS = (*PLAIN_EXTENSIONS.values(), *FORMAT_EXTENSIONS.values(), DIRECTORY_EXTENSION)
+
+# pg_dump -j ใช้ได้กับ directory format เท่านั้น, pg_restore -j ใช้ได้กับ custom/directory
+MAX_JOBS = 16
+
+# magic bytes ของไฟล์ backup แต่ละแบบ
+CUSTOM_MAGIC = b'PGDMP'
+TAR_MAGIC_OFFSET = 257
+TAR_MAGIC = b'ustar'
+COMPRESSION_MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'\x04\x22\x4d\x18': 'lz4',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+}
+DECOMPRESS_COMMANDS = {
+    'gzip': ['gzip', '-dc'],
+    'lz4': ['lz4', '-dc'],
+    'zstd': ['zstd', '-dc'],
+}
 
 
 def get_postgresql_version():
@@ -45,134 +98,429 @@ def get_backup_filepath(environment):
         return settings.BACKUP_PRODUCTION_DIR
 
 
+@lru_cache(maxsize=1)
+def get_pg_dump_version():
+    """major version ของ pg_dump ที่ติดตั้งอยู่ (None ถ้าไม่พบ)"""
+    try:
+        output = subprocess.run(
+            ['pg_dump', '--version'], capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    # "pg_dump (PostgreSQL) 16.1 (Ubuntu 16.1-1.pgdg22.04+1)"
+    match = re.search(r'\)\s*(\d+)', output)
+    return int(match.group(1)) if match else None
+
+
+def supported_compressions(pg_dump_version=None):
+    """วิธีบีบอัดที่ pg_dump เวอร์ชันนี้รองรับ"""
+    if pg_dump_version is None:
+        pg_dump_version = get_pg_dump_version()
+    return [
+        method for method in ('none', 'gzip', 'lz4', 'zstd')
+        if (pg_dump_version or 0) >= PG_DUMP_MIN_VERSION.get(method, 0)
+    ]
+
+
+def validate_jobs(jobs):
+    """จำนวน worker ต้องอยู่ระหว่าง 1-MAX_JOBS"""
+    if not 1 <= jobs <= MAX_JOBS:
+        raise ValueError(f'จำนวน worker ต้องอยู่ระหว่าง 1-{MAX_JOBS}')
+
+
+def validate_backup_options(backup_format, compression, compression_level=None, pg_dump_version=None, jobs=1):
+    """ตรวจสอบรูปแบบ/การบีบอัด/จำนวน worker (ValueError พร้อมข้อความภาษาไทยถ้าไม่ถูกต้อง)"""
+    if backup_format not in BACKUP_FORMATS:
+        raise ValueError(f'ไม่รู้จักรูปแบบ backup: {backup_format}')
+    validate_jobs(jobs)
+    if jobs > 1 and backup_format != 'directory':
+        raise ValueError('การ dump แบบขนาน (-j) ใช้ได้กับ Directory format เท่านั้น')
+    if compression != 'none' and compression not in COMPRESSION_LEVELS:
+        raise ValueError(f'ไม่รู้จักวิธีบีบอัด: {compression}')
+    if compression_level is not None:
+        if compression == 'none':
+            raise ValueError('ไม่ต้องระบุระดับการบีบอัดเมื่อไม่บีบอัด')
+        low, high = COMPRESSION_LEVELS[compression]
+        if not low <= compression_level <= high:
+            raise ValueError(f'ระดับการบีบอัด {compression} ต้องอยู่ระหว่าง {low}-{high}')
+    if compression not in supported_compressions(pg_dump_version):
+        required = PG_DUMP_MIN_VERSION[compression]
+        raise ValueError(f'{compression} ต้องใช้ pg_dump {required} ขึ้นไป')
+
+
+def parse_compression(spec):
+    """'gzip:6' -> ('gzip', 6), 'zstd' -> ('zstd', None), 'none' -> ('none', None)"""
+    method, _, level = spec.partition(':')
+    try:
+        return method, int(level) if level else None
+    except ValueError:
+        raise ValueError(f'ระดับการบีบอัดต้องเป็นตัวเลข: {spec}')
+
+
+def backup_extension(backup_format, compression):
+    """นามสกุลไฟล์ตามรูปแบบ (.sql, .sql.gz, .dump, .dir.tar)"""
+    if backup_format == 'plain':
+        return PLAIN_EXTENSIONS[compression]
+    return FORMAT_EXTENSIONS[backup_format]
+
+
+def backup_filename(environment, pg_version, backup_format, compression, now=None, suffix=''):
+    """bk_<yymmdd_HHMM>_pg<version>_<env>[suffix].<ext>"""
+    timestamp = (now or timezone.now()).strftime('%y%m%d_%H%M')
+    extension = backup_extension(backup_format, compression)
+    return f'bk_{timestamp}_pg{pg_version}_{environment[:3]}{suffix}{extension}'
+
+
+def backup_size(path):
+    """ขนาดไฟล์ backup เป็น bytes (รวมทุกไฟล์ถ้าเป็น directory format)"""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def archive_directory(directory, archive_path):
+    """
+    รวม directory ที่ pg_dump -Fd เขียนไว้เป็น tar ไฟล์เดียวแล้วลบ directory
+
+    ไม่บีบอัด tar ซ้ำ เพราะไฟล์ข้างในถูก pg_dump บีบอัดไว้แล้ว
+    """
+    partial_path = archive_path + '.partial'
+    with tarfile.open(partial_path, 'w') as tar:
+        for name in sorted(os.listdir(directory)):
+            tar.add(os.path.join(directory, name), arcname=name)
+    os.replace(partial_path, archive_path)
+    shutil.rmtree(directory)
+
+
+def is_directory_archive(path):
+    """ไฟล์ tar ของ directory format (.dir.tar)"""
+    if os.path.isdir(path):
+        return False
+    with open(path, 'rb') as f:
+        f.seek(TAR_MAGIC_OFFSET)
+        return f.read(len(TAR_MAGIC)) == TAR_MAGIC
+
+
+def remove_backup(path):
+    """ลบไฟล์ backup (หรือทั้ง directory ถ้าเป็น directory format)"""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def detect_backup_format(path):
+    """
+    ดูรูปแบบจากตัวไฟล์ ไม่ใช่จากนามสกุล -> (backup_format, compression)
+
+    directory ที่มี toc.dat (หรือ tar ของมัน) เป็น directory format, ไฟล์ที่
+    ขึ้นต้นด้วย PGDMP เป็น custom format, นอกนั้นเป็น plain SQL (อาจบีบอัดด้วย
+    gzip/lz4/zstd)
+    """
+    if os.path.isdir(path):
+        if not os.path.exists(os.path.join(path, 'toc.dat')):
+            raise ValueError(f'ไม่ใช่ backup แบบ directory (ไม่พบ toc.dat): {path}')
+        return 'directory', None
+    if is_directory_archive(path):
+        return 'directory', None
+    with open(path, 'rb') as f:
+        header = f.read(5)
+    if header.startswith(CUSTOM_MAGIC):
+        return 'custom', None
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if header.startswith(magic):
+            return 'plain', compression
+    return 'plain', 'none'
+
+
+def _connection_args(db_settings):
+    return [
+        '-h', db_settings['HOST'],
+        '-p', str(db_settings['PORT']),
+        '-U', db_settings['USER'],
+    ]
+
+
+def _pg_env(db_settings):
+    env = os.environ.copy()
+    env['PGPASSWORD'] = db_settings['PASSWORD']
+    return env
+
+
+def pg_dump_compress_args(compression, compression_level=None, pg_dump_version=None):
+    """argument -Z/--compress ของ pg_dump ตามเวอร์ชัน"""
+    if compression == 'none':
+        # custom/directory บีบอัดด้วย gzip เป็นค่าเริ่มต้น ต้องปิดเอง
+        return ['-Z', '0']
+    if pg_dump_version is not None and pg_dump_version >= 16:
+        spec = compression if compression_level is None else f'{compression}:{compression_level}'
+        return [f'--compress={spec}']
+    if compression == 'gzip':
+        # ก่อน 16 -Z รับแค่ระดับของ gzip
+        return ['-Z', str(6 if compression_level is None else compression_level)]
+    raise ValueError(f'{compression} ต้องใช้ pg_dump {PG_DUMP_MIN_VERSION[compression]} ขึ้นไป')
+
+
+def build_pg_dump_command(db_settings, output_path, backup_format, compression,
+                          compression_level=None, pg_dump_version=None, jobs=1):
+    """คำสั่ง pg_dump ที่เขียนผลลัพธ์ลง output_path โดยตรง (-f)"""
+    cmd = [
+        'pg_dump',
+        *_connection_args(db_settings),
+        '-d', db_settings['NAME'],
+        '-F', PG_DUMP_FORMAT_FLAGS[backup_format],
+        *pg_dump_compress_args(compression, compression_level, pg_dump_version),
+        '-f', output_path,
+        '--verbose',
+        '--no-password'
+    ]
+    if jobs > 1:
+        cmd += ['-j', str(jobs)]
+    return cmd
+
+
+def dump_output_path(backup_file, backup_format):
+    """path ที่ pg_dump เขียน (directory format เขียน .dir ก่อนรวมเป็น .dir.tar)"""
+    if backup_format == 'directory' and backup_file.endswith(ARCHIVE_EXTENSION):
+        return backup_file[:-len(ARCHIVE_EXTENSION)]
+    return backup_file
+
+
+def throughput_display(size_bytes, seconds):
+    """'12.3 MB/s' (ว่างถ้าไม่มีเวลา)"""
+    if not seconds:
+        return ''
+    return f"{format_file_size(size_bytes / seconds)}/s"
+
+
 def run_pg_dump(backup_history, progress_callback=None):
-    """รัน pg_dump command พร้อมอัปเดต progress"""
+    """
+    รัน pg_dump command พร้อมอัปเดต progress
+
+    ความคืบหน้าส่งผ่าน ProgressChannel เอง progress_callback(progress) มีไว้
+    แสดงผลเท่านั้น (เช่นพิมพ์ใน command) ไม่ต้อง save()
+    """
+    channel = ProgressChannel(backup_history)
     try:
         # Get database settings
         db_settings = settings.DATABASES['default']
         
-        # Build pg_dump command
-        cmd = [
-            'pg_dump',
-            '-h', db_settings['HOST'],
-            '-p', str(db_settings['PORT']),
-            '-U', db_settings['USER'],
-            '-d', db_settings['NAME'],
-            '--verbose',
-            '--no-password'
-        ]
-        
-        # Set PGPASSWORD environment variable
-        env = os.environ.copy()
-        env['PGPASSWORD'] = db_settings['PASSWORD']
-        
         # Create backup file path
         backup_dir = get_backup_filepath(backup_history.environment)
         backup_file = os.path.join(backup_dir, backup_history.filename)
+        output_path = dump_output_path(backup_file, backup_history.backup_format)
+        started = time.monotonic()
+        
+        # pg_dump เขียนไฟล์เอง (binary, รองรับ directory format) แทนการรับ stdout
+        cmd = build_pg_dump_command(
+            db_settings,
+            output_path,
+            backup_history.backup_format,
+            backup_history.compression,
+            backup_history.compression_level,
+            get_pg_dump_version(),
+            backup_history.jobs,
+        )
+        env = _pg_env(db_settings)
+        
+        # ขนาดของแต่ละตารางเป็นน้ำหนักของ progress (อ่านก่อนเริ่ม dump)
+        try:
+            sizes = table_sizes()
+        except Exception as e:
+            print(f"Error reading table sizes: {e}")
+            sizes = {}
+        progress = DumpProgress(sizes, parallel=backup_history.jobs > 1)
         
         # Run pg_dump
-        with open(backup_file, 'w') as f:
-            process = subprocess.Popen(
-                cmd,
-                stdout=f,
-                stderr=subprocess.PIPE,
-                env=env,
-                text=True
-            )
-            
-            # Monitor progress (simplified - just check if process is running)
-            while process.poll() is None:
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            env=env,
+            text=True
+        )
+        # อ่าน stderr ใน thread แยกตลอดเวลา กัน pipe เต็มจน pg_dump ค้าง
+        reader = StderrReader(process.stderr, progress)
+        reader.start()
+        
+        # Monitor progress จากบรรทัด "dumping contents of table" ของ --verbose
+        last_snapshot = None
+        while process.poll() is None:
+            snapshot = progress.snapshot()
+            if snapshot != last_snapshot:
+                channel.publish(**snapshot)
                 if progress_callback:
-                    # Simulate progress (in real implementation, you'd parse pg_dump output)
-                    current_progress = min(backup_history.progress + 10, 90)
-                    progress_callback(current_progress)
-                import time
-                time.sleep(1)
+                    progress_callback(snapshot['progress'])
+                last_snapshot = snapshot
+            time.sleep(1)
+        reader.join()
+        backup_history.current_table = ''
+        backup_history.eta_seconds = None
+        
+        # Check if command was successful
+        if process.returncode == 0:
+            if output_path != backup_file:
+                archive_directory(output_path, backup_file)
+            # Get file size and wall time (รวมเวลาทำ tar)
+            backup_history.file_size = backup_size(backup_file)
+            backup_history.duration = time.monotonic() - started
+            backup_history.status = 'completed'
+            backup_history.progress = 100
+            channel.finish()
+            return True
+        else:
+            error_output = reader.error_output()
+            if output_path != backup_file and os.path.isdir(output_path):
+                shutil.rmtree(output_path)
+            backup_history.status = 'failed'
+            backup_history.notes = f"pg_dump failed: {error_output}"
+            channel.finish()
+            return False
             
-            # Check if command was successful
-            if process.returncode == 0:
-                # Get file size
-                file_size = os.path.getsize(backup_file)
-                backup_history.file_size = file_size
-                backup_history.status = 'completed'
-                backup_history.progress = 100
-                backup_history.save()
-                return True
-            else:
-                error_output = process.stderr.read()
-                backup_history.status = 'failed'
-                backup_history.notes = f"pg_dump failed: {error_output}"
-                backup_history.save()
-                return False
-                
     except Exception as e:
         backup_history.status = 'failed'
         backup_history.notes = f"Error running pg_dump: {str(e)}"
-        backup_history.save()
+        channel.finish()
         return False
 
 
-def run_pg_restore(backup_file, environment, mode='safe'):
-    """รัน psql/pg_restore command"""
+def build_restore_commands(db_settings, backup_file, mode='safe', jobs=1, verbose=False):
+    """
+    คำสั่ง restore ตามรูปแบบของไฟล์ -> (decompress_cmd หรือ None, restore_cmd)
+
+    custom/directory ใช้ pg_restore (mode drop = --clean --if-exists, jobs > 1
+    = -j), plain SQL ใช้ psql โดยคลายการบีบอัดผ่าน pipe ถ้าไฟล์ถูกบีบอัดไว้
+    (psql restore แบบขนานไม่ได้ จึงไม่สนใจ jobs) verbose ใส่ --verbose ให้
+    pg_restore เพื่ออ่าน progress
+    """
+    backup_format, compression = detect_backup_format(backup_file)
+    connection_args = [*_connection_args(db_settings), '-d', db_settings['NAME'], '--no-password']
+    
+    if backup_format != 'plain':
+        cmd = ['pg_restore', *connection_args]
+        if mode == 'drop':
+            cmd += ['--clean', '--if-exists']
+        if jobs > 1:
+            cmd += ['-j', str(jobs)]
+        if verbose:
+            cmd.append('--verbose')
+        return None, cmd + [backup_file]
+    
+    cmd = ['psql', *connection_args, '--quiet']
+    if compression == 'none':
+        return None, cmd + ['-f', backup_file]
+    return DECOMPRESS_COMMANDS[compression] + [backup_file], cmd
+
+
+def run_pg_restore(backup_file, environment, mode='safe', jobs=1, progress_callback=None):
+    """
+    รัน psql/pg_restore command (เลือกให้อัตโนมัติตามรูปแบบไฟล์)
+
+    progress_callback({'progress', 'current_table', 'eta_seconds'}) ถูกเรียกเมื่อ
+    pg_restore เริ่มตารางใหม่ (psql ไม่มีข้อมูลรายตาราง จึงไม่มี progress)
+    """
+    try:
+        started = time.monotonic()
+        if is_directory_archive(backup_file):
+            # pg_restore -j ต้องอ่านจาก directory จึงแตก tar ไว้ข้างไฟล์ก่อน
+            with tempfile.TemporaryDirectory(prefix='restore_', dir=os.path.dirname(backup_file)) as workdir:
+                with tarfile.open(backup_file) as tar:
+                    tar.extractall(workdir, filter='data')
+                success, message = _run_restore(workdir, mode, jobs, progress_callback)
+        else:
+            success, message = _run_restore(backup_file, mode, jobs, progress_callback)
+        
+        if success:
+            elapsed = time.monotonic() - started
+            message = f"{message} in {elapsed:.1f}s ({throughput_display(backup_size(backup_file), elapsed)})"
+        return success, message
+            
+    except Exception as e:
+        return False, f"Error running restore: {str(e)}"
+
+
+def _restore_weights(backup_file):
+    """รายการ TABLE DATA ในไฟล์ (จาก pg_restore -l) ใช้เป็นน้ำหนักของ progress"""
+    try:
+        listing = subprocess.run(
+            ['pg_restore', '-l', backup_file], capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error listing backup contents: {e}")
+        return {}
+    return restore_table_weights(listing.splitlines())
+
+
+def _run_restore(backup_file, mode, jobs, progress_callback=None):
     try:
         # Get database settings
         db_settings = settings.DATABASES['default']
         
-        # Build psql command for restore
-        cmd = [
-            'psql',
-            '-h', db_settings['HOST'],
-            '-p', str(db_settings['PORT']),
-            '-U', db_settings['USER'],
-            '-d', db_settings['NAME'],
-            '-f', backup_file,
-            '--quiet'
-        ]
-        
-        # Set PGPASSWORD environment variable
-        env = os.environ.copy()
-        env['PGPASSWORD'] = db_settings['PASSWORD']
-        
-        # Run psql restore
+        verbose = progress_callback is not None
+        decompress_cmd, cmd = build_restore_commands(db_settings, backup_file, mode, jobs, verbose)
+        env = _pg_env(db_settings)
+        if verbose and cmd[0] == 'pg_restore':
+            progress = RestoreProgress(_restore_weights(backup_file), parallel=jobs > 1)
+        else:
+            progress = RestoreProgress({})
+        
+        decompress = None
+        if decompress_cmd:
+            # plain SQL ที่บีบอัดไว้: gzip -dc file | psql
+            decompress = subprocess.Popen(
+                decompress_cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        
+        # Run restore
         process = subprocess.Popen(
             cmd,
+            stdin=decompress.stdout if decompress else None,
             stderr=subprocess.PIPE,
-            stdout=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
             env=env,
             text=True
         )
+        if decompress:
+            # ให้ psql เป็นเจ้าของ pipe คนเดียว เพื่อให้ได้ SIGPIPE ถ้า psql จบก่อน
+            decompress.stdout.close()
+        # อ่าน stderr ใน thread แยก (verbose output ยาว) ระหว่างรอ process
+        reader = StderrReader(process.stderr, progress)
+        reader.start()
+        
+        last_snapshot = None
+        while True:
+            try:
+                process.wait(timeout=1)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            snapshot = progress.snapshot()
+            if progress_callback and snapshot != last_snapshot:
+                progress_callback(snapshot)
+                last_snapshot = snapshot
+        reader.join()
         
-        stdout, stderr = process.communicate()
+        if decompress:
+            decompress_error = decompress.stderr.read().decode(errors='replace')
+            decompress.stderr.close()
+            if decompress.wait() != 0:
+                return False, f"Restore failed: {decompress_cmd[0]}: {decompress_error}"
         
         if process.returncode == 0:
             return True, "Restore completed successfully"
         else:
-            return False, f"Restore failed: {stderr}"
+            return False, f"Restore failed: {reader.error_output()}"
             
     except Exception as e:
         return False, f"Error running restore: {str(e)}"
 
 
-def thai_datetime(dt):
-    """แปลง datetime เป็นวันเดือนไทย พ.ศ. เวลาไทย"""
-    if not dt:
-        return "-"
-    
-    thai_tz = pytz.timezone('Asia/Bangkok')
-    thai_time = dt.astimezone(thai_tz)
-    buddhist_year = thai_time.year + 543
-    
-    thai_months = [
-        'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
-        'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
-    ]
-    
-    month_name = thai_months[thai_time.month - 1]
-    formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-    
-    return formatted_date
-
-
 def cleanup_old_backups(environment, keep_days=30):
     """ลบไฟล์ backup เก่าที่เกินกำหนด"""
     try:
@@ -184,10 +532,10 @@ def cleanup_old_backups(environment, keep_days=30):
         
         for filename in os.listdir(backup_dir):
             file_path = os.path.join(backup_dir, filename)
-            if os.path.isfile(file_path):
+            if filename.endswith(BACKUP_EXTENSIONS):
                 file_time = os.path.getmtime(file_path)
                 if file_time < cutoff_time:
-                    os.remove(file_path)
+                    remove_backup(file_path)
                     print(f"Deleted old backup: {filename}")
                     
     except Exception as e:
@@ -204,8 +552,8 @@ def get_backup_files(environment):
         files = []
         for filename in os.listdir(backup_dir):
             file_path = os.path.join(backup_dir, filename)
-            if os.path.isfile(file_path) and filename.endswith('.sql'):
-                file_size = os.path.getsize(file_path)
+            if filename.endswith(BACKUP_EXTENSIONS):
+                file_size = backup_size(file_path)
                 file_time = os.path.getmtime(file_path)
                 files.append({
                     'filename': filename,
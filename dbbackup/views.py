@@ -1,26 +1,53 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse, Http404
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.urls import reverse
-from django.utils import timezone
 from django.contrib.auth import get_user_model
-from dbbackup.models import BackupHistory, BackupSchedule
+from django.core.handlers.asgi import ASGIRequest
+from dbbackup.models import BackupHistory, BackupSchedule, RestoreHistory
+from dbbackup.progress import (
+    FINISHED_STATUSES,
+    aread_progress,
+    aread_restore,
+    progress_state,
+    read_progress,
+    read_restore,
+    restore_channel,
+)
 from dbbackup.utils import (
     get_postgresql_version, 
     get_backup_files, 
+    get_pg_dump_version,
+    supported_compressions,
+    validate_backup_options,
+    validate_jobs,
+    MAX_JOBS,
+    backup_filename,
+    remove_backup,
     run_pg_dump, 
     run_pg_restore,
     thai_datetime
 )
+import asyncio
 import json
 import threading
 import os
+import time
 
 User = get_user_model()
 
+# Server-sent events: อ่าน cache ทุกวินาที ส่งเฉพาะเมื่อสถานะเปลี่ยน
+SSE_POLL_INTERVAL = 1
+SSE_HEARTBEAT_INTERVAL = 15
+# ปิด stream เป็นระยะให้ proxy ไม่ตัดเอง EventSource จะต่อใหม่ตาม retry
+SSE_MAX_DURATION = 30 * 60
+# ภายใต้ WSGI (runserver) stream หนึ่งจอง thread ไว้ จึงปิดเร็วกว่าและให้ EventSource ต่อใหม่
+SSE_WSGI_MAX_DURATION = 60
+SSE_RETRY_MS = 3000
+
 
 @staff_member_required
 def backup_view(request):
@@ -28,22 +55,37 @@ def backup_view(request):
     if request.method == 'POST':
         environment = request.POST.get('environment')
         notes = request.POST.get('notes', '')
+        backup_format = request.POST.get('backup_format', BackupHistory.DEFAULT_FORMAT)
+        compression = request.POST.get('compression', BackupHistory.DEFAULT_COMPRESSION)
+        compression_level = request.POST.get('compression_level') or None
+        jobs = request.POST.get('jobs') or 1
         
         if not environment:
             return JsonResponse({'success': False, 'error': 'กรุณาเลือก environment'})
         
+        try:
+            if compression_level is not None:
+                compression_level = int(compression_level)
+            jobs = int(jobs)
+            validate_backup_options(backup_format, compression, compression_level, jobs=jobs)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+        
         # Get PostgreSQL version
         pg_version = get_postgresql_version()
         
-        # Create filename with timestamp and version (shorter format)
-        timestamp = timezone.now().strftime('%y%m%d_%H%M')
-        filename = f'bk_{timestamp}_pg{pg_version}_{environment[:3]}.sql'
+        # Create filename with timestamp, version and format extension
+        filename = backup_filename(environment, pg_version, backup_format, compression)
         
         # Create BackupHistory record
         backup_history = BackupHistory.objects.create(
             filename=filename,
             environment=environment,
             postgresql_version=pg_version,
+            backup_format=backup_format,
+            compression=compression,
+            compression_level=compression_level,
+            jobs=jobs,
             backup_type='manual',
             status='in_progress',
             progress=0,
@@ -51,19 +93,8 @@ def backup_view(request):
             notes=notes
         )
         
-        # Run backup in background thread
-        def run_backup():
-            def progress_callback(progress):
-                backup_history.progress = progress
-                backup_history.save()
-            
-            success = run_pg_dump(backup_history, progress_callback)
-            
-            if not success:
-                backup_history.status = 'failed'
-                backup_history.save()
-        
-        thread = threading.Thread(target=run_backup)
+        # Run backup in background thread (progress goes through ProgressChannel)
+        thread = threading.Thread(target=run_pg_dump, args=(backup_history,))
         thread.daemon = True
         thread.start()
         
@@ -75,8 +106,17 @@ def backup_view(request):
     
     # GET request - show backup form
     pg_version = get_postgresql_version()
+    compressions = supported_compressions()
     context = {
         'postgresql_version': pg_version,
+        'pg_dump_version': get_pg_dump_version(),
+        'format_choices': BackupHistory.FORMAT_CHOICES,
+        'compression_choices': [
+            choice for choice in BackupHistory.COMPRESSION_CHOICES if choice[0] in compressions
+        ],
+        'default_format': BackupHistory.DEFAULT_FORMAT,
+        'default_compression': BackupHistory.DEFAULT_COMPRESSION,
+        'max_jobs': MAX_JOBS,
     }
     return render(request, 'admin/dbbackup/backup_form.html', context)
 
@@ -89,6 +129,7 @@ def restore_view(request):
         environment = request.POST.get('environment')
         mode = request.POST.get('mode', 'safe')
         confirmation = request.POST.get('confirmation')
+        jobs = request.POST.get('jobs') or 1
         
         if not all([backup_file, environment]):
             return JsonResponse({'success': False, 'error': 'กรุณากรอกข้อมูลให้ครบถ้วน'})
@@ -100,17 +141,51 @@ def restore_view(request):
         if environment == 'production' and confirmation != 'RESTORE PRODUCTION':
             return JsonResponse({'success': False, 'error': 'กรุณาพิมพ์ RESTORE PRODUCTION เพื่อยืนยัน'})
         
+        try:
+            jobs = int(jobs)
+            validate_jobs(jobs)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+        
         # Check if backup file exists
         if not os.path.exists(backup_file):
             return JsonResponse({'success': False, 'error': 'ไม่พบไฟล์ backup'})
         
-        # Run restore
-        success, message = run_pg_restore(backup_file, environment, mode)
+        # สถานะอยู่ในแถว RestoreHistory (ทุก process อ่านได้) และ cache เป็นทางลัด
+        restore_history = RestoreHistory.objects.create(
+            backup_file=backup_file,
+            environment=environment,
+            mode=mode,
+            jobs=jobs,
+            status='in_progress',
+            created_by=request.user,
+            notes='กำลังเริ่ม restore...'
+        )
+        channel = restore_channel(restore_history)
+        channel.publish(0)
         
-        if success:
-            return JsonResponse({'success': True, 'message': message})
-        else:
-            return JsonResponse({'success': False, 'error': message})
+        def run_restore():
+            success, message = run_pg_restore(
+                backup_file, environment, mode, jobs, lambda snapshot: channel.publish(**snapshot)
+            )
+            restore_history.status = 'completed' if success else 'failed'
+            if success:
+                restore_history.progress = 100
+            restore_history.current_table = ''
+            restore_history.eta_seconds = None
+            restore_history.notes = message
+            channel.finish()
+        
+        # Run restore in background thread
+        thread = threading.Thread(target=run_restore)
+        thread.daemon = True
+        thread.start()
+        
+        return JsonResponse({
+            'success': True,
+            'restore_id': restore_history.id,
+            'message': 'เริ่ม restore แล้ว กรุณารอสักครู่'
+        })
     
     # GET request - show restore form
     local_files = get_backup_files('local')
@@ -119,25 +194,148 @@ def restore_view(request):
     context = {
         'local_files': local_files,
         'production_files': production_files,
+        'max_jobs': MAX_JOBS,
     }
     return render(request, 'admin/dbbackup/restore_form.html', context)
 
 
 @staff_member_required
 def progress_api(request, backup_id):
-    """API endpoint สำหรับดึง progress ของ backup"""
+    """API endpoint สำหรับดึง progress ของ backup (จาก cache ก่อน ไม่มีจึงอ่านแถว)"""
     try:
-        backup = get_object_or_404(BackupHistory, id=backup_id)
+        state = read_progress(backup_id)
+        if state is None:
+            state = progress_state(get_object_or_404(BackupHistory, id=backup_id))
         
-        return JsonResponse({
-            'status': backup.status,
-            'progress': backup.progress,
-            'message': backup.notes or ''
-        })
+        return JsonResponse(state)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+class _ProgressEvents:
+    """แปลงสถานะที่อ่านได้เป็น chunk ของ SSE: 'progress' เมื่อเปลี่ยน, heartbeat ระหว่างรอ"""
+    
+    def __init__(self, now):
+        self.last_state = None
+        self.last_sent = now
+        self.finished = False
+    
+    def step(self, state, now):
+        if state is not None and state != self.last_state:
+            self.last_state, self.last_sent = state, now
+            self.finished = state['status'] in FINISHED_STATUSES
+            return _sse('progress', state)
+        if now - self.last_sent >= SSE_HEARTBEAT_INTERVAL:
+            self.last_sent = now
+            return ': keep-alive\n\n'
+        return None
+
+
+async def _progress_events(read_state):
+    """ส่ง event 'progress' ทุกครั้งที่สถานะเปลี่ยน จนเสร็จ/ล้มเหลว (ASGI: รอด้วย asyncio.sleep)"""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    events = _ProgressEvents(started)
+    yield f'retry: {SSE_RETRY_MS}\n\n'
+    while loop.time() - started < SSE_MAX_DURATION:
+        chunk = events.step(await read_state(), loop.time())
+        if chunk:
+            yield chunk
+        if events.finished:
+            return
+        await asyncio.sleep(SSE_POLL_INTERVAL)
+
+
+def _progress_events_sync(read_state):
+    """
+    เหมือน _progress_events แต่เป็น generator ธรรมดาสำหรับ WSGI
+
+    StreamingHttpResponse ภายใต้ WSGI รวบ async iterator ทั้งหมดก่อนส่ง byte แรก
+    หน้าเว็บจึงจะไม่เห็น progress เลยจนจบ ส่วน generator ธรรมดาถูกส่งทีละ chunk
+    """
+    started = time.monotonic()
+    events = _ProgressEvents(started)
+    yield f'retry: {SSE_RETRY_MS}\n\n'
+    while time.monotonic() - started < SSE_WSGI_MAX_DURATION:
+        chunk = events.step(read_state(), time.monotonic())
+        if chunk:
+            yield chunk
+        if events.finished:
+            return
+        time.sleep(SSE_POLL_INTERVAL)
+
+
+def _event_stream(request, read_state, aread_state):
+    if isinstance(request, ASGIRequest):
+        events = _progress_events(aread_state)
+    else:
+        events = _progress_events_sync(read_state)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: ส่งทันทีไม่ buffer
+    return response
+
+
+def _saved_state(model, read_cached, object_id):
+    """สถานะจาก cache ก่อน ไม่มีจึงอ่านแถว (None ถ้าแถวถูกลบไปแล้ว)"""
+    state = read_cached(object_id)
+    if state is None:
+        obj = model.objects.filter(id=object_id).first()
+        state = progress_state(obj) if obj else None
+    return state
+
+
+async def _asaved_state(model, aread_cached, object_id):
+    state = await aread_cached(object_id)
+    if state is None:
+        obj = await model.objects.filter(id=object_id).afirst()
+        state = progress_state(obj) if obj else None
+    return state
+
+
+def _saved_event_stream(request, model, read_cached, aread_cached, object_id):
+    return _event_stream(
+        request,
+        lambda: _saved_state(model, read_cached, object_id),
+        lambda: _asaved_state(model, aread_cached, object_id),
+    )
+
+
+@staff_member_required
+async def progress_stream(request, backup_id):
+    """
+    SSE ของ progress backup (แทนการ poll progress_api)
+
+    เป็น async view: ภายใต้ ASGI ผู้ดูแต่ละคนใช้แค่ coroutine ที่รอ
+    asyncio.sleep ไม่ได้จอง sync worker ไว้ตลอดการ backup ภายใต้ WSGI
+    ใช้ generator ธรรมดาที่ปิดทุก SSE_WSGI_MAX_DURATION วินาทีแทน
+    """
+    if not await BackupHistory.objects.filter(id=backup_id).aexists():
+        raise Http404('ไม่พบ backup')
+    return _saved_event_stream(request, BackupHistory, read_progress, aread_progress, backup_id)
+
+
+@staff_member_required
+async def restore_progress_stream(request, restore_id):
+    """SSE ของ progress restore (cache ก่อน ไม่มีจึงอ่านแถว RestoreHistory)"""
+    if not await RestoreHistory.objects.filter(id=restore_id).aexists():
+        raise Http404('ไม่พบ restore')
+    return _saved_event_stream(request, RestoreHistory, read_restore, aread_restore, restore_id)
+
+
+@staff_member_required
+def restore_progress_api(request, restore_id):
+    """สถานะ restore แบบ JSON สำหรับหน้าเว็บที่ใช้ SSE ไม่ได้ (poll แทน)"""
+    state = _saved_state(RestoreHistory, read_restore, restore_id)
+    if state is None:
+        raise Http404('ไม่พบ restore')
+    return JsonResponse(state)
+
+
 @staff_member_required
 def download_backup(request, backup_id):
     """ดาวน์โหลดไฟล์ backup"""
@@ -147,11 +345,23 @@ def download_backup(request, backup_id):
         messages.error(request, 'ไม่พบไฟล์ backup')
         return HttpResponse('File not found', status=404)
     
+    if os.path.isdir(backup.file_path):
+        return HttpResponse('Directory-format backups cannot be downloaded as a single file', status=409)
+    
     try:
-        with open(backup.file_path, 'rb') as f:
-            response = HttpResponse(f.read(), content_type='application/sql')
-            response['Content-Disposition'] = f'attachment; filename="{backup.filename}"'
-            return response
+        # FileResponse ส่งไฟล์เป็น chunk ไม่ต้องอ่านทั้งไฟล์เข้า memory
+        if backup.filename.endswith('.sql'):
+            content_type = 'application/sql'
+        elif backup.filename.endswith('.tar'):
+            content_type = 'application/x-tar'
+        else:
+            content_type = 'application/octet-stream'
+        return FileResponse(
+            open(backup.file_path, 'rb'),
+            as_attachment=True,
+            filename=backup.filename,
+            content_type=content_type
+        )
     except Exception as e:
         messages.error(request, f'เกิดข้อผิดพลาดในการดาวน์โหลด: {e}')
         return HttpResponse('Download error', status=500)
@@ -164,7 +374,7 @@ def delete_backup(request, backup_id):
     
     try:
         if backup.file_exists:
-            os.remove(backup.file_path)
+            remove_backup(backup.file_path)
         
         backup.delete()
         messages.success(request, f'ลบ backup {backup.filename} เรียบร้อยแล้ว')
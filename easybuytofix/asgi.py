@@ -3,6 +3,10 @@ ASGI config for easybuytofix project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn easybuytofix.asgi:application``)
+so the async backup/restore progress streams (dbbackup.views.progress_stream)
+don't hold a sync worker per open admin page.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'storages',
     'django_summernote',
+    'core',
     'accounts',
     'products',
     'manuals',
@@ -96,6 +97,30 @@ DATABASES = {
 }
 
 
+# Cache
+# CACHE_BACKEND: locmem (default, per process), file (shared by processes on
+# one host) or redis (shared; needs the redis package and CACHE_LOCATION,
+# e.g. redis://127.0.0.1:6379/1). Model data is cached under versioned keys,
+# see core/cache.py.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', {
+            'locmem': 'easybuytofix',
+            'file': str(BASE_DIR / 'cache'),
+            'redis': 'redis://127.0.0.1:6379/1',
+        }[CACHE_BACKEND]),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'easybuytofix'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -153,6 +178,12 @@ EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.Em
 # Cloudflare R2 Settings
 R2_ENABLED = os.getenv('R2_ENABLED', 'False').lower() == 'true'
 
+# Shared R2 client connection pool (see core/r2.py)
+R2_MAX_POOL_CONNECTIONS = int(os.getenv('R2_MAX_POOL_CONNECTIONS', '20'))
+R2_CONNECT_TIMEOUT = int(os.getenv('R2_CONNECT_TIMEOUT', '5'))
+R2_READ_TIMEOUT = int(os.getenv('R2_READ_TIMEOUT', '30'))
+R2_MAX_ATTEMPTS = int(os.getenv('R2_MAX_ATTEMPTS', '3'))
+
 if R2_ENABLED:
     # R2 Configuration
     AWS_ACCESS_KEY_ID = os.getenv('R2_ACCESS_KEY_ID')
@@ -170,8 +201,15 @@ if R2_ENABLED:
     AWS_QUERYSTRING_AUTH = False
     AWS_S3_OBJECT_ACL = 'public-read'
     
-    # Use R2 for media files
-    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    # Use R2 for media files (ACL and Content-Type are set at upload time)
+    STORAGES = {
+        'default': {
+            'BACKEND': 'core.storage.R2MediaStorage',
+        },
+        'staticfiles': {
+            'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+        },
+    }
     
     # Media files configuration
     if AWS_S3_CUSTOM_DOMAIN:
@@ -183,6 +221,27 @@ else:
     MEDIA_URL = os.getenv('MEDIA_URL', 'media/')
     MEDIA_ROOT = os.path.join(BASE_DIR, os.getenv('MEDIA_ROOT', 'media'))
 
+# Content-addressed media names (see core/media.py). Uploads are stored under
+# the hash of their bytes, identical files share one object and hashed objects
+# are served with a one year immutable Cache-Control.
+MEDIA_HASHED_NAMES = os.getenv('MEDIA_HASHED_NAMES', 'False').lower() == 'true'
+MEDIA_IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Background media jobs (see core/jobs.py and the process_media_jobs command)
+# MEDIA_JOBS_RUN_SYNC=True runs storage side effects inline after commit,
+# which is handy in development when no worker is running.
+MEDIA_JOBS_RUN_SYNC = os.getenv('MEDIA_JOBS_RUN_SYNC', 'False').lower() == 'true'
+MEDIA_JOBS_WORKER_THREADS = int(os.getenv('MEDIA_JOBS_WORKER_THREADS', '4'))
+MEDIA_JOBS_MAX_ATTEMPTS = int(os.getenv('MEDIA_JOBS_MAX_ATTEMPTS', '5'))
+MEDIA_JOBS_RETRY_BASE_SECONDS = int(os.getenv('MEDIA_JOBS_RETRY_BASE_SECONDS', '30'))
+MEDIA_JOBS_RETRY_MAX_SECONDS = 3600
+MEDIA_JOBS_STALE_SECONDS = 600
+
+# Fail admin changelists that exceed their query budget (core/admin_mixins.py).
+# On in DEBUG, off in production; the changelist tests turn it on themselves
+# (core.testing.ChangelistQueryCountMixin).
+ADMIN_QUERY_BUDGET_CHECK = os.getenv('ADMIN_QUERY_BUDGET_CHECK', str(DEBUG)).lower() == 'true'
+
 # Summernote Configuration
 SUMMERNOTE_CONFIG = {
     'summernote': {
@@ -224,7 +283,14 @@ BACKUP_PRODUCTION_DIR = os.path.join(BACKUP_ROOT, 'production')
 os.makedirs(BACKUP_LOCAL_DIR, exist_ok=True)
 os.makedirs(BACKUP_PRODUCTION_DIR, exist_ok=True)
 
+# Backup progress goes to the cache on every change; the BackupHistory row is
+# only updated this often (seconds) for processes that don't share the cache
+BACKUP_PROGRESS_DB_INTERVAL = int(os.getenv('BACKUP_PROGRESS_DB_INTERVAL', '10'))
+
 # Django Crontab settings
+# process_media_jobs --once drains the media job queue every minute, so queued
+# deletes still run when no long-lived worker is configured.
 CRONJOBS = [
     ('*/1 * * * *', 'dbbackup.cron.run_scheduled_backups'),
+    ('*/1 * * * *', 'django.core.management.call_command', ['process_media_jobs'], {'once': True}),
 ]
@@ -21,4 +21,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('summernote/', include('django_summernote.urls')),
     path('admin/dbbackup/', include('dbbackup.urls')),
+    path('manuals/', include('manuals.urls')),
 ]
@@ -2,12 +2,10 @@
 """
 Script to fix avatar permissions in R2
 """
-import boto3
 import os
 import django
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
 # Setup Django first
 BASE_DIR = Path(__file__).resolve().parent
@@ -18,21 +16,15 @@ django.setup()
 from django.core.files.storage import default_storage
 from django.contrib.auth.models import User
 from accounts.models import UserProfile
-
-load_dotenv()
+from core.r2 import get_r2_client, get_bucket_name
+from core.storage import ensure_public_read
 
 def fix_avatar_permissions():
     """Fix avatar permissions in R2"""
     
-    # Create S3 client for R2
-    s3_client = boto3.client(
-        's3',
-        endpoint_url=os.getenv('R2_ENDPOINT_URL'),
-        aws_access_key_id=os.getenv('R2_ACCESS_KEY_ID'),
-        aws_secret_access_key=os.getenv('R2_SECRET_ACCESS_KEY'),
-    )
-    
-    bucket_name = os.getenv('R2_BUCKET_NAME')
+    # Shared R2 client
+    s3_client = get_r2_client()
+    bucket_name = get_bucket_name()
     
     try:
         # Get all profiles with avatars
@@ -47,19 +39,10 @@ def fix_avatar_permissions():
                 
                 # Check if file exists in storage
                 if default_storage.exists(profile.avatar.name):
-                    # Get file content
-                    file_content = default_storage.open(profile.avatar.name).read()
-                    
-                    # Upload with public-read ACL
-                    s3_client.put_object(
-                        Bucket=bucket_name,
-                        Key=profile.avatar.name,
-                        Body=file_content,
-                        ContentType='image/jpeg',
-                        ACL='public-read'
-                    )
+                    # Metadata-only fix (ACL update or server-side copy)
+                    method = ensure_public_read(profile.avatar.name, s3_client, bucket_name)
                     
-                    print(f"✅ Fixed permissions for: {profile.avatar.name}")
+                    print(f"✅ Fixed permissions for: {profile.avatar.name} ({method})")
                     print(f"🌐 Public URL: {profile.avatar_url}")
                 else:
                     print(f"❌ File not found: {profile.avatar.name}")
@@ -2,12 +2,10 @@
 """
 Quick script to fix avatar permissions for current user
 """
-import boto3
 import os
 import django
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
 # Setup Django first
 BASE_DIR = Path(__file__).resolve().parent
@@ -18,8 +16,8 @@ django.setup()
 from django.core.files.storage import default_storage
 from django.contrib.auth.models import User
 from accounts.models import UserProfile
-
-load_dotenv()
+from core.r2 import get_r2_client, get_bucket_name
+from core.storage import ensure_public_read
 
 def fix_current_user_avatar():
     """Fix avatar permissions for current user"""
@@ -36,38 +34,14 @@ def fix_current_user_avatar():
         print(f"Fixing avatar for user: {user.username}")
         print(f"Avatar path: {profile.avatar.name}")
         
-        # Create S3 client for R2
-        s3_client = boto3.client(
-            's3',
-            endpoint_url=os.getenv('R2_ENDPOINT_URL'),
-            aws_access_key_id=os.getenv('R2_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('R2_SECRET_ACCESS_KEY'),
-        )
-        
-        bucket_name = os.getenv('R2_BUCKET_NAME')
+        # Shared R2 client
+        s3_client = get_r2_client()
+        bucket_name = get_bucket_name()
         
         # Check if file exists in storage
         if default_storage.exists(profile.avatar.name):
-            # Get file content
-            file_content = default_storage.open(profile.avatar.name).read()
-            
-            # Determine content type
-            content_type = 'image/jpeg'
-            if profile.avatar.name.lower().endswith('.png'):
-                content_type = 'image/png'
-            elif profile.avatar.name.lower().endswith('.gif'):
-                content_type = 'image/gif'
-            elif profile.avatar.name.lower().endswith('.webp'):
-                content_type = 'image/webp'
-            
-            # Upload with public-read ACL
-            s3_client.put_object(
-                Bucket=bucket_name,
-                Key=profile.avatar.name,
-                Body=file_content,
-                ContentType=content_type,
-                ACL='public-read'
-            )
+            # Metadata-only fix (ACL update or server-side copy)
+            ensure_public_read(profile.avatar.name, s3_client, bucket_name)
             
             print("✅ Avatar permissions fixed!")
             print(f"🌐 Public URL: {profile.avatar_url}")
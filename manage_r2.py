@@ -4,7 +4,11 @@ Script to manage Cloudflare R2 files
 """
 import os
 import sys
+import json
+import time
 import django
+from collections import defaultdict
+from itertools import chain
 from pathlib import Path
 
 # Add the project directory to Python path
@@ -18,37 +22,93 @@ django.setup()
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.conf import settings
-import boto3
 from botocore.exceptions import ClientError
+from core.r2 import get_r2_client
+from core.inventory import iter_objects, iter_objects_parallel, split_prefix
 
-def list_r2_files(prefix=''):
-    """List all files in R2 bucket"""
+def _group_key(key, prefix, depth):
+    """Folder under prefix that key is aggregated into (depth levels deep)"""
+    parts = key[len(prefix):].split('/')[:-1]
+    return prefix + ''.join(part + '/' for part in parts[:depth])
+
+
+def list_r2_files(prefix='', as_json=False, workers=1, depth=1, summary_only=False):
+    """
+    List every file in R2 bucket under prefix.
+
+    The listing is paginated (no 1000 key limit) and streamed; with
+    workers > 1 the sub-folders at `depth` are listed concurrently.
+    Size/count totals are aggregated per folder at `depth`. With as_json
+    each object and each folder total is written as one JSON line.
+    """
     if not getattr(settings, 'R2_ENABLED', False):
         print("R2 is not enabled")
         return
     
     try:
-        s3_client = boto3.client(
-            's3',
-            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        )
+        s3_client = get_r2_client()
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        log = sys.stderr if as_json else sys.stdout
+        started = time.monotonic()
         
-        response = s3_client.list_objects_v2(
-            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-            Prefix=prefix
-        )
-        
-        if 'Contents' in response:
-            print(f"Files in bucket '{settings.AWS_STORAGE_BUCKET_NAME}':")
-            for obj in response['Contents']:
-                print(f"  - {obj['Key']} ({obj['Size']} bytes)")
+        if workers > 1:
+            prefixes, direct_objects = split_prefix(prefix, depth, s3_client, bucket)
+            objects = chain(
+                direct_objects,
+                (obj for _prefix, obj in iter_objects_parallel(prefixes, s3_client, bucket, workers)),
+            )
         else:
-            print("No files found")
+            objects = iter_objects(prefix, s3_client, bucket)
+        
+        if not as_json and not summary_only:
+            print(f"Files in bucket '{bucket}':")
+        
+        totals = defaultdict(lambda: [0, 0])
+        total_count = total_size = 0
+        for obj in objects:
+            key, size = obj['Key'], obj['Size']
+            group = totals[_group_key(key, prefix, depth)]
+            group[0] += 1
+            group[1] += size
+            total_count += 1
+            total_size += size
+            
+            if summary_only:
+                continue
+            if as_json:
+                sys.stdout.write(json.dumps({
+                    'type': 'object',
+                    'key': key,
+                    'size': size,
+                    'last_modified': obj['LastModified'].isoformat() if obj.get('LastModified') else None,
+                    'etag': obj.get('ETag', '').strip('"') or None,
+                }) + '\n')
+            else:
+                print(f"  - {key} ({size} bytes)")
+        
+        if not total_count:
+            print("No files found", file=log)
+            return
+        
+        for group_prefix in sorted(totals):
+            count, size = totals[group_prefix]
+            if as_json:
+                sys.stdout.write(json.dumps({
+                    'type': 'prefix',
+                    'prefix': group_prefix,
+                    'count': count,
+                    'size': size,
+                }) + '\n')
+            else:
+                print(f"  {group_prefix or '/'}: {count} files, {size} bytes")
+        
+        elapsed = time.monotonic() - started
+        rate = total_count / elapsed if elapsed else 0
+        print(f"Total: {total_count} files, {total_size} bytes "
+              f"in {elapsed:.2f}s ({rate:.0f} objects/s)", file=log)
             
     except Exception as e:
-        print(f"Error listing files: {e}")
+        print(f"Error listing files: {e}", file=sys.stderr)
 
 def delete_r2_file(file_path):
     """Delete a file from R2"""
@@ -117,7 +177,11 @@ def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python manage_r2.py info                    - Show R2 info")
-        print("  python manage_r2.py list [prefix]           - List files")
+        print("  python manage_r2.py list [prefix] [options] - List files")
+        print("      --json          one JSON object per line (objects + folder totals)")
+        print("      --summary       only print size/count per folder")
+        print("      --parallel N    list sub-folders with N threads")
+        print("      --depth D       folder depth for totals / parallel split (default 1)")
         print("  python manage_r2.py upload <local> [remote] - Upload file")
         print("  python manage_r2.py delete <file_path>      - Delete file")
         print("  python manage_r2.py url <file_path>         - Get file URL")
@@ -128,8 +192,30 @@ def main():
     if command == 'info':
         show_r2_info()
     elif command == 'list':
-        prefix = sys.argv[2] if len(sys.argv) > 2 else ''
-        list_r2_files(prefix)
+        args = sys.argv[2:]
+        options = {'as_json': False, 'workers': 1, 'depth': 1, 'summary_only': False}
+        prefix = ''
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg == '--json':
+                options['as_json'] = True
+            elif arg == '--summary':
+                options['summary_only'] = True
+            elif arg in ('--parallel', '--depth'):
+                if i + 1 >= len(args) or not args[i + 1].isdigit():
+                    print(f"{arg} requires a number")
+                    return
+                key = 'workers' if arg == '--parallel' else 'depth'
+                options[key] = int(args[i + 1])
+                i += 1
+            elif arg.startswith('--'):
+                print(f"Unknown option: {arg}")
+                return
+            else:
+                prefix = arg
+            i += 1
+        list_r2_files(prefix, **options)
     elif command == 'upload':
         if len(sys.argv) < 3:
             print("Please provide local file path")
@@ -1,11 +1,13 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR
 from django.contrib.auth.models import Group
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django_summernote.admin import SummernoteModelAdmin
 from .models import ManualCategory, Manual, ManualAttachment
-import pytz
-from datetime import datetime
+from .search import search_enabled, search_manuals
+from core.admin_mixins import EstimatedCountMixin, QueryBudgetMixin
+from core.thai_dates import thai_datetime
 from django.contrib.auth import get_user_model
 from django.contrib import messages
 
@@ -13,10 +15,11 @@ User = get_user_model()
 
 
 @admin.register(ManualCategory)
-class ManualCategoryAdmin(admin.ModelAdmin):
+class ManualCategoryAdmin(EstimatedCountMixin, QueryBudgetMixin, admin.ModelAdmin):
     """Admin for ManualCategory model"""
     
     list_display = ('name', 'slug', 'description_preview', 'icon', 'order', 'is_active', 'created_by_display', 'updated_by_display', 'created_at_thai')
+    list_select_related = ('created_by', 'updated_by')
     list_filter = ('is_active', 'created_at', 'updated_at')
     search_fields = ('name', 'slug', 'description')
     readonly_fields = ('created_at_thai', 'updated_at_thai', 'created_by_display', 'updated_by_display')
@@ -67,28 +70,12 @@ class ManualCategoryAdmin(admin.ModelAdmin):
 
     def created_at_thai(self, obj):
         """Display creation date in Thai Buddhist Era"""
-        if obj.created_at:
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.created_at.astimezone(thai_tz)
-            buddhist_year = thai_time.year + 543
-            thai_months = ['มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน', 'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม']
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.created_at)
     created_at_thai.short_description = 'วันที่สร้าง'
 
     def updated_at_thai(self, obj):
         """Display update date in Thai Buddhist Era"""
-        if obj.updated_at:
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.updated_at.astimezone(thai_tz)
-            buddhist_year = thai_time.year + 543
-            thai_months = ['มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน', 'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม']
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.updated_at)
     updated_at_thai.short_description = 'วันที่แก้ไข'
     
     def save_model(self, request, obj, form, change):
@@ -106,15 +93,28 @@ class ManualCategoryAdmin(admin.ModelAdmin):
         return readonly
 
 
+class ManualChangeList(ChangeList):
+    """Orders search results by full-text rank unless a column is sorted"""
+
+    def get_ordering(self, request, queryset):
+        ordering = super().get_ordering(request, queryset)
+        if self.query and ORDER_VAR not in self.params and search_enabled(queryset.db):
+            return ['-search_rank', *ordering]
+        return ordering
+
+
 @admin.register(Manual)
-class ManualAdmin(SummernoteModelAdmin):
+class ManualAdmin(EstimatedCountMixin, QueryBudgetMixin, SummernoteModelAdmin):
     """Admin for Manual model"""
     
     summernote_fields = ('content',)
     
     list_display = ('title', 'category', 'order', 'is_public', 'visible_groups_display', 'is_active', 'created_by_display', 'updated_by_display', 'created_at_thai')
-    list_filter = ('category', 'is_public', 'is_active', 'visible_to_groups', 'created_at', 'updated_at')
-    search_fields = ('title', 'slug', 'content', 'seo_title', 'seo_description')
+    list_select_related = ('category', 'created_by', 'updated_by')
+    list_filter = ('category', 'is_public', 'is_active', ('visible_to_groups', admin.RelatedOnlyFieldListFilter), 'created_at', 'updated_at')
+    # Placeholder that turns on the search box: get_search_results() ignores
+    # search_fields and runs search_manuals() over title, SEO fields and content
+    search_fields = ('search_document',)
     readonly_fields = ('created_at_thai', 'updated_at_thai', 'created_by_display', 'updated_by_display')
     ordering = ('category__order', 'category__name', 'order', 'title')
     
@@ -150,10 +150,8 @@ class ManualAdmin(SummernoteModelAdmin):
         """Display visible groups"""
         if obj.is_public:
             return "สาธารณะ"
-        groups = obj.visible_to_groups.all()
-        if groups:
-            return ", ".join([group.name for group in groups])
-        return "ไม่มี"
+        # Denormalized by signals, no per-row group query
+        return obj.visible_to or "ไม่มี"
     visible_groups_display.short_description = 'แสดงสำหรับ'
     
     def created_by_display(self, obj):
@@ -178,28 +176,12 @@ class ManualAdmin(SummernoteModelAdmin):
 
     def created_at_thai(self, obj):
         """Display creation date in Thai Buddhist Era"""
-        if obj.created_at:
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.created_at.astimezone(thai_tz)
-            buddhist_year = thai_time.year + 543
-            thai_months = ['มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน', 'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม']
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.created_at)
     created_at_thai.short_description = 'วันที่สร้าง'
 
     def updated_at_thai(self, obj):
         """Display update date in Thai Buddhist Era"""
-        if obj.updated_at:
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.updated_at.astimezone(thai_tz)
-            buddhist_year = thai_time.year + 543
-            thai_months = ['มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน', 'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม']
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.updated_at)
     updated_at_thai.short_description = 'วันที่แก้ไข'
     
     def save_model(self, request, obj, form, change):
@@ -215,4 +197,10 @@ class ManualAdmin(SummernoteModelAdmin):
         if obj:  # Editing existing object
             readonly.append('created_by')
         return readonly
-    
\ No newline at end of file
+
+    def get_changelist(self, request, **kwargs):
+        return ManualChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """Full-text search (GIN index on PostgreSQL) instead of icontains on the HTML"""
+        return search_manuals(queryset, search_term), False
@@ -1,8 +1,9 @@
 from django.core.management.base import BaseCommand
-from django.core.files.storage import default_storage
 from manuals.models import Manual, ManualAttachment
-import re
-import os
+from manuals.utils import manual_image_paths
+from core.inventory import iter_media_objects
+from core.storage import bulk_delete, DELETE_BATCH_SIZE
+import time
 
 
 class Command(BaseCommand):
@@ -14,75 +15,95 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be deleted without actually deleting',
         )
+        parser.add_argument(
+            '--prefix',
+            type=str,
+            default='manuals/images/',
+            help='Storage prefix to scan (default: manuals/images/)',
+        )
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            default=0,
+            help='List per-month prefixes (%%Y/%%m) with this many threads (default: sequential)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
+        prefix = options['prefix']
+        workers = options['parallel']
+        started = time.monotonic()
         
         self.stdout.write('Starting manual image cleanup...')
         
-        # Get all manual content
-        manuals = Manual.objects.all()
+        # Collect referenced images, reading only the content column
         used_images = set()
+        manual_count = 0
+        for manual in Manual.objects.only('content').order_by().iterator(chunk_size=500):
+            manual_count += 1
+            used_images.update(manual_image_paths(manual.content))
         
-        # Extract all image URLs from manual content
-        for manual in manuals:
-            if manual.content:
-                img_pattern = r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>'
-                img_urls = re.findall(img_pattern, manual.content)
-                
-                for img_url in img_urls:
-                    if '/manuals/images/' in img_url:
-                        file_path = img_url.split('/manuals/images/')[-1]
-                        full_path = f'manuals/images/{file_path}'
-                        used_images.add(full_path)
+        # Files owned by attachments are never orphaned
+        for file_name in ManualAttachment.objects.values_list('file', flat=True).iterator(chunk_size=2000):
+            if file_name:
+                used_images.add(file_name)
         
-        # Get all attachments
-        attachments = ManualAttachment.objects.all()
-        attachment_files = set()
+        self.stdout.write(f'Referenced files: {len(used_images)} (from {manual_count} manuals)')
         
-        for attachment in attachments:
-            if attachment.file:
-                attachment_files.add(attachment.file.name)
+        # Stream the bucket listing and delete orphans in DeleteObjects-sized batches
+        scanned = 0
+        scanned_bytes = 0
+        orphan_count = 0
+        deleted_count = 0
+        failed_count = 0
+        batch = []
         
-        # Find orphaned files
-        all_files = set()
+        def flush():
+            nonlocal deleted_count, failed_count
+            deleted, failed = bulk_delete(batch)
+            deleted_count += len(deleted)
+            failed_count += len(failed)
+            for file_path, error in failed.items():
+                self.stdout.write(f'Error deleting {file_path}: {error}')
+            batch.clear()
         
-        # List all files in manuals/images/ directory
         try:
-            files = default_storage.listdir('manuals/images/')[1]  # Get files only
-            for file in files:
-                all_files.add(f'manuals/images/{file}')
+            objects = iter_media_objects(prefix, parallel_depth=2 if workers > 1 else 0, workers=workers)
+            for obj in objects:
+                scanned += 1
+                scanned_bytes += obj.get('Size', 0)
+                file_path = obj['Key']
+                if file_path in used_images:
+                    continue
+                
+                orphan_count += 1
+                self.stdout.write(f'  - {file_path}')
+                if not dry_run:
+                    batch.append(file_path)
+                    if len(batch) >= DELETE_BATCH_SIZE:
+                        flush()
         except Exception as e:
             self.stdout.write(f'Error listing files: {e}')
             return
         
-        # Find orphaned files
-        orphaned_files = all_files - used_images - attachment_files
+        if batch:
+            flush()
+        
+        elapsed = time.monotonic() - started
+        rate = scanned / elapsed if elapsed else 0
+        self.stdout.write(
+            f'Scanned {scanned} objects ({scanned_bytes / (1024 * 1024):.1f} MB) '
+            f'in {elapsed:.1f}s ({rate:,.0f} objects/s)'
+        )
         
-        if not orphaned_files:
+        if not orphan_count:
             self.stdout.write('No orphaned files found.')
             return
         
-        self.stdout.write(f'Found {len(orphaned_files)} orphaned files:')
-        
-        for file_path in orphaned_files:
-            self.stdout.write(f'  - {file_path}')
+        self.stdout.write(f'Found {orphan_count} orphaned files.')
         
         if dry_run:
             self.stdout.write('Dry run completed. No files were deleted.')
             return
         
-        # Delete orphaned files
-        deleted_count = 0
-        for file_path in orphaned_files:
-            try:
-                if default_storage.exists(file_path):
-                    default_storage.delete(file_path)
-                    deleted_count += 1
-                    self.stdout.write(f'Deleted: {file_path}')
-                else:
-                    self.stdout.write(f'File not found: {file_path}')
-            except Exception as e:
-                self.stdout.write(f'Error deleting {file_path}: {e}')
-        
-        self.stdout.write(f'Cleanup completed. Deleted {deleted_count} files.')
+        self.stdout.write(f'Cleanup completed. Deleted {deleted_count} files, {failed_count} failed.')
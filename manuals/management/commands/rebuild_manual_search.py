@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from core.cache import bump_model_version
+from manuals.models import Manual
+from manuals.search import search_document, search_enabled, search_vector
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search document and vector of every manual'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Manuals read per query (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        postgres = search_enabled()
+        fields = ('title', 'content', 'seo_title', 'seo_description')
+        updated = 0
+
+        for manual in Manual.objects.only('pk', *fields).iterator(chunk_size=options['batch_size']):
+            changes = {'search_document': search_document(manual)}
+            if postgres:
+                changes['search_vector'] = search_vector(manual)
+            Manual.objects.filter(pk=manual.pk).update(**changes)
+            updated += 1
+        # update() skips post_save, so cached manual querysets must be invalidated here
+        bump_model_version(Manual)
+
+        if not postgres:
+            self.stdout.write('Database is not PostgreSQL: only search_document was rebuilt.')
+        self.stdout.write(f'Completed. Rebuilt: {updated}')
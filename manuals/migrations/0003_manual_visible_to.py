@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:45
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_visible_to(apps, schema_editor):
+    Manual = apps.get_model('manuals', 'Manual')
+    names = defaultdict(list)
+    rows = Manual.visible_to_groups.through.objects.values_list('manual_id', 'group__name')
+    for manual_id, name in rows:
+        names[manual_id].append(name)
+    Manual.objects.bulk_update(
+        [Manual(pk=pk, visible_to=', '.join(sorted(group_names))) for pk, group_names in names.items()],
+        ['visible_to'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manuals', '0002_alter_manual_options_remove_manual_order_before_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manual',
+            name='visible_to',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='ชื่อกลุ่มที่เห็น'),
+        ),
+        migrations.RunPython(fill_visible_to, migrations.RunPython.noop),
+    ]
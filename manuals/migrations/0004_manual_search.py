@@ -0,0 +1,103 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:48
+
+import html
+import re
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import Value
+from django.utils.html import strip_tags
+
+INDEX_NAME = 'manuals_manual_search_gin'
+
+# Frozen copy of manuals.search as of this migration, so later tokenizer
+# changes don't alter what this migration writes (rebuild_manual_search
+# re-indexes existing manuals with the current tokenizer).
+SEARCH_CONFIG = 'simple'
+THAI_NGRAM = 3
+
+_THAI_RUN_RE = re.compile(r'[\u0e00-\u0e7f]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _thai_ngrams(match):
+    run = match.group(0)
+    if len(run) <= THAI_NGRAM:
+        return f' {run} '
+    grams = (run[i:i + THAI_NGRAM] for i in range(len(run) - THAI_NGRAM + 1))
+    return f' {" ".join(grams)} '
+
+
+def tokenize(text):
+    text = _THAI_RUN_RE.sub(_thai_ngrams, (text or '').lower())
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def search_parts(manual):
+    content = html.unescape(strip_tags(manual.content or ''))
+    return (
+        ('A', tokenize(manual.title)),
+        ('B', tokenize(f'{manual.seo_title or ""} {manual.seo_description or ""}')),
+        ('C', tokenize(content)),
+    )
+
+
+def search_document(manual):
+    return '\n'.join(text for _weight, text in search_parts(manual))
+
+
+def search_vector(manual):
+    vectors = [
+        SearchVector(Value(text), config=SEARCH_CONFIG, weight=weight)
+        for weight, text in search_parts(manual)
+    ]
+    vector = vectors[0]
+    for other in vectors[1:]:
+        vector = vector + other
+    return vector
+
+
+def fill_search(apps, schema_editor):
+    Manual = apps.get_model('manuals', 'Manual')
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    for manual in Manual.objects.using(schema_editor.connection.alias).iterator(chunk_size=500):
+        changes = {'search_document': search_document(manual)}
+        if postgres:
+            changes['search_vector'] = search_vector(manual)
+        Manual.objects.using(schema_editor.connection.alias).filter(pk=manual.pk).update(**changes)
+
+
+def create_search_index(apps, schema_editor):
+    # GIN is PostgreSQL only; other databases search search_document
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON manuals_manual USING gin (search_vector)'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manuals', '0003_manual_visible_to'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manual',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='ข้อความสำหรับค้นหา'),
+        ),
+        migrations.AddField(
+            model_name='manual',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_search, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,32 +1,17 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.utils.translation import gettext_lazy as _
-from django.utils.text import slugify
 from django_summernote.models import AbstractAttachment
-import re
-from unidecode import unidecode
+from core.slugs import UniqueSlugMixin, custom_slugify
+from core.tracking import FieldTrackerMixin
+from .search import search_document, update_search_vectors
 
 User = get_user_model()
 
 
-def custom_slugify(value):
-    """Create slug that supports Thai characters"""
-    if not value:
-        return ''
-    
-    # Use unidecode to convert Thai to readable text
-    decoded = unidecode(value)
-    
-    # Clean up the result
-    result = re.sub(r'[^\w\s-]', '', decoded)  # Remove special characters
-    result = re.sub(r'[-\s]+', '-', result)    # Replace spaces and multiple dashes with single dash
-    result = result.strip('-')                 # Remove leading/trailing dashes
-    
-    return result.lower()
-
-
-class ManualCategory(models.Model):
+class ManualCategory(UniqueSlugMixin, models.Model):
     """Manual Category model"""
     name = models.CharField(
         _("ชื่อหมวดหมู่"),
@@ -96,20 +81,12 @@ class ManualCategory(models.Model):
     def __str__(self):
         return self.name
 
-    def save(self, *args, **kwargs):
-        """Auto-generate slug from name if not provided"""
-        if not self.slug:
-            self.slug = custom_slugify(self.name)
-            # Ensure uniqueness
-            original_slug = self.slug
-            counter = 1
-            while ManualCategory.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+    def get_slug_base(self):
+        """Slug is auto-generated from the name when left empty"""
+        return custom_slugify(self.name)
 
 
-class Manual(models.Model):
+class Manual(UniqueSlugMixin, FieldTrackerMixin, models.Model):
     """Manual model"""
     title = models.CharField(
         _("ชื่อคู่มือ"),
@@ -146,6 +123,13 @@ class Manual(models.Model):
         verbose_name=_("แสดงสำหรับกลุ่ม"),
         help_text=_("เลือกกลุ่มที่สามารถเห็นคู่มือนี้")
     )
+    # Denormalized group names for list pages; maintained by signals
+    visible_to = models.TextField(
+        _("ชื่อกลุ่มที่เห็น"),
+        blank=True,
+        default='',
+        editable=False,
+    )
     
     # Ordering - Simple order field
     order = models.PositiveIntegerField(
@@ -168,6 +152,18 @@ class Manual(models.Model):
         null=True,
         help_text=_("คำอธิบายสำหรับ SEO (แนะนำไม่เกิน 200 ตัวอักษร)")
     )
+
+    # Full-text search (manuals/search.py); maintained on save
+    search_document = models.TextField(
+        _("ข้อความสำหรับค้นหา"),
+        blank=True,
+        default='',
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+    )
     
     is_active = models.BooleanField(
         _("ใช้งานได้"),
@@ -204,20 +200,27 @@ class Manual(models.Model):
         verbose_name_plural = _("คู่มือการใช้งาน")
         ordering = ['category__order', 'category__name', 'order', 'title']
 
+    # Images removed from the content are deleted by signals; all four
+    # feed the search document
+    tracked_fields = ('content', 'title', 'seo_title', 'seo_description')
+
     def __str__(self):
         return self.title
 
+    def get_slug_base(self):
+        """Slug is auto-generated from the title when left empty"""
+        return custom_slugify(self.title)
+
     def save(self, *args, **kwargs):
-        """Auto-generate slug from title if not provided"""
-        if not self.slug:
-            self.slug = custom_slugify(self.title)
-            # Ensure uniqueness
-            original_slug = self.slug
-            counter = 1
-            while Manual.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
+        # Rebuild the search document only when its source text changed
+        search_changed = self.pk is None or bool(self.changed_fields())
+        if search_changed:
+            self.search_document = search_document(self)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'search_document'}
         super().save(*args, **kwargs)
+        if search_changed:
+            update_search_vectors([self], using=self._state.db)
 
     @property
     def calculated_order(self):
@@ -0,0 +1,107 @@
+"""
+Full-text search for manuals.
+
+Each manual keeps a plain-text search_document (title, SEO fields and the
+tag-stripped content) and, on PostgreSQL, a GIN-indexed search_vector built
+from it with weights A (title), B (SEO) and C (content).
+
+Thai is written without spaces between words and PostgreSQL has no Thai
+parser, so Thai runs are indexed as overlapping character trigrams with the
+'simple' configuration. A query is tokenized the same way and every trigram
+has to match, which finds any Thai substring of three or more characters
+without a word dictionary. Latin words are indexed as whole words.
+
+Other databases fall back to icontains over search_document.
+"""
+import html
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, Q, Value
+from django.utils.html import strip_tags
+
+SEARCH_CONFIG = 'simple'
+THAI_NGRAM = 3
+
+_THAI_RUN_RE = re.compile(r'[\u0e00-\u0e7f]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _thai_ngrams(match):
+    run = match.group(0)
+    if len(run) <= THAI_NGRAM:
+        return f' {run} '
+    grams = (run[i:i + THAI_NGRAM] for i in range(len(run) - THAI_NGRAM + 1))
+    return f' {" ".join(grams)} '
+
+
+def tokenize(text):
+    """Lowercased text with Thai runs split into character trigrams"""
+    text = _THAI_RUN_RE.sub(_thai_ngrams, (text or '').lower())
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def search_parts(manual):
+    """Tokenized (weight, text) pairs for a manual"""
+    content = html.unescape(strip_tags(manual.content or ''))
+    return (
+        ('A', tokenize(manual.title)),
+        ('B', tokenize(f'{manual.seo_title or ""} {manual.seo_description or ""}')),
+        ('C', tokenize(content)),
+    )
+
+
+def search_document(manual):
+    """Plain-text document stored in Manual.search_document"""
+    return '\n'.join(text for _weight, text in search_parts(manual))
+
+
+def search_vector(manual):
+    """Weighted tsvector expression for a manual"""
+    vectors = [
+        SearchVector(Value(text), config=SEARCH_CONFIG, weight=weight)
+        for weight, text in search_parts(manual)
+    ]
+    vector = vectors[0]
+    for other in vectors[1:]:
+        vector = vector + other
+    return vector
+
+
+def search_enabled(using='default'):
+    """True if the database supports the tsvector index"""
+    return connections[using].vendor == 'postgresql'
+
+
+def update_search_vectors(manuals, using='default'):
+    """Write search_vector for saved manuals (no-op off PostgreSQL)"""
+    if not search_enabled(using):
+        return
+    from .models import Manual
+
+    for manual in manuals:
+        Manual.objects.using(using).filter(pk=manual.pk).update(search_vector=search_vector(manual))
+
+
+def search_manuals(queryset, term):
+    """
+    Filter queryset to manuals matching term.
+
+    On PostgreSQL the result is annotated with search_rank (higher is
+    better); callers order by it.
+    """
+    tokens = tokenize(term)
+    if not tokens:
+        return queryset
+
+    if search_enabled(queryset.db):
+        query = SearchQuery(tokens, config=SEARCH_CONFIG, search_type='plain')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+    condition = Q()
+    for token in tokens.split():
+        condition &= Q(search_document__icontains=token)
+    return queryset.filter(condition)
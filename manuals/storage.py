@@ -1,9 +1,9 @@
-from storages.backends.s3boto3 import S3Boto3Storage
 import os
 from django.conf import settings
+from core.storage import R2MediaStorage
 
 
-class ManualMediaStorage(S3Boto3Storage):
+class ManualMediaStorage(R2MediaStorage):
     """Custom storage backend for Manual attachments to ensure R2 uploads"""
     location = 'manuals/images'
     file_overwrite = False
@@ -14,8 +14,8 @@ class ManualMediaStorage(S3Boto3Storage):
         if os.getenv('R2_ENABLED', 'False').lower() == 'true':
             kwargs.update({
                 'endpoint_url': os.getenv('R2_ENDPOINT_URL'),
-                'aws_access_key_id': os.getenv('R2_ACCESS_KEY_ID'),
-                'aws_secret_access_key': os.getenv('R2_SECRET_ACCESS_KEY'),
+                'access_key': os.getenv('R2_ACCESS_KEY_ID'),
+                'secret_key': os.getenv('R2_SECRET_ACCESS_KEY'),
                 'bucket_name': os.getenv('R2_BUCKET_NAME'),
                 'custom_domain': os.getenv('R2_CUSTOM_DOMAIN'),
             })
@@ -1,3 +1,222 @@
+import io
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from core import inventory
+from core.testing import ChangelistQueryCountMixin, FakeListingClient
+
+from .models import Manual, ManualAttachment, ManualCategory
+from .search import search_manuals, tokenize
+
+
+class ChangelistQueryCountTest(ChangelistQueryCountMixin, TestCase):
+    """Changelist query counts must not grow with the number of rows"""
+
+    def setUp(self):
+        super().setUp()
+        self.groups = [Group.objects.create(name=f'group-{i}') for i in range(2)]
+
+    def add_manuals(self, count):
+        for _ in range(count):
+            category = ManualCategory.objects.create(name=f'หมวดหมู่ {ManualCategory.objects.count()}', created_by=self.admin, updated_by=self.admin)
+            manual = Manual.objects.create(
+                title='คู่มือ', category=category, content='<p>...</p>', is_public=False,
+                created_by=self.admin, updated_by=self.admin,
+            )
+            manual.visible_to_groups.set(self.groups)
+
+    def test_manual_changelist(self):
+        self.assert_constant_queries(reverse('admin:manuals_manual_changelist'), self.add_manuals)
+
+    def test_category_changelist(self):
+        self.assert_constant_queries(reverse('admin:manuals_manualcategory_changelist'), self.add_manuals)
+
+
+class VisibleToSummaryTest(TestCase):
+    """Manual.visible_to follows visible_to_groups from both sides"""
+
+    def setUp(self):
+        category = ManualCategory.objects.create(name='หมวดหมู่')
+        self.manual = Manual.objects.create(title='คู่มือ', category=category, content='')
+        self.sales = Group.objects.create(name='sales')
+        self.admins = Group.objects.create(name='admins')
+
+    def summary(self):
+        return Manual.objects.get(pk=self.manual.pk).visible_to
+
+    def test_forward_changes(self):
+        self.manual.visible_to_groups.add(self.sales, self.admins)
+        self.assertEqual(self.summary(), 'admins, sales')
+        self.assertEqual(self.manual.visible_to, 'admins, sales')
+
+        self.manual.visible_to_groups.remove(self.admins)
+        self.assertEqual(self.summary(), 'sales')
+
+        self.manual.visible_to_groups.clear()
+        self.assertEqual(self.summary(), '')
+
+    def test_reverse_changes(self):
+        self.sales.manual_set.add(self.manual)
+        self.assertEqual(self.summary(), 'sales')
+
+        self.sales.manual_set.clear()
+        self.assertEqual(self.summary(), '')
+
+    def test_group_rename_and_delete(self):
+        self.manual.visible_to_groups.set([self.sales, self.admins])
+
+        self.sales.name = 'support'
+        self.sales.save()
+        self.assertEqual(self.summary(), 'admins, support')
+
+        self.admins.delete()
+        self.assertEqual(self.summary(), 'support')
+
+
+class ManualSearchTest(TestCase):
+    """Search document, tokenizer and the search API"""
+
+    def setUp(self):
+        self.category = ManualCategory.objects.create(name='หมวดหมู่')
+        self.manual = Manual.objects.create(
+            title='วิธีเปลี่ยนรหัสผ่าน', category=self.category, is_public=True,
+            content='<p>กดปุ่ม <b>ตั้งค่า</b> แล้วเลือก Security &amp; Login</p>',
+        )
+        self.private = Manual.objects.create(
+            title='คู่มือภายใน', category=self.category, content='<p>ตั้งค่าเซิร์ฟเวอร์</p>',
+        )
+
+    def test_tokenize_splits_thai_runs(self):
+        self.assertEqual(tokenize('ตั้งค่า Login'), 'ตั้ ั้ง ้งค งค่ ค่า login')
+        self.assertEqual(tokenize('ค่า'), 'ค่า')
+
+    def test_document_is_tag_free_and_follows_edits(self):
+        self.assertNotIn('<b>', self.manual.search_document)
+        self.assertIn('security & login', self.manual.search_document)
+
+        self.manual.content = '<p>ลืมรหัสผ่าน</p>'
+        self.manual.save()
+        self.assertEqual(search_manuals(Manual.objects.all(), 'ตั้งค่า').get(), self.private)
+        self.assertEqual(search_manuals(Manual.objects.all(), 'ลืม').get(), self.manual)
+
+    def test_admin_search(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:manuals_manual_changelist'), {'q': 'ดปุ่ม'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.manual])
+
+    def test_api_respects_visibility(self):
+        response = self.client.get(reverse('manuals:search'), {'q': 'ตั้งค่า'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.manual.pk])
+
+        user = User.objects.create_user('staff', password='password')
+        group = Group.objects.create(name='it')
+        user.groups.add(group)
+        self.private.visible_to_groups.add(group)
+        self.client.force_login(user)
+        response = self.client.get(reverse('manuals:search'), {'q': 'ตั้งค่า'})
+        self.assertEqual({row['id'] for row in response.json()['results']}, {self.manual.pk, self.private.pk})
+
+
+class ManualCacheVersionTest(TestCase):
+    """Group changes on either side of the m2m invalidate manual caches"""
+
+    def test_m2m_changes_bump_the_manual_version(self):
+        from core.cache import model_version
+
+        category = ManualCategory.objects.create(name='หมวดหมู่')
+        manual = Manual.objects.create(title='คู่มือ', category=category, content='')
+        group = Group.objects.create(name='sales')
+
+        version = model_version(Manual)
+        with self.captureOnCommitCallbacks(execute=True):
+            manual.visible_to_groups.add(group)
+        self.assertGreater(model_version(Manual), version)
+
+        version = model_version(Manual)
+        with self.captureOnCommitCallbacks(execute=True):
+            group.manual_set.clear()
+        self.assertGreater(model_version(Manual), version)
+
+    def test_rebuild_search_bumps_the_manual_version(self):
+        from django.core.management import call_command
+        from core.cache import model_version
+
+        category = ManualCategory.objects.create(name='หมวดหมู่')
+        Manual.objects.create(title='คู่มือ', category=category, content='')
+        version = model_version(Manual)
+        call_command('rebuild_manual_search', stdout=io.StringIO())
+        self.assertGreater(model_version(Manual), version)
+
+
+class CleanupManualImagesTest(TestCase):
+    """Objects under manuals/images/ that no manual or attachment uses are deleted"""
+
+    KEYS = [
+        'manuals/images/2025/01/05/used.jpg',
+        'manuals/images/2025/01/05/orphan-1.jpg',
+        'manuals/images/2025/01/31/attachment.pdf',
+        'manuals/images/2025/02/01/orphan-2.png',
+        'manuals/images/2026/03/02/used.png',
+        'manuals/images/2026/03/02/orphan-3.jpg',
+        'manuals/images/orphan-4.jpg',
+    ]
+    ORPHANS = [key for key in KEYS if 'orphan' in key]
+
+    def setUp(self):
+        category = ManualCategory.objects.create(name='หมวดหมู่')
+        Manual.objects.create(title='คู่มือ 1', category=category, content=(
+            '<p><img src="https://media.example.com/manuals/images/2025/01/05/used.jpg"></p>'
+        ))
+        Manual.objects.create(title='คู่มือ 2', category=category, content=(
+            '<img src="/media/manuals/images/2026/03/02/used.png" alt="">'
+        ))
+        ManualAttachment.objects.create(name='attachment.pdf', file='manuals/images/2025/01/31/attachment.pdf')
+
+        self.client = FakeListingClient(self.KEYS + ['avatars/user_1.png'])
+        for name, value in (('r2_enabled', True), ('get_r2_client', self.client), ('get_bucket_name', 'media')):
+            patcher = mock.patch.object(inventory, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # The command reuses its batch list, so keep a copy of each call
+        self.batches = []
+        patcher = mock.patch(
+            'manuals.management.commands.cleanup_manual_images.bulk_delete',
+            side_effect=lambda names: (self.batches.append(list(names)) or list(names), {}),
+        )
+        self.bulk_delete = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def cleanup(self, **options):
+        out = io.StringIO()
+        call_command('cleanup_manual_images', stdout=out, **options)
+        return out.getvalue()
+
+    def deleted(self):
+        return sorted(name for batch in self.batches for name in batch)
+
+    def test_deletes_unreferenced_objects(self):
+        output = self.cleanup()
+        self.assertEqual(self.deleted(), sorted(self.ORPHANS))
+        self.assertIn(f'Scanned {len(self.KEYS)} objects', output)
+        self.assertIn('Deleted 4 files, 0 failed', output)
+
+    def test_parallel_listing_finds_the_same_orphans(self):
+        self.cleanup(parallel=4)
+        self.assertEqual(self.deleted(), sorted(self.ORPHANS))
+        # Year and month prefixes were listed separately
+        self.assertIn(('manuals/images/2026/03/', None), self.client.requests)
+
+    def test_deletes_in_batches(self):
+        with mock.patch('manuals.management.commands.cleanup_manual_images.DELETE_BATCH_SIZE', 3):
+            self.cleanup()
+        self.assertEqual([len(batch) for batch in self.batches], [3, 1])
 
-# Create your tests here.
+    def test_dry_run(self):
+        output = self.cleanup(dry_run=True)
+        self.bulk_delete.assert_not_called()
+        self.assertIn('Found 4 orphaned files.', output)
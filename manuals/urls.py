@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'manuals'
+
+urlpatterns = [
+    path('search/', views.search_api, name='search'),
+]
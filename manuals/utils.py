@@ -0,0 +1,49 @@
+from collections import defaultdict
+import re
+
+from core.cache import bump_model_version_on_commit
+
+IMG_PATTERN = re.compile(r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>')
+
+
+def manual_image_paths(content):
+    """Storage paths of manual images referenced in HTML content"""
+    paths = set()
+    for img_url in IMG_PATTERN.findall(content or ''):
+        # Extract file path from URL
+        if '/manuals/images/' in img_url:
+            file_path = img_url.split('/manuals/images/')[-1]
+            paths.add(f'manuals/images/{file_path}')
+    return paths
+
+
+def visible_to_summary(names):
+    """Comma-separated group names as stored in Manual.visible_to"""
+    return ', '.join(sorted(names))
+
+
+def refresh_visible_to(manual_pks):
+    """
+    Recompute Manual.visible_to for the given manuals.
+
+    One query for the group names and one bulk UPDATE, however many manuals
+    are affected. Returns {pk: summary}.
+    """
+    from .models import Manual
+
+    pks = set(manual_pks)
+    if not pks:
+        return {}
+    names = defaultdict(list)
+    through = Manual.visible_to_groups.through
+    for manual_id, name in through.objects.filter(manual_id__in=pks).values_list('manual_id', 'group__name'):
+        names[manual_id].append(name)
+    summaries = {pk: visible_to_summary(names[pk]) for pk in pks}
+    Manual.objects.bulk_update(
+        [Manual(pk=pk, visible_to=summary) for pk, summary in summaries.items()],
+        ['visible_to'],
+        batch_size=500,
+    )
+    # bulk_update sends no post_save
+    bump_model_version_on_commit(Manual)
+    return summaries
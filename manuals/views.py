@@ -1,3 +1,48 @@
-from django.shortcuts import render
+from django.db.models import Q
+from django.http import JsonResponse
+from .models import Manual
+from .search import search_enabled, search_manuals
 
-# Create your views here.
+SEARCH_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+
+def visible_manuals(user):
+    """Active manuals the user is allowed to see"""
+    manuals = Manual.objects.filter(is_active=True, category__is_active=True)
+    if user.is_superuser:
+        return manuals
+    if not user.is_authenticated:
+        return manuals.filter(is_public=True)
+    # Subquery instead of a join, so no DISTINCT is needed
+    group_manuals = Manual.visible_to_groups.through.objects.filter(group__user=user).values('manual_id')
+    return manuals.filter(Q(is_public=True) | Q(pk__in=group_manuals))
+
+
+def search_api(request):
+    """API ค้นหาคู่มือ (?q=คำค้น&limit=20)"""
+    term = request.GET.get('q', '').strip()
+    if not term:
+        return JsonResponse({'results': []})
+    try:
+        limit = min(max(int(request.GET.get('limit', SEARCH_LIMIT)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'limit ต้องเป็นตัวเลข'}, status=400)
+
+    manuals = search_manuals(visible_manuals(request.user), term)
+    if search_enabled(manuals.db):
+        manuals = manuals.order_by('-search_rank', 'pk')
+    manuals = manuals.select_related('category')[:limit]
+
+    return JsonResponse({
+        'results': [
+            {
+                'id': manual.pk,
+                'title': manual.title,
+                'slug': manual.slug,
+                'category': manual.category.name,
+                'rank': getattr(manual, 'search_rank', None),
+            }
+            for manual in manuals
+        ]
+    })
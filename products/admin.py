@@ -2,20 +2,21 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from .models import Category, Brand
-import pytz
-from datetime import datetime
 from django.contrib.auth import get_user_model
 from django.urls import path
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
-from django.core.files.storage import default_storage
+from core.admin_mixins import EstimatedCountMixin, QueryBudgetMixin, TrigramSearchMixin
+from core.thai_dates import thai_datetime
+from core.thumbnails import thumbnail_img
 
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(EstimatedCountMixin, QueryBudgetMixin, TrigramSearchMixin, admin.ModelAdmin):
     """Admin for Category model"""
     
     list_display = ('name', 'slug', 'description_preview', 'image_preview', 'image_size_display', 'seo_title_display', 'is_active', 'created_by_display', 'updated_by_display', 'created_at_thai')
+    list_select_related = ('created_by', 'updated_by')
     list_filter = ('is_active', 'created_at', 'updated_at')
     search_fields = ('name', 'slug', 'description', 'seo_title', 'seo_description')
     readonly_fields = ('created_at_thai', 'updated_at_thai', 'created_by_display', 'updated_by_display', 'image_preview', 'image_size_display', 'og_image_preview', 'og_image_size_display', 'image_with_delete_button', 'og_image_with_delete_button')
@@ -62,7 +63,7 @@ class CategoryAdmin(admin.ModelAdmin):
         """Display image preview"""
         if obj.image:
             return mark_safe(
-                f'<div class="category-image-preview"><img src="{obj.image.url}" alt="Category Image" /></div>'
+                f'<div class="category-image-preview">{thumbnail_img(obj.image, 50, "Category Image")}</div>'
             )
         return "ไม่มีรูป"
     image_preview.short_description = 'รูปหมวดหมู่'
@@ -162,48 +163,12 @@ class CategoryAdmin(admin.ModelAdmin):
     
     def created_at_thai(self, obj):
         """Display creation date in Thai Buddhist Era"""
-        if obj.created_at:
-            # Convert to Thai timezone and Buddhist Era
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.created_at.astimezone(thai_tz)
-            
-            # Convert to Buddhist Era (add 543 years)
-            buddhist_year = thai_time.year + 543
-            
-            # Format in Thai
-            thai_months = [
-                'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
-                'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
-            ]
-            
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.created_at)
     created_at_thai.short_description = 'วันที่สร้าง'
     
     def updated_at_thai(self, obj):
         """Display update date in Thai Buddhist Era"""
-        if obj.updated_at:
-            # Convert to Thai timezone and Buddhist Era
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.updated_at.astimezone(thai_tz)
-            
-            # Convert to Buddhist Era (add 543 years)
-            buddhist_year = thai_time.year + 543
-            
-            # Format in Thai
-            thai_months = [
-                'มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
-                'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม'
-            ]
-            
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.updated_at)
     updated_at_thai.short_description = 'วันที่แก้ไข'
     
     def save_model(self, request, obj, form, change):
@@ -216,23 +181,15 @@ class CategoryAdmin(admin.ModelAdmin):
     def delete_category_images(self, request, queryset):
         """Delete images for selected categories"""
         from django.contrib import messages
-        from django.core.files.storage import default_storage
+        
+        categories = [category for category in queryset if category.image or category.og_image]
         
         deleted_count = 0
-        for category in queryset:
+        for category in categories:
             try:
-                # Delete main image
-                if category.image:
-                    if default_storage.exists(category.image.name):
-                        default_storage.delete(category.image.name)
-                    category.image = None
-                
-                # Delete OG image
-                if category.og_image:
-                    if default_storage.exists(category.og_image.name):
-                        default_storage.delete(category.og_image.name)
-                    category.og_image = None
-                
+                # The post_save signal queues the old files and thumbnails for deletion
+                category.image = None
+                category.og_image = None
                 category.save()
                 deleted_count += 1
             except Exception as e:
@@ -260,9 +217,7 @@ class CategoryAdmin(admin.ModelAdmin):
         
         if category.image:
             try:
-                if default_storage.exists(category.image.name):
-                    default_storage.delete(category.image.name)
-                
+                # The post_save signal queues the old file for deletion
                 category.image = None
                 category.save()
                 messages.success(request, f"ลบรูปหมวดหมู่ {category.name} เรียบร้อยแล้ว")
@@ -279,9 +234,7 @@ class CategoryAdmin(admin.ModelAdmin):
         
         if category.og_image:
             try:
-                if default_storage.exists(category.og_image.name):
-                    default_storage.delete(category.og_image.name)
-                
+                # The post_save signal queues the old file for deletion
                 category.og_image = None
                 category.save()
                 messages.success(request, f"ลบรูป OG ของหมวดหมู่ {category.name} เรียบร้อยแล้ว")
@@ -301,10 +254,11 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Brand)
-class BrandAdmin(admin.ModelAdmin):
+class BrandAdmin(EstimatedCountMixin, QueryBudgetMixin, TrigramSearchMixin, admin.ModelAdmin):
     """Admin for Brand model"""
     
     list_display = ('name', 'slug', 'description_preview', 'logo_preview', 'logo_size_display', 'seo_title_display', 'is_active', 'created_by_display', 'updated_by_display', 'created_at_thai')
+    list_select_related = ('created_by', 'updated_by')
     list_filter = ('is_active', 'created_at', 'updated_at')
     search_fields = ('name', 'slug', 'description', 'seo_title', 'seo_description')
     readonly_fields = ('created_at_thai', 'updated_at_thai', 'created_by_display', 'updated_by_display', 'logo_preview', 'logo_size_display', 'og_image_preview', 'og_image_size_display', 'logo_with_delete_button', 'og_image_with_delete_button')
@@ -351,7 +305,7 @@ class BrandAdmin(admin.ModelAdmin):
         """Display logo preview"""
         if obj.logo:
             return mark_safe(
-                f'<div class="brand-logo-preview"><img src="{obj.logo.url}" alt="Brand Logo" /></div>'
+                f'<div class="brand-logo-preview">{thumbnail_img(obj.logo, 50, "Brand Logo")}</div>'
             )
         return "ไม่มีรูป"
     logo_preview.short_description = 'Logo แบรนด์'
@@ -444,28 +398,12 @@ class BrandAdmin(admin.ModelAdmin):
 
     def created_at_thai(self, obj):
         """Display creation date in Thai Buddhist Era"""
-        if obj.created_at:
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.created_at.astimezone(thai_tz)
-            buddhist_year = thai_time.year + 543
-            thai_months = ['มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน', 'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม']
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.created_at)
     created_at_thai.short_description = 'วันที่สร้าง'
 
     def updated_at_thai(self, obj):
         """Display update date in Thai Buddhist Era"""
-        if obj.updated_at:
-            thai_tz = pytz.timezone('Asia/Bangkok')
-            thai_time = obj.updated_at.astimezone(thai_tz)
-            buddhist_year = thai_time.year + 543
-            thai_months = ['มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน', 'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม']
-            month_name = thai_months[thai_time.month - 1]
-            formatted_date = f"{thai_time.day} {month_name} {buddhist_year}, {thai_time.strftime('%H:%M')}"
-            return formatted_date
-        return "-"
+        return thai_datetime(obj.updated_at)
     updated_at_thai.short_description = 'วันที่แก้ไข'
     
     def save_model(self, request, obj, form, change):
@@ -477,21 +415,14 @@ class BrandAdmin(admin.ModelAdmin):
     
     def delete_brand_logos(self, request, queryset):
         """Delete logos for selected brands"""
+        brands = [brand for brand in queryset if brand.logo or brand.og_image]
+        
         deleted_count = 0
-        for brand in queryset:
+        for brand in brands:
             try:
-                # Delete main logo
-                if brand.logo:
-                    if default_storage.exists(brand.logo.name):
-                        default_storage.delete(brand.logo.name)
-                    brand.logo = None
-                
-                # Delete OG image
-                if brand.og_image:
-                    if default_storage.exists(brand.og_image.name):
-                        default_storage.delete(brand.og_image.name)
-                    brand.og_image = None
-                
+                # The post_save signal queues the old files and thumbnails for deletion
+                brand.logo = None
+                brand.og_image = None
                 brand.save()
                 deleted_count += 1
             except Exception as e:
@@ -519,9 +450,7 @@ class BrandAdmin(admin.ModelAdmin):
         
         if brand.logo:
             try:
-                if default_storage.exists(brand.logo.name):
-                    default_storage.delete(brand.logo.name)
-                
+                # The post_save signal queues the old file for deletion
                 brand.logo = None
                 brand.save()
                 messages.success(request, f"ลบโลโก้แบรนด์ {brand.name} เรียบร้อยแล้ว")
@@ -538,9 +467,7 @@ class BrandAdmin(admin.ModelAdmin):
         
         if brand.og_image:
             try:
-                if default_storage.exists(brand.og_image.name):
-                    default_storage.delete(brand.og_image.name)
-                
+                # The post_save signal queues the old file for deletion
                 brand.og_image = None
                 brand.save()
                 messages.success(request, f"ลบรูป OG ของแบรนด์ {brand.name} เรียบร้อยแล้ว")
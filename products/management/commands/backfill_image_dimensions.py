@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from core.cache import bump_model_version
+from core.images import read_image_dimensions
+from products.models import Category, Brand
+
+MODELS = (Category, Brand)
+
+
+class Command(BaseCommand):
+    help = 'Fill stored width/height for images uploaded before dimensions were saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Number of images to read concurrently (default: 8)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-read dimensions even when they are already stored',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Read dimensions but do not save them',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+
+        for model in MODELS:
+            tasks = self.collect(model, options['force'])
+            if not tasks:
+                continue
+
+            self.stdout.write(f'{model._meta.verbose_name}: {len(tasks)} images')
+            updates = {}
+            with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                futures = {
+                    executor.submit(read_image_dimensions, name): (pk, width_attr, height_attr, name)
+                    for pk, width_attr, height_attr, name in tasks
+                }
+                for future in as_completed(futures):
+                    pk, width_attr, height_attr, name = futures[future]
+                    try:
+                        width, height = future.result()
+                    except Exception as e:
+                        self.stdout.write(f'Error reading {name}: {e}')
+                        continue
+                    if not width:
+                        self.stdout.write(f'Unknown image format: {name}')
+                        continue
+                    updates.setdefault(pk, {}).update({width_attr: width, height_attr: height})
+                    self.stdout.write(f'{name}: {width}x{height}')
+
+            total += len(updates)
+            if options['dry_run'] or not updates:
+                continue
+
+            # Write the columns directly so save() side effects (slugs, signals) don't run
+            for pk, values in updates.items():
+                model.objects.filter(pk=pk).update(**values)
+            bump_model_version(model)
+
+        elapsed = time.monotonic() - started
+        if options['dry_run']:
+            self.stdout.write(f'Dry run completed in {elapsed:.2f}s. No rows were changed.')
+        else:
+            self.stdout.write(f'Completed. Updated {total} rows in {elapsed:.2f}s')
+
+    def collect(self, model, force):
+        """Return (pk, width field, height field, file name) for images to read"""
+        tasks = []
+        for field_name, width_attr, height_attr in model.IMAGE_DIMENSION_FIELDS:
+            queryset = model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+            if not force:
+                queryset = queryset.filter(Q(**{f'{width_attr}__isnull': True}) | Q(**{f'{height_attr}__isnull': True}))
+            for pk, name in queryset.values_list('pk', field_name).iterator():
+                tasks.append((pk, width_attr, height_attr, name))
+        return tasks
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_brand'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brand',
+            name='logo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ความสูงโลโก้'),
+        ),
+        migrations.AddField(
+            model_name='brand',
+            name='logo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ความกว้างโลโก้'),
+        ),
+        migrations.AddField(
+            model_name='brand',
+            name='og_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ความสูงรูป OG'),
+        ),
+        migrations.AddField(
+            model_name='brand',
+            name='og_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ความกว้างรูป OG'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ความสูงรูป'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ความกว้างรูป'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='og_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ความสูงรูป OG'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='og_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ความกว้างรูป OG'),
+        ),
+    ]
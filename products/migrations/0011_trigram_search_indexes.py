@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.trigram import trigram_indexes
+
+SEARCH_COLUMNS = ('name', 'slug', 'description', 'seo_title', 'seo_description')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('products', '0010_image_dimensions'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        trigram_indexes('products_category', SEARCH_COLUMNS),
+        trigram_indexes('products_brand', SEARCH_COLUMNS),
+    ]
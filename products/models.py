@@ -3,15 +3,19 @@ from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 import os
 from datetime import datetime
-from django.utils.text import slugify
-import re
-from unidecode import unidecode
+from core.images import update_image_dimensions, format_dimensions
+from core.jobs import enqueue_thumbnails
+from core.media import apply_hashed_names, is_hashed_name, new_uploads
+from core.slugs import UniqueSlugMixin, custom_slugify
+from core.tracking import FieldTrackerMixin
 
 User = get_user_model()
 
 
 def category_image_upload_path(instance, filename):
     """Generate upload path for category images"""
+    if is_hashed_name(filename):
+        return os.path.join('categories', filename)
     ext = filename.split('.')[-1]
     filename = f"category_{instance.pk}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
     return os.path.join('categories', filename)
@@ -19,69 +23,14 @@ def category_image_upload_path(instance, filename):
 
 def brand_logo_upload_path(instance, filename):
     """Generate upload path for brand logos"""
+    if is_hashed_name(filename):
+        return os.path.join('brands', filename)
     ext = filename.split('.')[-1]
     filename = f"brand_{instance.pk}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
     return os.path.join('brands', filename)
 
 
-def custom_slugify(value):
-    """Create slug that supports Thai characters"""
-    if not value:
-        return ''
-    
-    # Use unidecode to convert Thai to readable text
-    decoded = unidecode(value)
-    
-    # Clean up the result
-    result = re.sub(r'[^\w\s-]', '', decoded)  # Remove special characters
-    result = re.sub(r'[-\s]+', '-', result)    # Replace spaces and multiple dashes with single dash
-    result = result.strip('-')                 # Remove leading/trailing dashes
-    
-    return result.lower()
-
-
-def thai_slugify(text):
-    """Convert Thai text to URL-friendly slug"""
-    if not text:
-        return ''
-    
-    # Thai character mapping
-    thai_map = {
-        'ก': 'k', 'ข': 'kh', 'ฃ': 'kh', 'ค': 'kh', 'ฅ': 'kh', 'ฆ': 'kh',
-        'ง': 'ng', 'จ': 'ch', 'ฉ': 'ch', 'ช': 'ch', 'ซ': 's', 'ฌ': 'ch',
-        'ญ': 'y', 'ด': 'd', 'ต': 't', 'ถ': 'th', 'ท': 'th', 'ธ': 'th',
-        'น': 'n', 'บ': 'b', 'ป': 'p', 'ผ': 'ph', 'ฝ': 'f', 'พ': 'ph',
-        'ฟ': 'f', 'ภ': 'ph', 'ม': 'm', 'ย': 'y', 'ร': 'r', 'ล': 'l',
-        'ว': 'w', 'ศ': 's', 'ษ': 's', 'ส': 's', 'ห': 'h', 'ฬ': 'l',
-        'อ': '', 'ฮ': 'h',
-        'ะ': 'a', 'ั': 'a', 'า': 'a', 'ำ': 'am', 'ิ': 'i', 'ี': 'i',
-        'ึ': 'ue', 'ื': 'ue', 'ุ': 'u', 'ู': 'u', 'เ': 'e', 'แ': 'ae',
-        'โ': 'o', 'ใ': 'ai', 'ไ': 'ai', '็': '', '่': '', '้': '',
-        '๊': '', '๋': '', '์': '', 'ํ': '', '๎': '', '๏': '', '๐': '0',
-        '๑': '1', '๒': '2', '๓': '3', '๔': '4', '๕': '5',
-        '๖': '6', '๗': '7', '๘': '8', '๙': '9'
-    }
-    
-    # Convert Thai characters
-    result = ''
-    for char in text:
-        if char in thai_map:
-            result += thai_map[char]
-        elif char.isalnum():
-            result += char
-        elif char in ' -_':
-            result += '-'
-        else:
-            result += ''
-    
-    # Clean up the result
-    result = re.sub(r'-+', '-', result)  # Replace multiple dashes with single dash
-    result = result.strip('-')  # Remove leading/trailing dashes
-    
-    return result.lower()
-
-
-class Category(models.Model):
+class Category(UniqueSlugMixin, FieldTrackerMixin, models.Model):
     """Product category model"""
     name = models.CharField(
         _("ชื่อหมวดหมู่"),
@@ -109,6 +58,18 @@ class Category(models.Model):
         null=True,
         help_text=_("อัปโหลดรูปหมวดหมู่สินค้า (ขนาด 1:1)")
     )
+    image_width = models.PositiveIntegerField(
+        _("ความกว้างรูป"),
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        _("ความสูงรูป"),
+        blank=True,
+        null=True,
+        editable=False
+    )
     is_active = models.BooleanField(
         _("ใช้งานได้"),
         default=True,
@@ -170,6 +131,18 @@ class Category(models.Model):
         null=True,
         help_text=_("รูปสำหรับแชร์ใน Social Media (ขนาด 1200x630px - อัตราส่วน 16:9)")
     )
+    og_image_width = models.PositiveIntegerField(
+        _("ความกว้างรูป OG"),
+        blank=True,
+        null=True,
+        editable=False
+    )
+    og_image_height = models.PositiveIntegerField(
+        _("ความสูงรูป OG"),
+        blank=True,
+        null=True,
+        editable=False
+    )
     og_title = models.CharField(
         _("OG Title"),
         max_length=100,
@@ -189,46 +162,41 @@ class Category(models.Model):
         verbose_name_plural = _("หมวดหมู่สินค้า")
         ordering = ['name']
 
+    # (image field, width field, height field) filled when a file is uploaded
+    IMAGE_DIMENSION_FIELDS = (
+        ('image', 'image_width', 'image_height'),
+        ('og_image', 'og_image_width', 'og_image_height'),
+    )
+    # Image fields that get WebP thumbnails for admin previews
+    THUMBNAIL_FIELDS = ('image',)
+    # Old files are deleted by signals when these change
+    tracked_fields = ('image', 'og_image')
+
     def __str__(self):
         return self.name
 
+    def get_slug_base(self):
+        """Slug is auto-generated from the name when left empty"""
+        return custom_slugify(self.name)
+
     def save(self, *args, **kwargs):
-        """Auto-generate slug from name if not provided"""
-        if not self.slug:
-            self.slug = custom_slugify(self.name)
-            # Ensure uniqueness
-            original_slug = self.slug
-            counter = 1
-            while Category.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
+        """Fill image metadata; an empty slug is allocated by UniqueSlugMixin"""
+        apply_hashed_names(self, [field_name for field_name, _w, _h in self.IMAGE_DIMENSION_FIELDS])
+        for field_name, width_attr, height_attr in self.IMAGE_DIMENSION_FIELDS:
+            update_image_dimensions(self, field_name, width_attr, height_attr)
+        uploaded = new_uploads(self, self.THUMBNAIL_FIELDS)
         super().save(*args, **kwargs)
+        enqueue_thumbnails(self, uploaded)
 
     @property
     def image_size(self):
-        """Get image dimensions if available"""
-        if self.image:
-            try:
-                from PIL import Image
-                with self.image.open() as img:
-                    pil_img = Image.open(img)
-                    return f"{pil_img.width}x{pil_img.height}"
-            except:
-                return "ไม่สามารถอ่านขนาดได้"
-        return "ไม่มีรูป"
+        """Get stored image dimensions"""
+        return format_dimensions(self.image, self.image_width, self.image_height)
     
     @property
     def og_image_size(self):
-        """Get OG image dimensions if available"""
-        if self.og_image:
-            try:
-                from PIL import Image
-                with self.og_image.open() as img:
-                    pil_img = Image.open(img)
-                    return f"{pil_img.width}x{pil_img.height}"
-            except:
-                return "ไม่สามารถอ่านขนาดได้"
-        return "ไม่มีรูป"
+        """Get stored OG image dimensions"""
+        return format_dimensions(self.og_image, self.og_image_width, self.og_image_height)
     
     @property
     def seo_title_display(self):
@@ -241,7 +209,7 @@ class Category(models.Model):
         return self.og_title if self.og_title else (self.seo_title if self.seo_title else self.name)
 
 
-class Brand(models.Model):
+class Brand(UniqueSlugMixin, FieldTrackerMixin, models.Model):
     """Brand model"""
     name = models.CharField(
         _("ชื่อแบรนด์"),
@@ -269,6 +237,18 @@ class Brand(models.Model):
         null=True,
         help_text=_("อัปโหลดโลโก้แบรนด์ (อัตราส่วน 1:1)")
     )
+    logo_width = models.PositiveIntegerField(
+        _("ความกว้างโลโก้"),
+        blank=True,
+        null=True,
+        editable=False
+    )
+    logo_height = models.PositiveIntegerField(
+        _("ความสูงโลโก้"),
+        blank=True,
+        null=True,
+        editable=False
+    )
     alt_text = models.CharField(
         _("Alt Text"),
         max_length=100,
@@ -300,6 +280,18 @@ class Brand(models.Model):
         null=True,
         help_text=_("รูปสำหรับแชร์ใน Social Media (ขนาด 1200x630px - อัตราส่วน 16:9)")
     )
+    og_image_width = models.PositiveIntegerField(
+        _("ความกว้างรูป OG"),
+        blank=True,
+        null=True,
+        editable=False
+    )
+    og_image_height = models.PositiveIntegerField(
+        _("ความสูงรูป OG"),
+        blank=True,
+        null=True,
+        editable=False
+    )
     og_title = models.CharField(
         _("OG Title"),
         max_length=100,
@@ -349,46 +341,41 @@ class Brand(models.Model):
         verbose_name_plural = _("แบรนด์")
         ordering = ['name']
 
+    # (image field, width field, height field) filled when a file is uploaded
+    IMAGE_DIMENSION_FIELDS = (
+        ('logo', 'logo_width', 'logo_height'),
+        ('og_image', 'og_image_width', 'og_image_height'),
+    )
+    # Image fields that get WebP thumbnails for admin previews
+    THUMBNAIL_FIELDS = ('logo',)
+    # Old files are deleted by signals when these change
+    tracked_fields = ('logo', 'og_image')
+
     def __str__(self):
         return self.name
 
+    def get_slug_base(self):
+        """Slug is auto-generated from the name when left empty"""
+        return custom_slugify(self.name)
+
     def save(self, *args, **kwargs):
-        """Auto-generate slug from name if not provided"""
-        if not self.slug:
-            self.slug = custom_slugify(self.name)
-            # Ensure uniqueness
-            original_slug = self.slug
-            counter = 1
-            while Brand.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
+        """Fill image metadata; an empty slug is allocated by UniqueSlugMixin"""
+        apply_hashed_names(self, [field_name for field_name, _w, _h in self.IMAGE_DIMENSION_FIELDS])
+        for field_name, width_attr, height_attr in self.IMAGE_DIMENSION_FIELDS:
+            update_image_dimensions(self, field_name, width_attr, height_attr)
+        uploaded = new_uploads(self, self.THUMBNAIL_FIELDS)
         super().save(*args, **kwargs)
+        enqueue_thumbnails(self, uploaded)
 
     @property
     def logo_size(self):
-        """Get logo dimensions if available"""
-        if self.logo:
-            try:
-                from PIL import Image
-                with self.logo.open() as img:
-                    pil_img = Image.open(img)
-                    return f"{pil_img.width}x{pil_img.height}"
-            except:
-                return "ไม่สามารถอ่านขนาดได้"
-        return "ไม่มีรูป"
+        """Get stored logo dimensions"""
+        return format_dimensions(self.logo, self.logo_width, self.logo_height)
     
     @property
     def og_image_size(self):
-        """Get OG image dimensions if available"""
-        if self.og_image:
-            try:
-                from PIL import Image
-                with self.og_image.open() as img:
-                    pil_img = Image.open(img)
-                    return f"{pil_img.width}x{pil_img.height}"
-            except:
-                return "ไม่สามารถอ่านขนาดได้"
-        return "ไม่มีรูป"
+        """Get stored OG image dimensions"""
+        return format_dimensions(self.og_image, self.og_image_width, self.og_image_height)
     
     @property
     def seo_title_display(self):
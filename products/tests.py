@@ -1,3 +1,239 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from core import jobs
+from core.cache import model_version
+from core.models import MediaJob
+from core.testing import ChangelistQueryCountMixin, TempMediaMixin, image_upload
+from core.thumbnails import with_thumbnails
+
+from .admin import CategoryAdmin
+from .models import Brand, Category
+
+
+class ChangelistQueryCountTest(ChangelistQueryCountMixin, TestCase):
+    """Changelist query counts must not grow with the number of rows"""
+
+    def add_rows(self, model):
+        def add(count):
+            for _ in range(count):
+                model.objects.create(
+                    name=f'ตัวอย่าง {model.objects.count()}', created_by=self.admin, updated_by=self.admin
+                )
+        return add
+
+    def test_category_changelist(self):
+        self.assert_constant_queries(reverse('admin:products_category_changelist'), self.add_rows(Category))
+
+    def test_brand_changelist(self):
+        self.assert_constant_queries(reverse('admin:products_brand_changelist'), self.add_rows(Brand))
+
+
+class AdminSearchTest(TestCase):
+    """TrigramSearchMixin matches what Django's default search matched"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        self.drill = Category.objects.create(name='สว่านไร้สาย', seo_title='Cordless drill')
+        self.paint = Category.objects.create(name='สีทาบ้าน', description='สีน้ำอะครีลิค')
+
+    def search(self, term):
+        response = self.client.get(reverse('admin:products_category_changelist'), {'q': term})
+        return set(response.context['cl'].result_list)
+
+    def test_searches_every_field(self):
+        self.assertEqual(self.search('ไร้สาย'), {self.drill})
+        self.assertEqual(self.search('DRILL'), {self.drill})
+        self.assertEqual(self.search('อะครีลิค'), {self.paint})
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search('cordless สว่าน'), {self.drill})
+        self.assertEqual(self.search('cordless สีทา'), set())
+        self.assertEqual(self.search('"cordless drill"'), {self.drill})
+
+    def test_uses_get_search_fields(self):
+        with mock.patch.object(CategoryAdmin, 'get_search_fields', return_value=('seo_title',)):
+            self.assertEqual(self.search('cordless'), {self.drill})
+            self.assertEqual(self.search('ไร้สาย'), set())
+
+    def test_explicit_lookup_is_kept(self):
+        Category.objects.filter(pk=self.drill.pk).update(created_by=self.admin)
+        with mock.patch.object(CategoryAdmin, 'get_search_fields', return_value=('name__exact', 'created_by__username__exact')):
+            self.assertEqual(self.search('สีทาบ้าน'), {self.paint})
+            self.assertEqual(self.search('สีทา'), set())
+            self.assertEqual(self.search('admin'), {self.drill})
+            self.assertEqual(self.search('adm'), set())
+
+
+class VersionedCacheTest(TestCase):
+    """Model writes invalidate versioned cache entries"""
+
+    def test_save_and_delete_bump_the_version(self):
+        from core.cache import model_version
+
+        before = model_version(Category)
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='ใหม่')
+        after_save = model_version(Category)
+        self.assertGreater(after_save, before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.delete()
+        self.assertGreater(model_version(Category), after_save)
+        self.assertEqual(model_version(Brand), model_version('products.Brand'))
+
+    def test_version_is_bumped_after_commit(self):
+        from core.cache import cached_queryset, model_version
+
+        before = model_version(Category)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Category.objects.create(name='ใหม่')
+            # A reader before the commit still sees (and caches) the old version
+            self.assertEqual(model_version(Category), before)
+            cached_queryset('categories', Category.objects.none())
+        self.assertEqual(model_version(Category), before)
+
+        for callback in callbacks:
+            callback()
+        self.assertGreater(model_version(Category), before)
+        self.assertEqual(len(cached_queryset('categories', Category.objects.all())), 1)
+
+    def test_cached_queryset_follows_writes(self):
+        from core.cache import cached_queryset
+
+        Category.objects.create(name='เก่า')
+        with self.assertNumQueries(1):
+            first = cached_queryset('categories', Category.objects.order_by('name'))
+            again = cached_queryset('categories', Category.objects.order_by('name'))
+        self.assertEqual([c.name for c in again], [c.name for c in first])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='ใหม่')
+        self.assertEqual(len(cached_queryset('categories', Category.objects.order_by('name'))), 2)
+
+    def test_cached_entries_use_the_default_timeout(self):
+        from django.core.cache import cache
+        from core.cache import cached_fragment, cached_queryset
+
+        # timeout=None would mean "never expire" and keep every superseded version
+        with mock.patch.object(cache, 'get_or_set', return_value=[]) as get_or_set:
+            cached_queryset('categories', Category.objects.all())
+            cached_fragment('menu', str, Category)
+        for call in get_or_set.call_args_list:
+            self.assertIs(call.args[2], DEFAULT_TIMEOUT)
+
+
+class ImageDimensionsTest(TempMediaMixin, TestCase):
+    """Stored width/height follow uploads and are backfilled for old rows"""
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name='สว่าน', image=image_upload('drill.png', size=(120, 80)))
+            self.brand = Brand.objects.create(name='Makita', logo=image_upload('makita.png', size=(60, 20)))
+
+    def test_dimensions_are_read_on_upload(self):
+        self.assertEqual((self.category.image_width, self.category.image_height), (120, 80))
+        self.assertEqual((self.brand.logo_width, self.brand.logo_height), (60, 20))
+        self.assertEqual(self.category.image_size, '120x80')
+        self.assertIsNone(self.category.og_image_width)
+
+    def test_existing_files_are_not_reopened(self):
+        with mock.patch('core.images.get_image_dimensions') as get_image_dimensions:
+            self.category.name = 'สว่านไร้สาย'
+            self.category.save()
+        get_image_dimensions.assert_not_called()
+        self.assertEqual(self.category.image_width, 120)
+
+    def test_cleared_image_clears_dimensions(self):
+        self.category.image = None
+        self.category.save()
+        self.category.refresh_from_db()
+        self.assertEqual((self.category.image_width, self.category.image_height), (None, None))
+
+    def backfill(self, **options):
+        out = StringIO()
+        call_command('backfill_image_dimensions', threads=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_backfill_fills_missing_dimensions(self):
+        Category.objects.update(image_width=None, image_height=None)
+        Brand.objects.update(logo_width=None)
+        before = model_version(Category)
+
+        output = self.backfill()
+
+        self.category.refresh_from_db()
+        self.brand.refresh_from_db()
+        self.assertEqual((self.category.image_width, self.category.image_height), (120, 80))
+        self.assertEqual((self.brand.logo_width, self.brand.logo_height), (60, 20))
+        self.assertGreater(model_version(Category), before)
+        self.assertIn('Updated 2 rows', output)
+        # Nothing left to read
+        self.assertIn('Updated 0 rows', self.backfill())
+
+    def test_backfill_dry_run(self):
+        Category.objects.update(image_width=None, image_height=None)
+        output = self.backfill(dry_run=True)
+        self.assertIn(f'{self.category.image.name}: 120x80', output)
+        self.category.refresh_from_db()
+        self.assertIsNone(self.category.image_width)
+
+
+@mock.patch('core.jobs.close_old_connections')
+class AdminImageDeleteTest(TempMediaMixin, TestCase):
+    """Admin image deletes clear the fields; only the queued media job touches storage"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(
+                name='สว่าน', image=image_upload('drill.png'), og_image=image_upload('drill-og.png', color=(0, 200, 0)),
+            )
+        self.files = with_thumbnails([self.category.image.name]) + [self.category.og_image.name]
+        self.assertTrue(all(self.stored(name) for name in self.files))
+
+    def post(self, url, data=None):
+        with self.settings(MEDIA_JOBS_RUN_SYNC=False), self.captureOnCommitCallbacks(execute=True):
+            with mock.patch('core.jobs.bulk_delete', wraps=jobs.bulk_delete) as bulk_delete:
+                response = self.client.post(url, data or {}, follow=True)
+        bulk_delete.assert_not_called()
+        return response
+
+    def run_delete_job(self):
+        job = MediaJob.objects.get(action='delete_files')
+        jobs.run_job(jobs.claim_jobs(1)[0])
+        return job
+
+    def test_action_queues_one_delete(self, _close):
+        response = self.post(reverse('admin:products_category_changelist'), {
+            'action': 'delete_category_images', '_selected_action': [self.category.pk],
+        })
+        self.assertContains(response, 'ลบรูปหมวดหมู่ 1 รายการเรียบร้อยแล้ว')
+        self.category.refresh_from_db()
+        self.assertFalse(self.category.image or self.category.og_image)
+        # Nothing was deleted during the request
+        self.assertTrue(all(self.stored(name) for name in self.files))
+
+        job = self.run_delete_job()
+        self.assertCountEqual(job.names, self.files)
+        self.assertFalse(any(self.stored(name) for name in self.files))
+
+    def test_delete_image_view_queues_one_delete(self, _close):
+        image_files = with_thumbnails([self.category.image.name])
+        self.post(reverse('admin:products_category_delete_image', args=[self.category.pk]))
+        self.assertTrue(all(self.stored(name) for name in image_files))
 
-# Create your tests here.
+        job = self.run_delete_job()
+        self.assertCountEqual(job.names, image_files)
+        self.assertFalse(any(self.stored(name) for name in image_files))
+        self.assertTrue(self.stored(self.category.og_image.name))
@@ -2,24 +2,25 @@
 """
 Script to setup R2 bucket for public access
 """
-import boto3
 import os
-from dotenv import load_dotenv
+import django
+import sys
+from pathlib import Path
 
-load_dotenv()
+# Setup Django first (settings load .env)
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'easybuytofix.settings')
+django.setup()
+
+from core.r2 import get_r2_client, get_bucket_name
 
 def setup_r2_public_access():
     """Setup R2 bucket for public access"""
     
-    # Create S3 client for R2
-    s3_client = boto3.client(
-        's3',
-        endpoint_url=os.getenv('R2_ENDPOINT_URL'),
-        aws_access_key_id=os.getenv('R2_ACCESS_KEY_ID'),
-        aws_secret_access_key=os.getenv('R2_SECRET_ACCESS_KEY'),
-    )
-    
-    bucket_name = os.getenv('R2_BUCKET_NAME')
+    # Shared R2 client
+    s3_client = get_r2_client()
+    bucket_name = get_bucket_name()
     
     try:
         # Set bucket policy for public read access
@@ -0,0 +1,13 @@
+// Thumbnails are rendered by a media job after upload. Until it has run (and
+// for images uploaded before thumbnails existed) show the original instead.
+// Registered in the capture phase because error events do not bubble.
+document.addEventListener('error', function (event) {
+    var img = event.target;
+    if (img.tagName !== 'IMG' || !img.dataset.fallbackSrc) {
+        return;
+    }
+    var fallback = img.dataset.fallbackSrc;
+    delete img.dataset.fallbackSrc;
+    img.removeAttribute('srcset');
+    img.src = fallback;
+}, true);